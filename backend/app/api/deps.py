@@ -2,22 +2,36 @@
 
 from __future__ import annotations
 
-from typing import Annotated
+import time
+from typing import Annotated, Optional
+from uuid import UUID
 
-from fastapi import Depends, Query
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
-from app.core.security import TokenPayload, decode_jwt, require_roles
+from app.core.security import (
+    Principal,
+    TokenPayload,
+    decode_jwt,
+    get_profile_id_cache,
+    require_roles,
+)
 from app.db.session import get_db
+from app.models import UserRole
+from app.repositories import FacilityRepository, WorkerRepository
 from app.schemas import PaginationParams
 from app.services import (
     AuthService,
+    BulkImportService,
+    DocumentProcessingService,
     EndorsementsService,
     FacilitiesService,
     JobsService,
+    UploadService,
     WorkersService,
 )
+from app.services.activity_tracker import get_activity_tracker
 
 OAuth2Scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/worker/login")
 
@@ -54,6 +68,20 @@ def get_endorsements_service(
     return EndorsementsService(db)
 
 
+def get_bulk_import_service(db: Annotated[Session, Depends(get_db)]) -> BulkImportService:
+    return BulkImportService(db)
+
+
+def get_upload_service(db: Annotated[Session, Depends(get_db)]) -> UploadService:
+    return UploadService(db)
+
+
+def get_document_processing_service(
+    db: Annotated[Session, Depends(get_db)]
+) -> DocumentProcessingService:
+    return DocumentProcessingService(db)
+
+
 def require_role(role: str):
     def dependency(payload: Annotated[TokenPayload, Depends(get_current_user)]):
         require_roles(payload, [role])
@@ -67,3 +95,77 @@ def require_any_role(*roles: str):
         return payload
 
     return dependency
+
+
+def get_principal(
+    payload: Annotated[TokenPayload, Depends(get_current_user)],
+    db: Annotated[Session, Depends(get_db)],
+) -> Principal:
+    """Build the caller's principal from token claims.
+
+    Tokens minted before profile ids were embedded fall back to a cached
+    lookup; the database session is only used on a cache miss.
+    """
+
+    principal = Principal.from_claims(payload)
+    worker_id, facility_id = principal.worker_id, principal.facility_id
+    if worker_id is None and principal.has_role(UserRole.WORKER.value):
+        worker_id = _lookup_profile_id("worker", principal.user_id, WorkerRepository(db))
+    if facility_id is None and principal.has_role(UserRole.FACILITY.value):
+        facility_id = _lookup_profile_id("facility", principal.user_id, FacilityRepository(db))
+    # In-memory only; the tracker writes last_active_at in periodic batches
+    activity = get_activity_tracker()
+    activity.record("worker", worker_id)
+    activity.record("facility", facility_id)
+    if (worker_id, facility_id) == (principal.worker_id, principal.facility_id):
+        return principal
+    return Principal(principal.user_id, principal.roles, worker_id, facility_id)
+
+
+def _lookup_profile_id(kind: str, user_id: UUID, repo) -> Optional[UUID]:
+    cache = get_profile_id_cache()
+    now = time.monotonic()
+    profile_id = cache.get(kind, user_id, now)
+    if profile_id is None:
+        profile_id = repo.id_for_user(user_id)
+        if profile_id is not None:
+            cache.put(kind, user_id, profile_id, now)
+    return profile_id
+
+
+def require_worker(
+    principal: Annotated[Principal, Depends(get_principal)]
+) -> Principal:
+    """Principal of a worker user with a worker profile."""
+
+    if not principal.has_role(UserRole.WORKER.value):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Operation not permitted for this user",
+        )
+    if principal.worker_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Worker profile not found"
+        )
+    return principal
+
+
+def require_facility(
+    principal: Annotated[Principal, Depends(get_principal)]
+) -> Principal:
+    """Principal of a facility user with a facility profile."""
+
+    if not principal.has_role(UserRole.FACILITY.value):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Operation not permitted for this user",
+        )
+    if principal.facility_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Facility profile not found"
+        )
+    return principal
+
+
+WorkerPrincipal = Annotated[Principal, Depends(require_worker)]
+FacilityPrincipal = Annotated[Principal, Depends(require_facility)]
@@ -2,20 +2,75 @@
 
 from __future__ import annotations
 
+import io
+import tempfile
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Body
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
-from app.api.deps import get_db, require_any_role
-from app.models import VerificationStatus, Worker, Facility, UserRole
+from app.api.deps import (
+    get_bulk_import_service,
+    get_db,
+    get_document_processing_service,
+    require_any_role,
+    require_role,
+)
+from app.core.images import derivative_url
+from app.core.metrics import metrics
+from app.core.security import Principal
+from app.models import DocumentAnalysis, VerificationStatus, Worker, Facility, UserRole
+from app.schemas import BulkImportFormat, BulkImportKind, BulkImportReport
+from app.services import BulkImportService, DocumentProcessingService
 from sqlalchemy.orm import Session
 
 router = APIRouter(tags=["admin"])
 
 
+# Enough of the PDF text to triage from the list; the rest stays in the table
+TEXT_EXCERPT_CHARS = 500
+
+
+class DocumentSummary(BaseModel):
+    """Background analysis of one submitted file (see DocumentProcessingService)."""
+    status: str
+    page_count: int | None = None
+    text_excerpt: str | None = None
+    preview_url: str | None = None
+    phash: str | None = None
+    error: str | None = None
+
+
+def _document_summary(url: str, analysis: DocumentAnalysis) -> DocumentSummary:
+    if analysis.preview_path:
+        preview_url = f"/uploads/{analysis.preview_path}"
+    elif analysis.status.value == "DONE":
+        preview_url = derivative_url(url, "card")
+    else:
+        preview_url = None
+    return DocumentSummary(
+        status=analysis.status.value,
+        page_count=analysis.page_count,
+        text_excerpt=(analysis.extracted_text or "")[:TEXT_EXCERPT_CHARS] or None,
+        preview_url=preview_url,
+        phash=analysis.phash,
+        error=analysis.error,
+    )
+
+
+class PossibleDuplicate(BaseModel):
+    """Another account whose verification photo looks like one of this record's."""
+    field: str
+    worker_id: UUID | None = None
+    facility_id: UUID | None = None
+    matched_field: str
+    # Differing bits of the two 64-bit photo hashes; 0 is the same picture
+    distance: int
+
+
 class PendingVerification(BaseModel):
     worker_id: UUID | None = None
     facility_id: UUID | None = None
@@ -31,6 +86,9 @@ class PendingVerification(BaseModel):
     resume_url: str | None = None
     verification_submitted_at: datetime | None = None
     verification_status: str
+    # "selfie", "id_photo", "resume" -> analysis, for files processed so far
+    documents: Dict[str, DocumentSummary] = {}
+    possible_duplicates: List[PossibleDuplicate] = []
     
     class Config:
         from_attributes = True
@@ -50,8 +108,11 @@ class ApproveVerificationResponse(BaseModel):
 @router.get("/verifications/pending", response_model=List[PendingVerification])
 def list_pending_verifications(
     db: Session = Depends(get_db),
-    current_user = Depends(require_any_role(UserRole.WORKER, UserRole.FACILITY))
+    documents: DocumentProcessingService = Depends(get_document_processing_service),
+    current_user = Depends(require_any_role(UserRole.WORKER, UserRole.FACILITY, UserRole.ADMIN))
 ) -> List[PendingVerification]:
+    """Records awaiting review; only admins also get analyses and photo matches."""
+    is_admin = Principal.from_claims(current_user).has_role(UserRole.ADMIN.value)
     result = []
     
     workers = db.query(Worker).filter(
@@ -99,6 +160,34 @@ def list_pending_verifications(
             verification_submitted_at=facility.verification_submitted_at,
             verification_status="PENDING",
         ))
+
+    # Analyses and photo matches describe other users' ID and resume files
+    if not is_admin:
+        return result
+
+    fields = {"selfie": "selfie_url", "id_photo": "id_photo_url", "resume": "resume_url"}
+    analyses = documents.analyses_for(
+        getattr(entry, field) for entry in result for field in fields.values()
+    )
+    for entry in result:
+        for name, field in fields.items():
+            url = getattr(entry, field)
+            if url in analyses:
+                entry.documents[name] = _document_summary(url, analyses[url])
+        kind, owner_id = ("worker", entry.worker_id) if entry.worker_id else ("facility", entry.facility_id)
+        phashes = {
+            field: analyses[getattr(entry, field)].phash
+            for field in ("id_photo_url", "selfie_url")
+            if getattr(entry, field) in analyses
+        }
+        for field, distance, other in documents.find_reused_photos(kind, owner_id, phashes):
+            entry.possible_duplicates.append(PossibleDuplicate(
+                field=field,
+                worker_id=other.owner_id if other.kind == "worker" else None,
+                facility_id=other.owner_id if other.kind == "facility" else None,
+                matched_field=other.field,
+                distance=distance,
+            ))
     
     return result
 
@@ -207,3 +296,55 @@ async def approve_verification(
             detail="Either worker_id or facility_id must be provided"
         )
 
+
+# Request bodies larger than this are spooled to a temporary file on disk.
+IMPORT_SPOOL_SIZE = 8 * 1024 * 1024
+
+IMPORT_CONTENT_TYPES = {
+    "text/csv": BulkImportFormat.CSV,
+    "application/x-ndjson": BulkImportFormat.NDJSON,
+    "application/jsonl": BulkImportFormat.NDJSON,
+}
+
+
+@router.post("/import/{kind}", response_model=BulkImportReport)
+async def bulk_import(
+    kind: BulkImportKind,
+    request: Request,
+    format: Optional[BulkImportFormat] = Query(None),
+    dry_run: bool = Query(False),
+    service: BulkImportService = Depends(get_bulk_import_service),
+    current_user = Depends(require_role(UserRole.ADMIN.value)),
+) -> BulkImportReport:
+    """Bulk load workers, facilities or job posts from CSV or NDJSON."""
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        format = IMPORT_CONTENT_TYPES.get(content_type)
+    if format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=",
+        )
+
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        stream = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+        try:
+            return await run_in_threadpool(service.run, kind, stream, format, dry_run)
+        except UnicodeDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Import file must be UTF-8 encoded",
+            )
+        finally:
+            stream.detach()
+
+
+@router.get("/metrics")
+def read_metrics(
+    current_user = Depends(require_role(UserRole.ADMIN.value)),
+) -> dict:
+    """Snapshot of this process's in-memory counters, gauges and timings."""
+    return metrics.snapshot()
@@ -2,9 +2,12 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Request, status
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 
 from app.api.deps import get_auth_service
+from app.core.rate_limit import get_rate_limiter
 from app.schemas import (
     FacilityRegistrationRequest,
     LoginRequest,
@@ -24,14 +27,25 @@ def _client_context(request: Request) -> tuple[str | None, str | None]:
     return client_host, user_agent
 
 
+def _reject_if_limited(retry_after: float) -> None:
+    # Runs before the service touches the database or the password hasher
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, please try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
 @router.post("/worker/register", response_model=TokenPair, status_code=status.HTTP_201_CREATED)
-def register_worker(
+async def register_worker(
     payload: WorkerRegistrationRequest,
     request: Request,
     service: AuthService = Depends(get_auth_service),
 ) -> TokenPair:
     ip_address, user_agent = _client_context(request)
-    token_pair = service.register_worker(payload, ip_address=ip_address, user_agent=user_agent)
+    _reject_if_limited(await get_rate_limiter().check_register(ip_address))
+    token_pair = await service.register_worker(payload, ip_address=ip_address, user_agent=user_agent)
     
     print("\n=== DEBUG TOKEN PAIR ===")
     print(f"Type: {type(token_pair)}")
@@ -61,33 +75,36 @@ def register_worker(
 
 
 @router.post("/worker/login", response_model=TokenPair)
-def login_worker(
+async def login_worker(
     payload: LoginRequest,
     request: Request,
     service: AuthService = Depends(get_auth_service),
 ) -> TokenPair:
     ip_address, user_agent = _client_context(request)
-    return service.login_worker(payload, ip_address=ip_address, user_agent=user_agent)
+    _reject_if_limited(await get_rate_limiter().check_login(ip_address, payload.email))
+    return await service.login_worker(payload, ip_address=ip_address, user_agent=user_agent)
 
 
 @router.post("/facility/register", response_model=TokenPair, status_code=status.HTTP_201_CREATED)
-def register_facility(
+async def register_facility(
     payload: FacilityRegistrationRequest,
     request: Request,
     service: AuthService = Depends(get_auth_service),
 ) -> TokenPair:
     ip_address, user_agent = _client_context(request)
-    return service.register_facility(payload, ip_address=ip_address, user_agent=user_agent)
+    _reject_if_limited(await get_rate_limiter().check_register(ip_address))
+    return await service.register_facility(payload, ip_address=ip_address, user_agent=user_agent)
 
 
 @router.post("/facility/login", response_model=TokenPair)
-def login_facility(
+async def login_facility(
     payload: LoginRequest,
     request: Request,
     service: AuthService = Depends(get_auth_service),
 ) -> TokenPair:
     ip_address, user_agent = _client_context(request)
-    return service.login_facility(payload, ip_address=ip_address, user_agent=user_agent)
+    _reject_if_limited(await get_rate_limiter().check_login(ip_address, payload.email))
+    return await service.login_facility(payload, ip_address=ip_address, user_agent=user_agent)
 
 
 @router.post("/refresh", response_model=TokenPair)
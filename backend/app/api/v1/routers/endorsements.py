@@ -8,11 +8,12 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Response, status
 
 from app.api.deps import (
+    FacilityPrincipal,
     get_endorsements_service,
+    get_principal,
     require_any_role,
-    require_role,
 )
-from app.core.security import TokenPayload
+from app.core.security import Principal, TokenPayload
 from app.models import UserRole
 from app.schemas import EndorsementCreate, EndorsementRead, EndorsementUpdate
 from app.services.endorsements_service import (
@@ -22,47 +23,12 @@ from app.services.endorsements_service import (
 
 router = APIRouter()
 
-FacilityUser = Annotated[TokenPayload, Depends(require_role(UserRole.FACILITY.value))]
 AnyUser = Annotated[
     TokenPayload,
     Depends(require_any_role(UserRole.WORKER.value, UserRole.FACILITY.value)),
 ]
 
 
-def _get_user_id(payload: TokenPayload) -> UUID:
-    sub = payload.get("sub")
-    if not sub:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication token"
-        )
-    try:
-        return UUID(str(sub))
-    except ValueError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid authentication token"
-        ) from exc
-
-
-def _get_facility_id(service: EndorsementsService, payload: TokenPayload) -> UUID:
-    user_id = _get_user_id(payload)
-    facility = service.get_facility_for_user(user_id)
-    if not facility:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Facility profile not found"
-        )
-    return facility.id
-
-
-def _get_worker_id(service: EndorsementsService, payload: TokenPayload) -> UUID:
-    user_id = _get_user_id(payload)
-    worker = service.get_worker_for_user(user_id)
-    if not worker:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Worker profile not found"
-        )
-    return worker.id
-
-
 @router.get("/workers/{worker_id}", response_model=List[EndorsementRead])
 def list_worker_endorsements(
     worker_id: UUID,
@@ -114,10 +80,10 @@ def list_facility_endorsements(
 @router.post("/", response_model=EndorsementRead, status_code=status.HTTP_201_CREATED)
 def create_endorsement(
     payload: EndorsementCreate,
-    current_user: FacilityUser,
+    principal: FacilityPrincipal,
     service: EndorsementsService = Depends(get_endorsements_service),
 ) -> EndorsementRead:
-    facility_id = _get_facility_id(service, current_user)
+    facility_id = principal.facility_id
     try:
         endorsement = service.create_endorsement(facility_id, payload)
     except EndorsementAlreadyExistsError:
@@ -143,10 +109,10 @@ def create_endorsement(
 def replace_endorsement(
     endorsement_id: UUID,
     payload: EndorsementUpdate,
-    current_user: FacilityUser,
+    principal: FacilityPrincipal,
     service: EndorsementsService = Depends(get_endorsements_service),
 ) -> EndorsementRead:
-    facility_id = _get_facility_id(service, current_user)
+    facility_id = principal.facility_id
     endorsement = service.update_endorsement(endorsement_id, facility_id, payload)
     if not endorsement:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Endorsement not found")
@@ -165,10 +131,10 @@ def replace_endorsement(
 def update_endorsement(
     endorsement_id: UUID,
     payload: EndorsementUpdate,
-    current_user: FacilityUser,
+    principal: FacilityPrincipal,
     service: EndorsementsService = Depends(get_endorsements_service),
 ) -> EndorsementRead:
-    facility_id = _get_facility_id(service, current_user)
+    facility_id = principal.facility_id
     endorsement = service.update_endorsement(endorsement_id, facility_id, payload)
     if not endorsement:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Endorsement not found")
@@ -186,24 +152,26 @@ def update_endorsement(
 @router.delete("/{endorsement_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_endorsement(
     endorsement_id: UUID,
-    current_user: Annotated[
-        TokenPayload,
-        Depends(require_any_role(UserRole.WORKER.value, UserRole.FACILITY.value)),
-    ],
+    principal: Annotated[Principal, Depends(get_principal)],
     service: EndorsementsService = Depends(get_endorsements_service),
 ) -> Response:
-    roles = current_user.get("roles", [])
-    if isinstance(roles, str):
-        roles = [roles]
-
-    if UserRole.FACILITY.value in roles:
-        facility_id = _get_facility_id(service, current_user)
-        deleted = service.delete_as_facility(endorsement_id, facility_id)
-    elif UserRole.WORKER.value in roles:
-        worker_id = _get_worker_id(service, current_user)
-        deleted = service.delete_as_worker(endorsement_id, worker_id)
-    else:  # pragma: no cover - defensive
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    if principal.has_role(UserRole.FACILITY.value):
+        if principal.facility_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Facility profile not found"
+            )
+        deleted = service.delete_as_facility(endorsement_id, principal.facility_id)
+    elif principal.has_role(UserRole.WORKER.value):
+        if principal.worker_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Worker profile not found"
+            )
+        deleted = service.delete_as_worker(endorsement_id, principal.worker_id)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Operation not permitted for this user",
+        )
 
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Endorsement not found")
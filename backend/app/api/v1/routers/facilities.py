@@ -19,9 +19,17 @@ from app.schemas import (
     FacilityUpdate,
     PaginatedResponse,
 )
-from app.api.deps import get_facilities_service, get_pagination_params, get_current_user, get_db
-from app.core.security import TokenPayload, decode_jwt
+from app.api.deps import (
+    get_facilities_service,
+    get_pagination_params,
+    get_principal,
+    get_db,
+    get_document_processing_service,
+)
+from app.core.images import derivative_url
+from app.core.security import Principal, decode_jwt
 from app.schemas import PaginationParams
+from app.services.document_processing import DocumentProcessingService
 from app.services.facilities_service import FacilitiesService
 
 router = APIRouter()
@@ -35,11 +43,12 @@ class FacilityVerificationRequest(BaseModel):
 @router.post("/verify", response_model=FacilityRead)
 def verify_facility(
     payload: FacilityVerificationRequest,
-    current_user: Annotated[TokenPayload, Depends(get_current_user)],
+    principal: Annotated[Principal, Depends(get_principal)],
     service: FacilitiesService = Depends(get_facilities_service),
+    documents: DocumentProcessingService = Depends(get_document_processing_service),
 ) -> FacilityRead:
     """Submit facility verification with ID photo."""
-    facility_id = current_user.get("facility_id")
+    facility_id = principal.facility_id
     if not facility_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a facility user")
     
@@ -61,6 +70,8 @@ def verify_facility(
         facility.license_id = payload.license_id
     facility.is_verified = False  # Keep as pending
     facility.verification_submitted_at = datetime.utcnow()  # Track submission time
+    # Analysed in the background, ready for the admin review queue
+    documents.enqueue([facility.id_photo_url])
     service.session.add(facility)
     service.session.commit()
     service.session.refresh(facility)
@@ -74,11 +85,11 @@ def verify_facility(
 
 @router.get("/me", response_model=FacilityRead)
 def get_current_facility(
-    current_user: Annotated[TokenPayload, Depends(get_current_user)],
+    principal: Annotated[Principal, Depends(get_principal)],
     service: FacilitiesService = Depends(get_facilities_service),
 ) -> FacilityRead:
     """Get current facility's profile."""
-    facility_id = current_user.get("facility_id")
+    facility_id = principal.facility_id
     if not facility_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a facility user")
     
@@ -125,11 +136,11 @@ def get_current_facility(
 @router.patch("/me", response_model=FacilityRead)
 def update_current_facility(
     update_data: FacilityUpdate,
-    current_user: Annotated[TokenPayload, Depends(get_current_user)],
+    principal: Annotated[Principal, Depends(get_principal)],
     service: FacilitiesService = Depends(get_facilities_service),
 ) -> FacilityRead:
     """Update current facility's profile."""
-    facility_id = current_user.get("facility_id")
+    facility_id = principal.facility_id
     if not facility_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a facility user")
     
@@ -176,29 +187,19 @@ def update_current_facility(
 
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
 def delete_current_facility(
-    current_user: Annotated[TokenPayload, Depends(get_current_user)],
+    principal: Annotated[Principal, Depends(get_principal)],
     service: FacilitiesService = Depends(get_facilities_service),
 ) -> Response:
     """Delete current facility profile."""
-    facility_id_value = current_user.get("facility_id")
-    
-    if not facility_id_value:
+    facility_id = principal.facility_id
+    if not facility_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not a facility user")
     
-    try:
-        if isinstance(facility_id_value, UUID):
-            facility_id = facility_id_value
-        else:
-            facility_id = UUID(str(facility_id_value))
-    except (ValueError, TypeError) as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid facility ID: {facility_id_value}")
-    
     facility = service.get_facility(facility_id)
     if not facility:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Facility not found")
     
-    service.session.delete(facility)
-    service.session.commit()
+    service.delete_profile(facility)
     
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
@@ -281,6 +282,7 @@ def search_facilities(
                     'industry': industry_value,
                     'bio': facility.bio,
                     'profile_image_url': facility.profile_image_url,
+                    'profile_image_thumb_url': derivative_url(facility.profile_image_url, "thumb"),
                     'city': facility.hq_city,
                     'state_province': facility.hq_state_province,
                     'phone_e164': facility.phone_e164,
@@ -14,55 +14,27 @@ from app.models import CompensationType, EmploymentType, WorkerTitle, UserRole,
 from app.schemas import (
     JobApplicationCreate,
     JobApplicationRead,
+    JobApplicationStatusBatch,
     JobApplicationUpdate,
     JobFilter,
     JobPostCreate,
     JobPostRead,
     JobPostUpdate,
 )
-from app.api.deps import get_jobs_service, get_pagination_params, require_role
+from app.api.deps import (
+    FacilityPrincipal,
+    WorkerPrincipal,
+    get_jobs_service,
+    get_pagination_params,
+    require_role,
+)
 from app.schemas import PaginationParams
-from app.services.jobs_service import JobsService
+from app.services.jobs_service import ApplicationsNotFoundError, JobsService
 
 router = APIRouter()
 
 
 FacilityUser = Annotated[TokenPayload, Depends(require_role(UserRole.FACILITY.value))]
-WorkerUser = Annotated[TokenPayload, Depends(require_role(UserRole.WORKER.value))]
-
-
-def _get_user_id(payload: TokenPayload) -> UUID:
-    sub = payload.get("sub")
-    if not sub:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication token"
-        )
-    try:
-        return UUID(str(sub))
-    except ValueError as exc:  # pragma: no cover - defensive
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid authentication token"
-        ) from exc
-
-
-def _get_facility_id(service: JobsService, payload: TokenPayload) -> UUID:
-    user_id = _get_user_id(payload)
-    facility = service.get_facility_for_user(user_id)
-    if not facility:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Facility profile not found"
-        )
-    return facility.id
-
-
-def _get_worker_id(service: JobsService, payload: TokenPayload) -> UUID:
-    user_id = _get_user_id(payload)
-    worker = service.get_worker_for_user(user_id)
-    if not worker:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, detail="Worker profile not found"
-        )
-    return worker.id
 
 
 @router.get("/", response_model=List[JobPostRead])
@@ -194,10 +166,10 @@ def apply_to_job(
 @router.get("/{job_id}/applications", response_model=List[JobApplicationRead])
 def list_applications(
     job_id: UUID,
-    current_user: FacilityUser,
+    principal: FacilityPrincipal,
     service: JobsService = Depends(get_jobs_service),
 ) -> List[JobApplicationRead]:
-    facility_id = _get_facility_id(service, current_user)
+    facility_id = principal.facility_id
     applications = service.list_applications(job_id, facility_id=facility_id)
     if applications is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
@@ -206,11 +178,11 @@ def list_applications(
 
 @router.get("/applications/facility", response_model=List[JobApplicationRead])
 def list_facility_applications(
-    current_user: FacilityUser,
+    principal: FacilityPrincipal,
     job_post_id: Optional[UUID] = Query(None),
     service: JobsService = Depends(get_jobs_service),
 ) -> List[JobApplicationRead]:
-    facility_id = _get_facility_id(service, current_user)
+    facility_id = principal.facility_id
     if job_post_id and not service.get_job_for_facility(job_post_id, facility_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
     return service.list_facility_applications(facility_id, job_post_id=job_post_id)
@@ -218,10 +190,10 @@ def list_facility_applications(
 
 @router.get("/applications/worker", response_model=List[JobApplicationRead])
 def list_worker_applications(
-    current_user: WorkerUser,
+    principal: WorkerPrincipal,
     service: JobsService = Depends(get_jobs_service),
 ) -> List[JobApplicationRead]:
-    worker_id = _get_worker_id(service, current_user)
+    worker_id = principal.worker_id
     return service.list_worker_applications(worker_id)
 
 
@@ -229,10 +201,10 @@ def list_worker_applications(
 def update_job(
     job_id: UUID,
     payload: JobPostUpdate,
-    current_user: FacilityUser,
+    principal: FacilityPrincipal,
     service: JobsService = Depends(get_jobs_service),
 ) -> JobPostRead:
-    facility_id = _get_facility_id(service, current_user)
+    facility_id = principal.facility_id
     job = service.update_job(job_id, facility_id, payload)
     if not job:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
@@ -243,10 +215,10 @@ def update_job(
 def replace_job(
     job_id: UUID,
     payload: JobPostCreate,
-    current_user: FacilityUser,
+    principal: FacilityPrincipal,
     service: JobsService = Depends(get_jobs_service),
 ) -> JobPostRead:
-    facility_id = _get_facility_id(service, current_user)
+    facility_id = principal.facility_id
     if payload.facility_id != facility_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -258,15 +230,35 @@ def replace_job(
     return JobPostRead.from_orm(job)
 
 
+@router.patch("/applications/status:batch", response_model=List[JobApplicationRead])
+def update_application_statuses_by_facility(
+    payload: JobApplicationStatusBatch,
+    principal: FacilityPrincipal,
+    service: JobsService = Depends(get_jobs_service),
+) -> List[JobApplicationRead]:
+    """Allow facility to update the status of many applications in one request."""
+    facility_id = principal.facility_id
+    try:
+        return service.update_application_statuses(facility_id, payload)
+    except ApplicationsNotFoundError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={
+                "message": "Job applications not found or not authorized",
+                "application_ids": [str(application_id) for application_id in exc.application_ids],
+            },
+        )
+
+
 @router.patch("/applications/{application_id}/status", response_model=JobApplicationRead)
 def update_application_status_by_facility(
     application_id: UUID,
     payload: JobApplicationUpdate,
-    current_user: FacilityUser,
+    principal: FacilityPrincipal,
     service: JobsService = Depends(get_jobs_service),
 ) -> JobApplicationRead:
     """Allow facility to update application status."""
-    facility_id = _get_facility_id(service, current_user)
+    facility_id = principal.facility_id
     application = service.update_application_status(application_id, facility_id, payload)
     if not application:
         raise HTTPException(
@@ -279,10 +271,10 @@ def update_application_status_by_facility(
 def update_application(
     application_id: UUID,
     payload: JobApplicationUpdate,
-    current_user: WorkerUser,
+    principal: WorkerPrincipal,
     service: JobsService = Depends(get_jobs_service),
 ) -> JobApplicationRead:
-    worker_id = _get_worker_id(service, current_user)
+    worker_id = principal.worker_id
     application = service.update_application(application_id, worker_id, payload)
     if not application:
         raise HTTPException(
@@ -294,10 +286,10 @@ def update_application(
 @router.delete("/applications/{application_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_application(
     application_id: UUID,
-    current_user: WorkerUser,
+    principal: WorkerPrincipal,
     service: JobsService = Depends(get_jobs_service),
 ) -> Response:
-    worker_id = _get_worker_id(service, current_user)
+    worker_id = principal.worker_id
     deleted = service.delete_application(application_id, worker_id)
     if not deleted:
         raise HTTPException(
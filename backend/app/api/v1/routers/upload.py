@@ -2,76 +2,229 @@
 
 from __future__ import annotations
 
-import os
-import uuid
-from pathlib import Path
-from typing import List
+from datetime import datetime
+from typing import Dict, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, File, HTTPException, UploadFile, status
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, File, Header, Request, Response, UploadFile, status
+from pydantic import BaseModel, Field
+
+from app.api.deps import get_upload_service
+from app.core.images import DERIVATIVE_SIZES, derivative_url
+from app.core.settings import get_settings
+from app.models import UploadSession
+from app.services import UploadService
+from app.services.upload_service import UPLOAD_DIR
 
 router = APIRouter(tags=["upload"])
 
-# Configure upload directory
-UPLOAD_DIR = Path(__file__).parent.parent.parent.parent.parent / "uploads"
 UPLOAD_DIR.mkdir(exist_ok=True)
 
 # Allowed file types
 ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/jpg", "image/png", "image/webp"}
 ALLOWED_DOCUMENT_TYPES = {"application/pdf"}
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
 
 class UploadResponse(BaseModel):
     url: str
     filename: str
-
-
-def save_upload_file(upload_file: UploadFile, allowed_types: set) -> str:
-    """Save uploaded file and return the URL."""
-    # Validate content type
-    if upload_file.content_type not in allowed_types:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid file type. Allowed types: {', '.join(allowed_types)}",
-        )
-    
-    # Generate unique filename
-    file_extension = Path(upload_file.filename).suffix
-    unique_filename = f"{uuid.uuid4()}{file_extension}"
-    file_path = UPLOAD_DIR / unique_filename
-    
-    # Save file
-    try:
-        with file_path.open("wb") as buffer:
-            content = upload_file.file.read()
-            
-            # Check file size
-            if len(content) > MAX_FILE_SIZE:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB",
-                )
-            
-            buffer.write(content)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to save file: {str(e)}",
-        )
-    
-    return f"/uploads/{unique_filename}"
+    # Resized WebP copies of an image ("thumb", "card", "full"); they are
+    # rendered in the background, so may 404 for a moment after the upload
+    derivatives: Dict[str, str] = {}
 
 
 @router.post("/image", response_model=UploadResponse)
-async def upload_image(file: UploadFile = File(...)) -> UploadResponse:
+async def upload_image(
+    file: UploadFile = File(...),
+    service: UploadService = Depends(get_upload_service),
+) -> UploadResponse:
     """Upload an image file (profile picture, etc.)."""
-    url = save_upload_file(file, ALLOWED_IMAGE_TYPES)
-    return UploadResponse(url=url, filename=file.filename)
+    url = await service.store(file, ALLOWED_IMAGE_TYPES)
+    derivatives = {size: derivative_url(url, size) for size in DERIVATIVE_SIZES}
+    return UploadResponse(url=url, filename=file.filename, derivatives=derivatives)
 
 
 @router.post("/document", response_model=UploadResponse)
-async def upload_document(file: UploadFile = File(...)) -> UploadResponse:
+async def upload_document(
+    file: UploadFile = File(...),
+    service: UploadService = Depends(get_upload_service),
+) -> UploadResponse:
     """Upload a document file (resume, verification docs, etc.)."""
-    url = save_upload_file(file, ALLOWED_DOCUMENT_TYPES)
+    url = await service.store(file, ALLOWED_DOCUMENT_TYPES)
     return UploadResponse(url=url, filename=file.filename)
+
+
+# ----------------------------------------------------------------------
+# Resumable uploads
+#
+#   POST   /upload/sessions                 declare the file, get a session id
+#   PATCH  /upload/sessions/{id}            body = next chunk, Upload-Offset = where it starts
+#   GET    /upload/sessions/{id}            offset to resume from after a dropped connection
+#   POST   /upload/sessions/{id}/complete   verify the SHA-256 and store the file
+#   DELETE /upload/sessions/{id}            abandon it
+#
+# A PATCH at any offset other than the acknowledged one gets 409 with the
+# right offset in Upload-Offset.
+# ----------------------------------------------------------------------
+SHA256_PATTERN = r"^[0-9a-fA-F]{64}$"
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(min_length=1, max_length=255)
+    content_type: str
+    size_bytes: int = Field(gt=0)
+    sha256: Optional[str] = Field(default=None, pattern=SHA256_PATTERN)
+
+
+class UploadSessionComplete(BaseModel):
+    sha256: Optional[str] = Field(default=None, pattern=SHA256_PATTERN)
+
+
+class UploadSessionRead(BaseModel):
+    id: UUID
+    filename: str
+    content_type: str
+    size_bytes: int
+    offset: int
+    max_chunk_bytes: int
+    expires_at: datetime
+
+
+def _session_read(upload: UploadSession) -> UploadSessionRead:
+    return UploadSessionRead(
+        id=upload.id,
+        filename=upload.filename,
+        content_type=upload.content_type,
+        size_bytes=upload.size_bytes,
+        offset=upload.received_bytes,
+        max_chunk_bytes=get_settings().upload_chunk_max_bytes,
+        expires_at=upload.expires_at,
+    )
+
+
+@router.post(
+    "/sessions", response_model=UploadSessionRead, status_code=status.HTTP_201_CREATED
+)
+def create_upload_session(
+    payload: UploadSessionCreate,
+    service: UploadService = Depends(get_upload_service),
+) -> UploadSessionRead:
+    """Start a resumable upload of an image or document."""
+    upload = service.create_session(
+        payload.content_type,
+        payload.filename,
+        payload.size_bytes,
+        payload.sha256,
+        ALLOWED_IMAGE_TYPES | ALLOWED_DOCUMENT_TYPES,
+    )
+    return _session_read(upload)
+
+
+@router.get("/sessions/{session_id}", response_model=UploadSessionRead)
+def get_upload_session(
+    session_id: UUID,
+    service: UploadService = Depends(get_upload_service),
+) -> UploadSessionRead:
+    return _session_read(service.get_session(session_id))
+
+
+@router.patch("/sessions/{session_id}", response_model=UploadSessionRead)
+async def append_upload_chunk(
+    session_id: UUID,
+    request: Request,
+    response: Response,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    service: UploadService = Depends(get_upload_service),
+) -> UploadSessionRead:
+    """Append the request body to the upload, starting at ``Upload-Offset``."""
+    upload = await service.append_chunk(session_id, upload_offset, request.stream())
+    response.headers["Upload-Offset"] = str(upload.received_bytes)
+    return _session_read(upload)
+
+
+@router.post("/sessions/{session_id}/complete", response_model=UploadResponse)
+async def complete_upload_session(
+    session_id: UUID,
+    payload: UploadSessionComplete,
+    service: UploadService = Depends(get_upload_service),
+) -> UploadResponse:
+    """Verify the finished upload against its SHA-256 and store it."""
+    url, filename, content_type = await service.finish_session(session_id, payload.sha256)
+    derivatives = {}
+    if content_type in ALLOWED_IMAGE_TYPES:
+        derivatives = {size: derivative_url(url, size) for size in DERIVATIVE_SIZES}
+    return UploadResponse(url=url, filename=filename, derivatives=derivatives)
+
+
+@router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
+def cancel_upload_session(
+    session_id: UUID,
+    service: UploadService = Depends(get_upload_service),
+) -> None:
+    service.cancel_session(session_id)
+
+
+# ----------------------------------------------------------------------
+# Direct uploads (S3 storage only; 501 otherwise)
+#
+#   POST   /upload/direct                   declare the file, get a presigned request
+#   (client sends upload_url with method and exactly the given headers)
+#   POST   /upload/direct/{id}/complete     verify the stored object and keep it
+#   DELETE /upload/sessions/{id}            abandon it
+#
+# If the content is already stored there is nothing to send: the response
+# has the final url and no upload_url.
+# ----------------------------------------------------------------------
+class DirectUploadCreate(BaseModel):
+    filename: str = Field(min_length=1, max_length=255)
+    content_type: str
+    size_bytes: int = Field(gt=0)
+    sha256: str = Field(pattern=SHA256_PATTERN)
+
+
+class DirectUploadRead(BaseModel):
+    id: Optional[UUID] = None
+    url: str
+    upload_url: Optional[str] = None
+    method: Optional[str] = None
+    headers: Dict[str, str] = {}
+    # When upload_url stops working
+    expires_at: Optional[datetime] = None
+
+
+@router.post("/direct", response_model=DirectUploadRead, status_code=status.HTTP_201_CREATED)
+def create_direct_upload(
+    payload: DirectUploadCreate,
+    service: UploadService = Depends(get_upload_service),
+) -> DirectUploadRead:
+    """Start an upload that goes straight to storage, bypassing the API."""
+    url, upload, presigned = service.create_direct_upload(
+        payload.content_type,
+        payload.filename,
+        payload.size_bytes,
+        payload.sha256,
+        ALLOWED_IMAGE_TYPES | ALLOWED_DOCUMENT_TYPES,
+    )
+    if upload is None:
+        return DirectUploadRead(url=url)
+    return DirectUploadRead(
+        id=upload.id,
+        url=url,
+        upload_url=presigned.url,
+        method=presigned.method,
+        headers=presigned.headers,
+        expires_at=presigned.expires_at,
+    )
+
+
+@router.post("/direct/{session_id}/complete", response_model=UploadResponse)
+async def complete_direct_upload(
+    session_id: UUID,
+    service: UploadService = Depends(get_upload_service),
+) -> UploadResponse:
+    """Verify the object the client stored against its SHA-256 and keep it."""
+    url, filename, content_type = await service.finish_direct_upload(session_id)
+    derivatives = {}
+    if content_type in ALLOWED_IMAGE_TYPES:
+        derivatives = {size: derivative_url(url, size) for size in DERIVATIVE_SIZES}
+    return UploadResponse(url=url, filename=filename, derivatives=derivatives)
@@ -10,8 +10,9 @@ from sqlalchemy import or_, func, cast, String
 from sqlalchemy.orm import Session
 
 from app.core import PuertoRicoMunicipality
-from app.core.security import TokenPayload, decode_jwt
-from app.models import EducationLevel, UserRole, Worker, WorkerTitle
+from app.core.images import derivative_url
+from app.core.security import Principal, TokenPayload, decode_jwt
+from app.models import RESUME_SEARCH_CONFIG, EducationLevel, UserRole, Worker, WorkerTitle
 from app.schemas import (
     ExperienceCreate,
     ExperienceRead,
@@ -28,6 +29,8 @@ from app.schemas import (
     WorkerUpdate,
 )
 from app.api.deps import (
+    WorkerPrincipal,
+    get_document_processing_service,
     get_pagination_params,
     get_workers_service,
     require_role,
@@ -35,34 +38,18 @@ from app.api.deps import (
     get_current_user,
 )
 from app.schemas.pagination import PaginationParams
+from app.services.document_processing import DocumentProcessingService
 from app.services.workers_service import WorkersService
 
 router = APIRouter()
 
 
-WorkerUser = Annotated[TokenPayload, Depends(require_role(UserRole.WORKER.value))]
 FacilityUser = Annotated[TokenPayload, Depends(require_role(UserRole.FACILITY.value))]
 
 
-def _get_user_id(payload: TokenPayload) -> UUID:
-    sub = payload.get("sub")
-    if not sub:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication token",
-        )
-    try:
-        return UUID(str(sub))
-    except ValueError as exc:  # pragma: no cover - defensive
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid authentication token",
-        ) from exc
-
-
-def _get_worker(service: WorkersService, payload: TokenPayload) -> Worker:
-    user_id = _get_user_id(payload)
-    worker = service.get_worker_for_user(user_id)
+def _get_worker(service: WorkersService, principal: Principal) -> Worker:
+    """Load the caller's worker profile for routes that return or modify it."""
+    worker = service.get_worker(principal.worker_id)
     if not worker:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -111,6 +98,7 @@ def list_workers(
                     'selfie_url': worker.selfie_url,
                     'id_photo_url': worker.id_photo_url,
                     'verification_submitted_at': worker.verification_submitted_at,
+                    'endorsement_count': worker.endorsement_count,
                     'created_at': worker.created_at,
                     'updated_at': worker.updated_at,
                 }
@@ -142,12 +130,12 @@ def search_workers(
     q: str = "",
     endorsed_only: str = "false",
 ) -> List[dict]:
-    """Search workers by name, title, city, or state.
+    """Search workers by name, title, city, state, bio, or resume text.
     Endorsed workers appear first
     """
     try:
         from app.db import get_session_factory
-        from app.models.base_model import Endorsement, WorkerTitle
+        from app.models.base_model import WorkerTitle
         SessionLocal = get_session_factory()
         db = SessionLocal()
         
@@ -158,8 +146,8 @@ def search_workers(
             print("Fetching all endorsed workers (no query filter)")
             # Get all workers that have endorsements
             workers = db.query(Worker).filter(
-                Worker.endorsements.any()
-            ).limit(50).all()
+                Worker.endorsement_count > 0
+            ).order_by(Worker.rank_score.desc(), Worker.full_name).limit(50).all()
         elif not q or not q.strip():
             return []
         else:
@@ -189,18 +177,18 @@ def search_workers(
                     func.lower(cast(Worker.city, String)).ilike(search_term),
                     func.lower(cast(Worker.state_province, String)).ilike(search_term),
                     func.lower(cast(Worker.bio, String)).ilike(search_term),
+                    # Words from the uploaded resume, through the GIN index
+                    Worker.resume_search.match(
+                        q.strip(), postgresql_regconfig=RESUME_SEARCH_CONFIG
+                    ),
                 )
-            ).limit(50)
+            ).order_by(Worker.rank_score.desc(), Worker.full_name).limit(50)
             
             workers = query.all()
         items = []
         for worker in workers:
             try:
                 email = worker.user.email if worker.user else None
-                # Count endorsements for this worker
-                endorsement_count = db.query(Endorsement).filter(
-                    Endorsement.worker_id == worker.id
-                ).count()
                 
                 # Get the enum object to access name and value
                 title_enum = worker.title if isinstance(worker.title, WorkerTitle) else WorkerTitle[worker.title]
@@ -213,6 +201,7 @@ def search_workers(
                     'title_enum': title_enum.name,  # Also include enum name like "RN"
                     'bio': worker.bio,
                     'profile_image_url': worker.profile_image_url,
+                    'profile_image_thumb_url': derivative_url(worker.profile_image_url, "thumb"),
                     'resume_url': worker.resume_url,
                     'city': worker.city,
                     'state_province': worker.state_province,
@@ -225,7 +214,7 @@ def search_workers(
                     'verification_submitted_at': str(worker.verification_submitted_at) if worker.verification_submitted_at else None,
                     'created_at': str(worker.created_at) if worker.created_at else None,
                     'updated_at': str(worker.updated_at) if worker.updated_at else None,
-                    'endorsement_count': endorsement_count,
+                    'endorsement_count': worker.endorsement_count,
                 }
                 items.append(data)
             except Exception as e:
@@ -239,8 +228,7 @@ def search_workers(
             items = [item for item in items if item['endorsement_count'] > 0]
             print(f"Total items after endorsement filter: {len(items)}")
         
-        # Sort by endorsement count, then by name
-        items.sort(key=lambda x: (-x['endorsement_count'], x['full_name']))
+        # Already ordered by rank_score (endorsed first), then by name
         
         db.close()
         return items
@@ -275,6 +263,7 @@ def create_worker(
             'selfie_url': worker.selfie_url,
             'id_photo_url': worker.id_photo_url,
             'verification_submitted_at': worker.verification_submitted_at,
+            'endorsement_count': worker.endorsement_count,
             'created_at': worker.created_at,
             'updated_at': worker.updated_at,
         }
@@ -288,11 +277,11 @@ def create_worker(
 
 @router.get("/me", response_model=WorkerRead)
 def get_current_worker(
-    payload: WorkerUser,
+    principal: WorkerPrincipal,
     service: WorkersService = Depends(get_workers_service),
 ) -> WorkerRead:
     """Get current authenticated worker's profile."""
-    worker = _get_worker(service, payload)
+    worker = _get_worker(service, principal)
     
     experiences_list = []
     if hasattr(worker, 'experiences') and worker.experiences:
@@ -338,12 +327,11 @@ def get_current_worker(
 @router.patch("/me", response_model=WorkerRead)
 def update_current_worker(
     payload: WorkerUpdate,
-    token_payload: WorkerUser,
+    principal: WorkerPrincipal,
     service: WorkersService = Depends(get_workers_service),
 ) -> WorkerRead:
     """Update current authenticated worker's profile."""
-    worker = _get_worker(service, token_payload)
-    updated_worker = service.update_worker(worker.id, payload)
+    updated_worker = service.update_worker(principal.worker_id, payload)
     if not updated_worker:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -387,12 +375,11 @@ def update_current_worker(
 
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
 def delete_current_worker(
-    token_payload: WorkerUser,
+    principal: WorkerPrincipal,
     service: WorkersService = Depends(get_workers_service),
 ) -> Response:
     """Delete current authenticated worker's profile."""
-    worker = _get_worker(service, token_payload)
-    deleted = service.delete_worker(worker.id)
+    deleted = service.delete_worker(principal.worker_id)
     if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -516,11 +503,12 @@ def get_worker_by_id(
 @router.post("/verify", response_model=WorkerRead)
 def verify_worker(
     payload: dict,
-    current_user: WorkerUser,
+    principal: WorkerPrincipal,
     service: WorkersService = Depends(get_workers_service),
+    documents: DocumentProcessingService = Depends(get_document_processing_service),
 ) -> WorkerRead:
     """Submit verification documents for a worker."""
-    worker = _get_worker(service, current_user)
+    worker = _get_worker(service, principal)
     
     from datetime import datetime
     if 'selfie_url' in payload and payload['selfie_url']:
@@ -532,6 +520,8 @@ def verify_worker(
     from app.models import VerificationStatus
     worker.verification_status = VerificationStatus.PENDING
     worker.verification_submitted_at = datetime.utcnow()
+    # Analysed in the background, ready for the admin review queue
+    documents.enqueue([worker.selfie_url, worker.id_photo_url, worker.resume_url])
     
     service.session.add(worker)
     service.session.commit()
@@ -656,11 +646,10 @@ def delete_credential(
 def submit_safety_check(
     worker_id: UUID,
     payload: SafetyCheckCreate,
-    current_user: WorkerUser,
+    principal: WorkerPrincipal,
     service: WorkersService = Depends(get_workers_service),
 ) -> SafetyCheckRead:
-    worker = _get_worker(service, current_user)
-    if worker.id != worker_id:
+    if principal.worker_id != worker_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Cannot submit safety information for another worker",
@@ -674,10 +663,9 @@ def submit_safety_check(
 )
 def list_safety_checks(
     worker_id: UUID,
-    current_user: WorkerUser,
+    _: WorkerPrincipal,
     service: WorkersService = Depends(get_workers_service),
 ) -> List[SafetyCheckRead]:
-    _get_worker(service, current_user)
     return service.list_safety_checks(worker_id)
 
 
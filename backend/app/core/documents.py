@@ -0,0 +1,117 @@
+"""Document analysis for verification review, run in the image process pool.
+
+:func:`analyze_document` turns an uploaded file into what the admin queue
+shows instead of the original:
+
+* PDFs: page count, the text layer (up to a character limit), and a WebP
+  preview of the first page.
+* Images: a perceptual hash only; the "card" derivative is the preview.
+
+Both get a 64-bit difference hash (dHash) of the image or first page, as 16
+hex digits. Near-identical pictures have hashes a few bits apart.
+
+Files are read from, and previews written to, the configured blob storage
+(:mod:`app.core.storage`) from inside the worker process.
+
+Requires Pillow, and pypdfium2 for PDFs, in the worker processes.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from .images import derivative_path, save_webp
+from .storage import get_blob_storage
+
+PDF_CONTENT_TYPES = {"application/pdf"}
+
+# Name of the first-page preview, as in derivative_path(path, PREVIEW)
+PREVIEW = "preview"
+PREVIEW_EDGE = 800
+HASH_SIZE = 8
+
+
+def dhash(image) -> int:
+    """64-bit difference hash: is each pixel brighter than its right neighbour."""
+    from PIL import Image
+
+    small = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def format_hash(value: int) -> str:
+    return f"{value:016x}"
+
+
+def _analyze_pdf(source: str, preview_target: str, max_chars: int, quality: int) -> Dict[str, Any]:
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(source)
+    try:
+        page_count = len(pdf)
+        parts = []
+        remaining = max_chars
+        for index in range(page_count):
+            if remaining <= 0:
+                break
+            page = pdf[index]
+            textpage = page.get_textpage()
+            try:
+                text = textpage.get_text_bounded()
+            finally:
+                textpage.close()
+                page.close()
+            parts.append(text[:remaining])
+            remaining -= len(parts[-1])
+
+        phash: Optional[str] = None
+        preview = None
+        if page_count:
+            page = pdf[0]
+            try:
+                width, height = page.get_size()
+                scale = PREVIEW_EDGE / max(width, height, 1)
+                preview = page.render(scale=scale).to_pil().convert("RGB")
+            finally:
+                page.close()
+    finally:
+        pdf.close()
+
+    if preview is not None:
+        save_webp(preview, preview_target, quality)
+        phash = format_hash(dhash(preview))
+    return {
+        "page_count": page_count,
+        "text": "\n".join(parts).strip() or None,
+        "phash": phash,
+        "preview": preview is not None,
+    }
+
+
+def _analyze_image(source: str) -> Dict[str, Any]:
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        return {"page_count": None, "text": None, "phash": format_hash(dhash(image)), "preview": False}
+
+
+def analyze_document(
+    path: str, content_type: str, max_chars: int, quality: int
+) -> Dict[str, Any]:
+    """Analyse the stored file ``path``; returns page_count, text, phash and preview.
+
+    ``preview`` is whether one was stored, as ``derivative_path(path, PREVIEW)``.
+    """
+    storage = get_blob_storage()
+    with storage.reading(path) as source:
+        if content_type in PDF_CONTENT_TYPES:
+            with storage.writing(derivative_path(path, PREVIEW), "image/webp") as preview_target:
+                return _analyze_pdf(source, preview_target, max_chars, quality)
+        return _analyze_image(source)
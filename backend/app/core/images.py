@@ -0,0 +1,233 @@
+"""Image derivatives: resized, EXIF-free WebP copies of uploaded photos.
+
+Every image upload gets three derivatives next to the original, named after
+it so a URL can be mapped to its thumbnail without a lookup:
+
+    uploads/ab/cd/<sha256>.png          original, as uploaded
+    uploads/ab/cd/<sha256>.thumb.webp   list avatars
+    uploads/ab/cd/<sha256>.card.webp    profile cards
+    uploads/ab/cd/<sha256>.full.webp    full-screen view
+
+Derivatives are re-encoded from pixels only, so camera EXIF (GPS position,
+device serials) is dropped; the EXIF orientation is applied first so the
+result is upright. Decoding and resizing a phone photo takes 100+ ms of CPU,
+so rendering runs in a small pool of worker processes, off the request path.
+When more than ``workers + max_pending`` renders are queued, new ones are
+skipped with :class:`ImageProcessorBusyError`; the backfill job picks them up.
+
+Workers fetch the original and store the derivatives through
+:func:`app.core.storage.get_blob_storage`, so with S3 storage the bytes
+don't pass through the API process either.
+
+Requires Pillow in the worker processes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import ExitStack
+from functools import lru_cache
+from typing import Callable, Dict, Optional, TypeVar
+
+from .metrics import metrics
+from .settings import get_settings
+from .storage import get_blob_storage
+
+# size name -> longest edge in pixels
+DERIVATIVE_SIZES: Dict[str, int] = {"thumb": 160, "card": 480, "full": 1600}
+
+T = TypeVar("T")
+
+IMAGE_CONTENT_TYPES = {"image/jpeg", "image/jpg", "image/png", "image/webp"}
+
+# A content-addressed image upload URL (see app.services.upload_service)
+_UPLOAD_IMAGE = re.compile(r"(/uploads/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64})\.(?:jpg|png|webp)$")
+
+
+def derivative_path(path: str, size: str) -> str:
+    """``ab/cd/<sha>.png`` -> ``ab/cd/<sha>.<size>.webp``."""
+    return f"{path.rsplit('.', 1)[0]}.{size}.webp"
+
+
+def derivative_url(url: Optional[str], size: str) -> Optional[str]:
+    """URL of the ``size`` derivative of an uploaded image.
+
+    URLs that don't point at a content-addressed upload (external links,
+    files uploaded before derivatives existed) are returned unchanged.
+    """
+    if not url:
+        return url
+    return _UPLOAD_IMAGE.sub(rf"\1.{size}.webp", url)
+
+
+def _init_worker() -> None:
+    # Rendering is background work; let the API process win the CPU
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+
+def _render(source: str, targets: Dict[str, str], quality: int) -> float:
+    """Write each ``targets[size]`` as WebP; returns CPU seconds spent."""
+    from PIL import Image, ImageOps
+
+    started = time.perf_counter()
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        for size, target in targets.items():
+            edge = DERIVATIVE_SIZES[size]
+            resized = image.copy()
+            resized.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            save_webp(resized, target, quality)
+    return time.perf_counter() - started
+
+
+def _render_stored(path: str, quality: int) -> float:
+    """:func:`_render` every derivative of the stored image ``path``."""
+    storage = get_blob_storage()
+    with ExitStack() as stack:
+        source = stack.enter_context(storage.reading(path))
+        targets = {
+            size: stack.enter_context(storage.writing(derivative_path(path, size), "image/webp"))
+            for size in DERIVATIVE_SIZES
+        }
+        return _render(source, targets, quality)
+
+
+def save_webp(image, target: str, quality: int) -> None:
+    """Write ``image`` to ``target`` as WebP, atomically and world-readable."""
+    fd, temp_name = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            # No exif= argument: the copy carries no metadata
+            image.save(buffer, "WEBP", quality=quality, method=4)
+        os.chmod(temp_name, 0o644)
+        os.replace(temp_name, target)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+
+
+class ImageProcessorBusyError(Exception):
+    """Raised when too many renders are already queued."""
+
+
+class ImageProcessor:
+    """Async front end to a size-limited pool of image-rendering processes."""
+
+    def __init__(self, workers: int, max_pending: int, quality: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.quality = quality
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+        self.in_flight = metrics.gauge("uploads.images.in_flight")
+        self.render_time = metrics.timing("uploads.images.cpu")
+        self.rendered = metrics.counter("uploads.images.rendered")
+        self.skipped = metrics.counter("uploads.images.skipped")
+        self.failed = metrics.counter("uploads.images.failed")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: workers must not inherit the server's sockets or DB connections
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._executor
+
+    async def render(self, path: str) -> None:
+        """Render the derivatives of the stored image ``path`` in the pool."""
+        executor = self._get_executor()
+        self._admit()
+        try:
+            loop = asyncio.get_running_loop()
+            cpu_seconds = await loop.run_in_executor(executor, _render_stored, path, self.quality)
+        except BaseException as exc:
+            self._failed(exc, executor)
+            raise
+        finally:
+            self._release()
+        self._done(cpu_seconds)
+
+    def render_sync(self, path: str) -> None:
+        """Blocking :meth:`render`, for background jobs running in a thread."""
+        self._done(self.call_sync(_render_stored, path, self.quality))
+
+    def call_sync(self, fn: Callable[..., T], *args) -> T:
+        """Run a module-level ``fn(*args)`` in the pool and wait for the result.
+
+        Other CPU-heavy upload work shares the pool, and its admission limit,
+        with rendering.
+        """
+        executor = self._get_executor()
+        self._admit()
+        try:
+            return executor.submit(fn, *args).result()
+        except BaseException as exc:
+            self._failed(exc, executor)
+            raise
+        finally:
+            self._release()
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_pending:
+                self.skipped.inc()
+                raise ImageProcessorBusyError
+            self._in_flight += 1
+            self.in_flight.set(self._in_flight)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self.in_flight.set(self._in_flight)
+
+    def _failed(self, exc: BaseException, executor: ProcessPoolExecutor) -> None:
+        self.failed.inc()
+        if not isinstance(exc, BrokenProcessPool):
+            return
+        # A worker died (say, a decompression bomb); build a new pool next
+        # time. A late failure from a pool already replaced changes nothing.
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _done(self, cpu_seconds: float) -> None:
+        self.render_time.observe(cpu_seconds)
+        self.rendered.inc()
+
+
+@lru_cache()
+def get_image_processor() -> ImageProcessor:
+    """Return the process-wide image processor."""
+
+    settings = get_settings()
+    return ImageProcessor(
+        workers=settings.image_workers,
+        max_pending=settings.image_max_pending,
+        quality=settings.image_webp_quality,
+    )
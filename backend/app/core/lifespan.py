@@ -0,0 +1,147 @@
+"""Application startup and shutdown hooks shared by both app entrypoints."""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+
+from app.db import session_scope
+from app.services import DocumentProcessingService, RefreshTokenService, UploadService
+from app.services.activity_tracker import get_activity_tracker
+from app.services.audit_log_writer import get_audit_log_writer
+
+from .images import get_image_processor
+from .passwords import get_password_hasher
+from .settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationSync:
+    """Loads the revocation store on first run, then adds newer revocations."""
+
+    def __init__(self, interval_seconds: int):
+        self.interval = dt.timedelta(seconds=interval_seconds)
+        self.synced_at: Optional[dt.datetime] = None
+
+    def __call__(self) -> None:
+        started = dt.datetime.now(dt.timezone.utc)
+        with session_scope() as session:
+            service = RefreshTokenService(session)
+            if self.synced_at is None:
+                service.load_revocations()
+            else:
+                # Overlap one interval so rows committed late are not missed
+                service.sync_revocations(self.synced_at - self.interval)
+        self.synced_at = started
+
+
+def purge_refresh_tokens() -> None:
+    with session_scope() as session:
+        RefreshTokenService(session).purge()
+
+
+def collect_upload_garbage() -> None:
+    with session_scope() as session:
+        service = UploadService(session)
+        service.expire_sessions()
+        # Every process, since each may have its own local INCOMING_DIR
+        service.purge_incoming()
+        service.collect_garbage()
+
+
+def sweep_orphaned_uploads() -> None:
+    with session_scope() as session:
+        UploadService(session).sweep_orphans()
+
+
+def build_image_derivatives() -> None:
+    with session_scope() as session:
+        UploadService(session).build_missing_derivatives()
+
+
+def process_documents() -> None:
+    with session_scope() as session:
+        DocumentProcessingService(session).process_pending()
+
+
+def index_resumes() -> None:
+    with session_scope() as session:
+        DocumentProcessingService(session).index_resumes()
+
+
+def refresh_photo_index() -> None:
+    with session_scope() as session:
+        DocumentProcessingService(session).load_photo_index()
+
+
+async def _every(seconds: float, job: Callable[[], None]) -> None:
+    while True:
+        await asyncio.sleep(seconds)
+        try:
+            await run_in_threadpool(job)
+        except Exception:
+            logger.exception("Background job %s failed", getattr(job, "__name__", job))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    settings = get_settings()
+    passwords = get_password_hasher()
+    # Spawning the hashing processes takes a moment; do it before the first login
+    await run_in_threadpool(passwords.start)
+    audit = get_audit_log_writer()
+    audit.start()
+
+    activity = get_activity_tracker()
+
+    revocations = RevocationSync(settings.revocation_sync_seconds)
+    try:
+        await run_in_threadpool(revocations)
+    except Exception:
+        # Serve anyway; the sync loop retries the full load
+        logger.exception("Could not load token revocations at startup")
+
+    tasks = [
+        asyncio.create_task(_every(settings.revocation_sync_seconds, revocations)),
+        asyncio.create_task(
+            _every(settings.refresh_token_purge_interval_minutes * 60, purge_refresh_tokens)
+        ),
+        asyncio.create_task(_every(settings.activity_flush_seconds, activity.flush)),
+        asyncio.create_task(
+            _every(settings.upload_gc_interval_minutes * 60, collect_upload_garbage)
+        ),
+        asyncio.create_task(
+            _every(settings.upload_orphan_scan_interval_minutes * 60, sweep_orphaned_uploads)
+        ),
+        asyncio.create_task(
+            _every(settings.image_backfill_interval_minutes * 60, build_image_derivatives)
+        ),
+        asyncio.create_task(
+            _every(settings.document_processing_interval_seconds, process_documents)
+        ),
+        asyncio.create_task(
+            _every(settings.duplicate_photo_index_refresh_seconds, refresh_photo_index)
+        ),
+        asyncio.create_task(_every(settings.resume_index_interval_seconds, index_resumes)),
+    ]
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            await run_in_threadpool(activity.flush)
+        except Exception:
+            logger.exception("Could not write buffered activity at shutdown")
+        # Write out buffered audit events before the process goes away
+        await run_in_threadpool(audit.stop)
+        await run_in_threadpool(passwords.shutdown)
+        await run_in_threadpool(get_image_processor().shutdown)
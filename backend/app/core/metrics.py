@@ -0,0 +1,138 @@
+"""Minimal in-process metrics: counters, gauges and timing summaries.
+
+Values live in this process only; ``metrics.snapshot()`` is served by the
+admin API so operators can read them without an external metrics stack.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Union
+
+
+class Counter:
+    def __init__(self) -> None:
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> int:
+        return self._value
+
+
+class Gauge:
+    def __init__(self) -> None:
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def set(self, value: int) -> None:
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: int = 1) -> None:
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def snapshot(self) -> int:
+        return self._value
+
+
+class Timing:
+    """Count, mean and max over all observations; percentiles over recent ones."""
+
+    def __init__(self, window: int = 1024) -> None:
+        self._count = 0
+        self._total = 0.0
+        self._max = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._count += 1
+            self._total += seconds
+            self._max = max(self._max, seconds)
+            self._recent.append(seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            recent = sorted(self._recent)
+            count, total, maximum = self._count, self._total, self._max
+
+        def pct(p: float) -> float:
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, round(p / 100 * (len(recent) - 1)))] * 1000
+
+        return {
+            "count": count,
+            "mean_ms": (total / count * 1000) if count else 0.0,
+            "p50_ms": pct(50),
+            "p99_ms": pct(99),
+            "max_ms": maximum * 1000,
+        }
+
+
+class CallbackGauge:
+    """Gauge whose value is computed when read, e.g. a ratio of two counters."""
+
+    def __init__(self, fn: Callable[[], float]) -> None:
+        self.fn = fn
+
+    def snapshot(self) -> float:
+        return self.fn()
+
+
+Metric = Union[Counter, Gauge, Timing, CallbackGauge]
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name: str, kind: type) -> Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(name, kind())
+        if not isinstance(metric, kind):
+            raise TypeError(f"Metric {name!r} is a {type(metric).__name__}, not a {kind.__name__}")
+        return metric
+
+    def counter(self, name: str) -> Counter:
+        return self._get(name, Counter)
+
+    def gauge(self, name: str) -> Gauge:
+        return self._get(name, Gauge)
+
+    def timing(self, name: str) -> Timing:
+        return self._get(name, Timing)
+
+    def callback_gauge(self, name: str, fn: Callable[[], float]) -> CallbackGauge:
+        with self._lock:
+            metric = CallbackGauge(fn)
+            self._metrics[name] = metric
+        return metric
+
+    def snapshot(self) -> Dict[str, object]:
+        return {name: metric.snapshot() for name, metric in sorted(self._metrics.items())}
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,206 @@
+"""Password hashing: the shared hash context and a bounded process pool.
+
+One :class:`CryptContext` is built per process from settings. New hashes use
+the first configured scheme (argon2id by default); hashes from the other
+schemes, or with weaker cost parameters, still verify and are replaced on the
+next successful login.
+
+Hashing costs 100-300 ms of CPU per hash or verify. Run inline, a burst of
+logins ties up the request threadpool (and holds the GIL) long enough to stall
+unrelated requests, so hashing runs in a small pool of worker processes
+instead. The pool is process-wide; admission is capped at ``workers +
+max_pending`` calls in flight and anything beyond that is refused with
+:class:`PasswordHasherBusyError` rather than queued without bound.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Callable, Optional, Tuple, TypeVar
+
+from passlib.context import CryptContext
+
+from .metrics import metrics
+from .settings import Settings, get_settings
+
+T = TypeVar("T")
+
+# Passwords have always been cut at bcrypt's 72-character limit; keep doing
+# so for every scheme so hashes upgraded from bcrypt still match.
+MAX_PASSWORD_LENGTH = 72
+
+
+def build_password_context(settings: Settings) -> CryptContext:
+    schemes = list(settings.password_schemes)
+    return CryptContext(
+        schemes=schemes,
+        default=schemes[0],
+        deprecated="auto",
+        argon2__type="ID",
+        argon2__rounds=settings.argon2_time_cost,
+        argon2__min_desired_rounds=settings.argon2_time_cost,
+        argon2__memory_cost=settings.argon2_memory_cost,
+        argon2__parallelism=settings.argon2_parallelism,
+        bcrypt__rounds=settings.bcrypt_rounds,
+        bcrypt__min_desired_rounds=settings.bcrypt_rounds,
+    )
+
+
+@lru_cache()
+def get_password_context() -> CryptContext:
+    """Return the process-wide password hash context."""
+
+    return build_password_context(get_settings())
+
+
+# Pool workers get the parent's context as a config string at startup
+_worker_context: Optional[CryptContext] = None
+
+
+def _init_worker(config: str) -> None:
+    global _worker_context
+    _worker_context = CryptContext.from_string(config)
+    # Hashing is throughput work; let the API process win the CPU when they compete
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+
+def _timed_hash(password: str) -> Tuple[str, float]:
+    started = time.perf_counter()
+    hashed = _worker_context.hash(password)
+    return hashed, time.perf_counter() - started
+
+
+def _timed_verify_and_update(
+    password: str, hashed: str
+) -> Tuple[Tuple[bool, Optional[str]], float]:
+    started = time.perf_counter()
+    result = _worker_context.verify_and_update(password, hashed)
+    return result, time.perf_counter() - started
+
+
+class PasswordHasherBusyError(Exception):
+    """Raised when too many hash/verify calls are already queued."""
+
+
+class PasswordHasher:
+    """Async front end to a size-limited pool of hashing processes."""
+
+    def __init__(self, context: CryptContext, workers: int, max_pending: int):
+        self.context = context
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+        self.queue_depth = metrics.gauge("auth.password_hash.queue_depth")
+        self.in_flight = metrics.gauge("auth.password_hash.in_flight")
+        self.hash_time = metrics.timing("auth.password_hash.cpu")
+        self.total_time = metrics.timing("auth.password_hash.total")
+        self.rejected = metrics.counter("auth.password_hash.rejected")
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        """Create the pool and start its processes ahead of the first login."""
+        executor = self._get_executor()
+        for future in [executor.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: workers must not inherit the server's sockets or DB connections
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.context.to_string(),),
+                )
+            return self._executor
+
+    # ------------------------------------------------------------------
+    # Hashing
+    # ------------------------------------------------------------------
+    def identify(self, hashed: str) -> bool:
+        """Whether ``hashed`` is a hash this context can verify (cheap, inline)."""
+        return bool(self.context.identify(hashed))
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_timed_hash, password[:MAX_PASSWORD_LENGTH])
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Verify ``password``; on success also return a new hash if ``hashed`` is outdated."""
+        return await self._run(
+            _timed_verify_and_update, password[:MAX_PASSWORD_LENGTH], hashed
+        )
+
+    async def _run(self, fn: Callable[..., Tuple[T, float]], *args) -> T:
+        executor = self._get_executor()
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_pending:
+                self.rejected.inc()
+                raise PasswordHasherBusyError
+            self._in_flight += 1
+            self._publish_depth()
+
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, cpu_seconds = await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            self._drop_broken(executor)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._publish_depth()
+
+        self.hash_time.observe(cpu_seconds)
+        self.total_time.observe(time.perf_counter() - started)
+        return result
+
+    def _drop_broken(self, executor: ProcessPoolExecutor) -> None:
+        """A worker of ``executor`` died; shut it down so the next call builds a new one.
+
+        A late failure from a pool that was already replaced leaves the new
+        one alone.
+        """
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _publish_depth(self) -> None:
+        self.in_flight.set(self._in_flight)
+        self.queue_depth.set(max(0, self._in_flight - self.workers))
+
+
+@lru_cache()
+def get_password_hasher() -> PasswordHasher:
+    """Return the process-wide password hasher."""
+
+    settings = get_settings()
+    return PasswordHasher(
+        get_password_context(),
+        workers=settings.password_hash_workers,
+        max_pending=settings.password_hash_max_pending,
+    )
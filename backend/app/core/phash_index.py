@@ -0,0 +1,144 @@
+"""In-process index of verification-photo hashes, for spotting reused ID photos.
+
+Every ID photo and selfie gets a 64-bit dHash when it is analysed (see
+:mod:`app.core.documents`). Re-encoded, resized or lightly edited copies of a
+picture hash within a few bits of each other. Finding every photo within
+Hamming distance ``d`` of a hash uses multi-index hashing:
+
+* The 64 bits are split into 4 chunks of 16. Each chunk is a key in its own
+  hash table of the indexed hashes.
+* Two hashes at most ``d`` bits apart differ in at most ``d // 4`` bits in
+  at least one chunk (pigeonhole). So a search only probes each table for
+  the query's chunk and its variants within ``d // 4`` bits, then checks
+  the full distance of the few hashes found.
+
+At ``d = 8`` that is 4 x 137 dict lookups rather than a comparison with
+every photo. (A BK-tree was tried first; on 64-bit hashes its branches
+barely prune at this radius, and it ran slower than a linear scan.)
+
+The index is rebuilt from the database every
+``DUPLICATE_PHOTO_INDEX_REFRESH_SECONDS`` (see
+:meth:`app.services.DocumentProcessingService.load_photo_index`).
+"""
+
+from __future__ import annotations
+
+import threading
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, Generic, Iterable, List, NamedTuple, Optional, Tuple, TypeVar
+from uuid import UUID
+
+from .metrics import metrics
+
+T = TypeVar("T")
+
+# Hashes of near-uniform pictures (blank, over-exposed) are almost all 0 or
+# all 1 bits and would "match" each other; they aren't indexed
+MIN_HASH_BITS = 8
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def is_informative(value: int) -> bool:
+    return MIN_HASH_BITS <= value.bit_count() <= 64 - MIN_HASH_BITS
+
+
+class MultiIndexHash(Generic[T]):
+    """Items keyed by 64-bit hashes, searchable by Hamming distance."""
+
+    CHUNKS = 4
+    CHUNK_BITS = 64 // CHUNKS
+
+    def __init__(self) -> None:
+        self._items: Dict[int, List[T]] = {}
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(self.CHUNKS)]
+        self.size = 0
+
+    def _chunks(self, value: int) -> List[int]:
+        mask = (1 << self.CHUNK_BITS) - 1
+        return [(value >> (i * self.CHUNK_BITS)) & mask for i in range(self.CHUNKS)]
+
+    def add(self, value: int, item: T) -> None:
+        self.size += 1
+        items = self._items.get(value)
+        if items is not None:
+            items.append(item)
+            return
+        self._items[value] = [item]
+        for table, chunk in zip(self._tables, self._chunks(value)):
+            table.setdefault(chunk, []).append(value)
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, T]]:
+        """``(distance, item)`` for every item within ``max_distance`` of ``value``."""
+        found: List[Tuple[int, T]] = []
+        checked = set()
+        flips = _flips(self.CHUNK_BITS, max_distance // self.CHUNKS)
+        for table, chunk in zip(self._tables, self._chunks(value)):
+            for flip in flips:
+                for candidate in table.get(chunk ^ flip, ()):
+                    if candidate in checked:
+                        continue
+                    checked.add(candidate)
+                    distance = hamming(value, candidate)
+                    if distance <= max_distance:
+                        found.extend((distance, item) for item in self._items[candidate])
+        return found
+
+
+@lru_cache()
+def _flips(bits: int, radius: int) -> Tuple[int, ...]:
+    """Every ``bits``-wide mask with at most ``radius`` bits set."""
+    return tuple(
+        sum(1 << bit for bit in positions)
+        for count in range(radius + 1)
+        for positions in combinations(range(bits), count)
+    )
+
+
+class PhotoOwner(NamedTuple):
+    kind: str  # "worker" or "facility"
+    owner_id: UUID
+    field: str  # "id_photo_url" or "selfie_url"
+    sha256: str
+
+
+class PerceptualHashIndex:
+    """Swap-on-rebuild multi-index hash of verification photo hashes."""
+
+    def __init__(self) -> None:
+        self._index: MultiIndexHash[PhotoOwner] = MultiIndexHash()
+        self._lock = threading.Lock()
+        self.loaded = False
+
+        metrics.callback_gauge("verification.photo_index.entries", lambda: self._index.size)
+
+    def replace(self, entries: Iterable[Tuple[str, PhotoOwner]]) -> int:
+        """Build a new index from ``(hex hash, owner)`` pairs and swap it in."""
+        index: MultiIndexHash[PhotoOwner] = MultiIndexHash()
+        for phash, owner in entries:
+            value = int(phash, 16)
+            if is_informative(value):
+                index.add(value, owner)
+        with self._lock:
+            self._index = index
+            self.loaded = True
+        return index.size
+
+    def search(self, phash: Optional[str], max_distance: int) -> List[Tuple[int, PhotoOwner]]:
+        if not phash:
+            return []
+        value = int(phash, 16)
+        if not is_informative(value):
+            return []
+        # An index is never mutated once swapped in, so reading needs no lock
+        return self._index.search(value, max_distance)
+
+
+@lru_cache()
+def get_perceptual_hash_index() -> PerceptualHashIndex:
+    """Return the process-wide photo hash index."""
+
+    return PerceptualHashIndex()
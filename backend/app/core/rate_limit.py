@@ -0,0 +1,172 @@
+"""Token-bucket rate limiting for the credential endpoints.
+
+Each rule is a bucket of ``burst`` tokens refilled at ``per_minute`` tokens a
+minute, kept per key (a client IP or a login email). A request takes one
+token from every bucket that applies to it; when a bucket is empty the
+request is refused with the seconds until a token is back, which the API
+returns as ``Retry-After``.
+
+Buckets live in this process by default. Set ``RATE_LIMIT_REDIS_URL`` to
+share them between API processes through Redis (requires the ``redis``
+package); the in-memory store stands in for it everywhere else.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
+
+from app.models import normalize_email
+
+from .metrics import metrics
+from .settings import Settings, get_settings
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    name: str
+    per_minute: float
+    burst: int
+
+    @property
+    def per_second(self) -> float:
+        return self.per_minute / 60
+
+
+class MemoryRateLimitStore:
+    """Buckets in a bounded LRU; evicting an idle bucket just refills it."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (float(limit.burst), now))
+            tokens = min(limit.burst, tokens + (now - updated) * limit.per_second)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+            else:
+                retry_after = (1 - tokens) / limit.per_second
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+
+# Refill, take one token and report the wait, atomically on the Redis server.
+# Uses the server clock so API hosts with skewed clocks share one timeline.
+_TAKE_SCRIPT = """
+local per_second = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * per_second)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / per_second
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / per_second) + 1)
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitStore:
+    """Buckets shared by every API process through one Redis instance."""
+
+    def __init__(self, url: str, prefix: str = "medpost:ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:  # pragma: no cover - optional dependency
+            raise RuntimeError(
+                "RATE_LIMIT_REDIS_URL is set but the 'redis' package is not installed"
+            ) from exc
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._take = self._client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        result = await self._take(keys=[self.prefix + key], args=[limit.per_second, limit.burst])
+        return float(result)
+
+
+class RateLimiter:
+    def __init__(self, store, limits: Dict[str, RateLimit], enabled: bool = True):
+        self.store = store
+        self.limits = limits
+        self.enabled = enabled
+        self.store_errors = metrics.counter("auth.rate_limit.store_errors")
+
+    async def check_login(self, ip_address: Optional[str], email: str) -> float:
+        # Per IP first: a stuffing run from one address shouldn't also drain
+        # the per-email buckets of the accounts it targets
+        return await self.check(
+            [
+                (self.limits["login_ip"], ip_address),
+                # Same normalization as the lookup, so case variants share a bucket
+                (self.limits["login_email"], normalize_email(email)),
+            ]
+        )
+
+    async def check_register(self, ip_address: Optional[str]) -> float:
+        return await self.check([(self.limits["register_ip"], ip_address)])
+
+    async def check(self, buckets: Sequence[Tuple[RateLimit, Optional[str]]]) -> float:
+        """Take a token from each ``(limit, key)`` bucket in turn.
+
+        Returns 0 when the request may proceed, otherwise the seconds until
+        the first empty bucket has a token again. Buckets after an empty one
+        are not charged. Buckets with no key are skipped.
+        """
+        if not self.enabled:
+            return 0.0
+        for limit, key in buckets:
+            if not key:
+                continue
+            try:
+                retry_after = await self.store.take(f"{limit.name}:{key}", limit)
+            except Exception:
+                # A shared-store outage must not lock everyone out of logging in
+                self.store_errors.inc()
+                return 0.0
+            if retry_after > 0:
+                metrics.counter(f"auth.rate_limit.{limit.name}.limited").inc()
+                return retry_after
+        return 0.0
+
+
+def build_rate_limits(settings: Settings) -> Dict[str, RateLimit]:
+    return {
+        "login_ip": RateLimit("login_ip", settings.login_ip_per_minute, settings.login_ip_burst),
+        "login_email": RateLimit(
+            "login_email", settings.login_email_per_minute, settings.login_email_burst
+        ),
+        "register_ip": RateLimit(
+            "register_ip", settings.register_ip_per_minute, settings.register_ip_burst
+        ),
+    }
+
+
+@lru_cache()
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter."""
+
+    settings = get_settings()
+    if settings.rate_limit_redis_url:
+        store = RedisRateLimitStore(settings.rate_limit_redis_url)
+    else:
+        store = MemoryRateLimitStore(settings.rate_limit_max_keys)
+    return RateLimiter(store, build_rate_limits(settings), enabled=settings.rate_limit_enabled)
@@ -0,0 +1,72 @@
+"""In-process store of revoked access-token ids (``jti`` claims).
+
+Every authenticated request asks "has this token been revoked?", so the
+check is a single dict lookup. Entries are only needed until the access
+token would have expired anyway, so the store stays small: roughly the
+logouts of the last ``access_token_expire_minutes``.
+
+The store is filled from ``refresh_tokens`` and ``revoked_tokens`` at
+startup and kept in step with other processes by a periodic sync (see
+:mod:`app.services.refresh_token_service`).
+"""
+
+from __future__ import annotations
+
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, Tuple
+
+from .metrics import metrics
+
+
+class RevocationStore:
+    """Revoked ``jti`` values with the time (epoch seconds) they stop mattering."""
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        self.rejected = metrics.counter("auth.revocation.rejected")
+        metrics.callback_gauge("auth.revocation.entries", lambda: len(self._entries))
+
+    def is_revoked(self, jti: str, now: float) -> bool:
+        expires_at = self._entries.get(jti)
+        if expires_at is None or expires_at <= now:
+            return False
+        self.rejected.inc()
+        return True
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        self.revoke_many([(jti, expires_at)])
+
+    def revoke_many(self, entries: Iterable[Tuple[str, float]]) -> None:
+        with self._lock:
+            for jti, expires_at in entries:
+                if expires_at > self._entries.get(jti, 0.0):
+                    self._entries[jti] = expires_at
+
+    def replace(self, entries: Iterable[Tuple[str, float]]) -> None:
+        """Swap in a freshly loaded set of revocations."""
+        fresh: Dict[str, float] = {}
+        for jti, expires_at in entries:
+            fresh[jti] = max(expires_at, fresh.get(jti, 0.0))
+        with self._lock:
+            self._entries = fresh
+
+    def prune(self, now: float) -> int:
+        """Drop entries whose tokens have expired; returns how many went."""
+        with self._lock:
+            expired = [jti for jti, expires_at in self._entries.items() if expires_at <= now]
+            for jti in expired:
+                del self._entries[jti]
+            return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@lru_cache()
+def get_revocation_store() -> RevocationStore:
+    """Return the process-wide revocation store."""
+
+    return RevocationStore()
@@ -3,11 +3,20 @@
 from __future__ import annotations
 
 import datetime as dt
-from typing import Any, Dict, Iterable, Optional
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+from uuid import UUID
 
 import jwt
 from fastapi import HTTPException, status
 
+from .metrics import metrics
+from .revocation import get_revocation_store
 from .settings import get_settings
 
 
@@ -15,9 +24,242 @@ class TokenPayload(Dict[str, Any]):
     """Typed helper representing decoded JWT payload."""
 
 
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, built from verified access-token claims.
+
+    Access tokens carry ``worker_id``/``facility_id`` next to ``sub``, so
+    routes can scope queries to the caller's profile without loading it.
+    """
+
+    user_id: UUID
+    roles: FrozenSet[str]
+    worker_id: Optional[UUID] = None
+    facility_id: Optional[UUID] = None
+
+    @classmethod
+    def from_claims(cls, payload: TokenPayload) -> "Principal":
+        sub = payload.get("sub")
+        if not sub:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication token",
+            )
+        roles = payload.get("roles", [])
+        if isinstance(roles, str):
+            roles = [roles]
+        try:
+            return cls(
+                user_id=UUID(str(sub)),
+                roles=frozenset(roles),
+                worker_id=_optional_uuid(payload.get("worker_id")),
+                facility_id=_optional_uuid(payload.get("facility_id")),
+            )
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid authentication token",
+            ) from exc
+
+    def has_role(self, role: str) -> bool:
+        return role in self.roles
+
+
+def _optional_uuid(value: Any) -> Optional[UUID]:
+    return UUID(str(value)) if value else None
+
+
+class ProfileIdCache:
+    """Short-lived map of user id to profile id for tokens without the claims.
+
+    Tokens issued before profile ids were embedded are still valid for up to
+    ``access_token_expire_minutes``; this keeps them from costing a lookup on
+    every request. Only found ids are stored, so a profile created after the
+    token was issued is picked up on the next request.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, UUID], Tuple[float, UUID]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, user_id: UUID, now: float) -> Optional[UUID]:
+        key = (kind, user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            valid_until, profile_id = entry
+            if now >= valid_until:
+                del self._entries[key]
+                return None
+            return profile_id
+
+    def put(self, kind: str, user_id: UUID, profile_id: UUID, now: float) -> None:
+        if self.max_entries <= 0:
+            return
+        key = (kind, user_id)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (now + self.ttl_seconds, profile_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: Any) -> None:
+        user_id = UUID(str(user_id))
+        with self._lock:
+            for kind in ("worker", "facility"):
+                self._entries.pop((kind, user_id), None)
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified token payloads, keyed by a digest of the token.
+
+    An entry is served until the earlier of the token's own ``exp`` and
+    ``ttl_seconds`` after it was verified. Only successfully verified tokens
+    are stored. A hit is not trusted on its own: :func:`decode_jwt` still
+    checks its ``jti`` against the revocation store, so a revoked token is
+    rejected as soon as the revocation reaches this process. Deleting a user
+    or profile also drops that subject's entries here, through
+    :meth:`invalidate_subject`.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._by_subject: Dict[str, Set[bytes]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = metrics.counter("auth.token_cache.hits")
+        self.misses = metrics.counter("auth.token_cache.misses")
+        self.evictions = metrics.counter("auth.token_cache.evictions")
+        metrics.callback_gauge("auth.token_cache.size", lambda: len(self._entries))
+        metrics.callback_gauge("auth.token_cache.hit_rate", self.hit_rate)
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def hit_rate(self) -> float:
+        total = self.hits.value + self.misses.value
+        return self.hits.value / total if total else 0.0
+
+    def get(self, key: bytes, now: float) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                valid_until, payload = entry
+                if now < valid_until:
+                    self._entries.move_to_end(key)
+                    self.hits.inc()
+                    return payload
+                self._remove(key)
+        self.misses.inc()
+        return None
+
+    def put(self, key: bytes, payload: Dict[str, Any], now: float) -> None:
+        if self.max_entries <= 0:
+            return
+        valid_until = now + self.ttl_seconds
+        exp = payload.get("exp")
+        if exp is not None:
+            valid_until = min(valid_until, float(exp))
+        if valid_until <= now:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (valid_until, payload)
+            subject = payload.get("sub")
+            if subject is not None:
+                self._by_subject.setdefault(str(subject), set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions.inc()
+
+    # ------------------------------------------------------------------
+    # Revocation events
+    # ------------------------------------------------------------------
+    def invalidate_subject(self, subject: Any) -> None:
+        """Forget every cached token issued to ``subject``."""
+        with self._lock:
+            for key in self._by_subject.pop(str(subject), set()):
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry; the token benchmark starts each case from empty."""
+        with self._lock:
+            self._entries.clear()
+            self._by_subject.clear()
+
+    def _remove(self, key: bytes) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        subject = entry[1].get("sub")
+        if subject is not None:
+            keys = self._by_subject.get(str(subject))
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_subject[str(subject)]
+
+
+@lru_cache()
+def get_token_cache() -> VerifiedTokenCache:
+    """Return the process-wide verified-token cache."""
+
+    settings = get_settings()
+    return VerifiedTokenCache(
+        max_entries=settings.token_cache_size,
+        ttl_seconds=settings.token_cache_ttl_seconds,
+    )
+
+
+@lru_cache()
+def get_profile_id_cache() -> ProfileIdCache:
+    """Return the process-wide profile id cache used for legacy tokens."""
+
+    settings = get_settings()
+    return ProfileIdCache(
+        max_entries=settings.token_cache_size,
+        ttl_seconds=settings.profile_id_cache_ttl_seconds,
+    )
+
+
 def decode_jwt(token: str) -> TokenPayload:
-    """Decode a JWT token and return its payload."""
+    """Decode a JWT token and return its payload.
+
+    Tokens verified recently are answered from :func:`get_token_cache`
+    without repeating the signature check. Either way the token's ``jti`` is
+    checked against the revocation store.
+    """
+
+    cache = get_token_cache()
+    key = cache.digest(token)
+    now = time.time()
+    payload = cache.get(key, now)
+    if payload is None:
+        payload = _verify_jwt(token)
+        _check_not_revoked(payload, now)
+        cache.put(key, payload, now)
+    else:
+        _check_not_revoked(payload, now)
+    return TokenPayload(payload)
+
 
+def _check_not_revoked(payload: Dict[str, Any], now: float) -> None:
+    jti = payload.get("jti")
+    if jti is not None and get_revocation_store().is_revoked(str(jti), now):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+        )
+
+
+def _verify_jwt(token: str) -> Dict[str, Any]:
     settings = get_settings()
     try:
         payload = jwt.decode(
@@ -40,7 +282,7 @@ def decode_jwt(token: str) -> TokenPayload:
                 detail="Token has expired",
             )
 
-    return TokenPayload(payload)
+    return payload
 
 
 def require_roles(payload: TokenPayload, allowed_roles: Iterable[str]) -> None:
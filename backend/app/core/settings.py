@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from functools import lru_cache
-from typing import List
+from typing import List, Literal, Optional
 
 from pydantic import AnyHttpUrl, Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -32,6 +32,151 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = Field(default=30, ge=1)
     refresh_token_expire_days: int = Field(default=7, ge=1)
 
+    token_cache_size: int = Field(
+        default=10000, ge=0, description="Verified access tokens kept in memory (0 disables)"
+    )
+    token_cache_ttl_seconds: int = Field(
+        default=60, ge=1, description="Longest a verified token is served from the cache"
+    )
+    profile_id_cache_ttl_seconds: int = Field(
+        default=300,
+        ge=1,
+        description="How long a profile id looked up for a token without profile claims is reused",
+    )
+
+    revocation_sync_seconds: int = Field(
+        default=30, ge=1, description="How often revocations made by other processes are loaded"
+    )
+    refresh_token_purge_interval_minutes: int = Field(default=60, ge=1)
+    refresh_token_purge_batch_size: int = Field(default=1000, ge=1)
+    refresh_token_revoked_retention_hours: int = Field(
+        default=24,
+        ge=1,
+        description="Revoked refresh tokens are kept this long before the purge removes them",
+    )
+
+    audit_log_sync_events: List[str] | str = Field(
+        default_factory=lambda: ["LOGOUT", "PASSWORD_RESET", "FAILED_LOGIN"],
+        description="Auth event types written in the request transaction; '*' for all",
+    )
+    audit_log_batch_size: int = Field(default=200, ge=1)
+    audit_log_flush_interval_ms: int = Field(
+        default=500, ge=1, description="Longest a buffered audit event waits to be written"
+    )
+    audit_log_queue_size: int = Field(
+        default=10000, ge=1, description="Buffered audit events before writes fall back inline"
+    )
+
+    activity_flush_seconds: int = Field(
+        default=30, ge=1, description="How often buffered last-login/last-active stamps are written"
+    )
+    activity_max_entries: int = Field(
+        default=100000, ge=1, description="Last-seen stamps kept in memory for recency reads"
+    )
+    activity_recency_half_life_hours: float = Field(
+        default=72, gt=0, description="Idle time after which the recency score halves"
+    )
+
+    upload_gc_interval_minutes: int = Field(default=360, ge=1)
+    upload_gc_grace_hours: int = Field(
+        default=24,
+        ge=1,
+        description="Unreferenced uploads are kept this long so a client can attach them first",
+    )
+    upload_gc_batch_size: int = Field(default=500, ge=1)
+    upload_orphan_scan_interval_minutes: int = Field(default=30, ge=1)
+    upload_orphan_scan_batch_size: int = Field(
+        default=1000, ge=1, description="Files checked per transaction by the orphaned-file scan"
+    )
+    upload_orphan_scan_max_batches: int = Field(
+        default=20, ge=1, description="Batches one scan run checks before yielding to the next run"
+    )
+    upload_orphan_quarantine_days: int = Field(
+        default=7,
+        ge=0,
+        description="Days orphaned files wait in .quarantine before deletion (0: delete at once)",
+    )
+    upload_session_ttl_hours: int = Field(
+        default=24, ge=1, description="Resumable uploads idle this long are discarded"
+    )
+    upload_chunk_max_bytes: int = Field(
+        default=2 * 1024 * 1024, ge=64 * 1024, description="Largest chunk one PATCH may carry"
+    )
+
+    storage_backend: Literal["local", "s3"] = Field(
+        default="local", description="Where upload bytes are kept (see app.core.storage)"
+    )
+    storage_presign_expiry_seconds: int = Field(
+        default=900, ge=60, le=7 * 24 * 3600, description="Lifetime of presigned storage URLs"
+    )
+    s3_bucket: Optional[str] = Field(default=None)
+    s3_endpoint_url: Optional[str] = Field(
+        default=None, description="For S3-compatible stores such as MinIO; unset for AWS"
+    )
+    s3_region: Optional[str] = Field(default=None)
+    # Unset: boto3's usual credential chain (environment, instance role, ...)
+    s3_access_key_id: Optional[str] = Field(default=None)
+    s3_secret_access_key: Optional[str] = Field(default=None)
+    s3_public_base_url: Optional[str] = Field(
+        default=None,
+        description="Public URL of the bucket (or a CDN in front of it); downloads skip presigning",
+    )
+
+    image_workers: int = Field(
+        default=1, ge=1, description="Processes rendering image derivatives"
+    )
+    image_max_pending: int = Field(
+        default=32, ge=0, description="Renders allowed to queue before new ones wait for the backfill"
+    )
+    image_webp_quality: int = Field(default=80, ge=1, le=100)
+    image_backfill_interval_minutes: int = Field(default=10, ge=1)
+    image_backfill_batch_size: int = Field(default=50, ge=1)
+
+    document_processing_interval_seconds: int = Field(default=15, ge=1)
+    document_processing_batch_size: int = Field(default=20, ge=1)
+    document_max_attempts: int = Field(default=3, ge=1)
+    document_text_max_chars: int = Field(
+        default=100_000, ge=0, description="Text kept from a PDF's text layer for review and search"
+    )
+    resume_index_interval_seconds: int = Field(default=30, ge=5)
+    resume_index_batch_size: int = Field(
+        default=200, ge=1, description="Workers whose resume search text is rebuilt per transaction"
+    )
+    duplicate_photo_max_distance: int = Field(
+        default=8, ge=0, le=12, description="Hash bits two ID photos may differ by and still match"
+    )
+    duplicate_photo_index_refresh_seconds: int = Field(default=120, ge=5)
+
+    rate_limit_enabled: bool = Field(default=True)
+    rate_limit_redis_url: Optional[str] = Field(
+        default=None, description="Share rate-limit buckets between processes (needs redis)"
+    )
+    rate_limit_max_keys: int = Field(
+        default=100000, ge=1, description="Buckets kept by the in-memory store"
+    )
+    login_ip_per_minute: float = Field(default=20, gt=0)
+    login_ip_burst: int = Field(default=40, ge=1)
+    login_email_per_minute: float = Field(default=5, gt=0)
+    login_email_burst: int = Field(default=10, ge=1)
+    register_ip_per_minute: float = Field(default=5, gt=0)
+    register_ip_burst: int = Field(default=10, ge=1)
+
+    password_schemes: List[str] | str = Field(
+        default_factory=lambda: ["argon2", "bcrypt"],
+        description="Hash schemes; the first hashes new passwords, the rest are upgraded on login",
+    )
+    argon2_time_cost: int = Field(default=3, ge=1)
+    argon2_memory_cost: int = Field(default=65536, ge=8, description="Memory per hash in KiB")
+    argon2_parallelism: int = Field(default=2, ge=1)
+    bcrypt_rounds: int = Field(default=12, ge=4, le=31)
+
+    password_hash_workers: int = Field(
+        default=2, ge=1, description="Processes in the password hashing pool"
+    )
+    password_hash_max_pending: int = Field(
+        default=64, ge=0, description="Hash/verify calls allowed to wait for a free worker"
+    )
+
     @field_validator("cors_origins", mode="before")
     @classmethod
     def parse_cors_origins(cls, value: List[AnyHttpUrl] | str | None) -> List[AnyHttpUrl] | str | None:
@@ -53,6 +198,15 @@ class Settings(BaseSettings):
 
         return value
 
+    @field_validator("password_schemes", "audit_log_sync_events", mode="before")
+    @classmethod
+    def parse_comma_separated(cls, value: List[str] | str) -> List[str]:
+        """Accept ``PASSWORD_SCHEMES=argon2,bcrypt`` as well as a JSON list."""
+
+        if isinstance(value, str):
+            return [scheme.strip() for scheme in value.split(",") if scheme.strip()]
+        return value
+
 
 @lru_cache()
 def get_settings() -> Settings:
@@ -0,0 +1,116 @@
+"""Serving ``/uploads`` with validators clients can cache against.
+
+Uploads are stored under the SHA-256 of their content (see
+:mod:`app.services.upload_service`), so a given URL never changes content:
+the file behind it is only ever created or deleted. Those responses carry
+
+* ``ETag: "<sha256>"`` (the image derivatives add their size name). This is a
+  strong validator that stays the same across servers and restores, unlike
+  Starlette's default of mtime and size.
+* ``Cache-Control: public, max-age=31536000, immutable``, so browsers don't
+  revalidate them at all.
+
+Files stored before content addressing keep the mtime-based ETag with
+``Cache-Control: no-cache``. ``If-None-Match`` is answered with 304, and
+``Range``/``If-Range`` requests are served from the file. Whole-file bodies
+go out as ``http.response.pathsend`` (zero-copy) on servers that support it.
+
+With S3 storage (see :mod:`app.core.storage`) the API holds no files, and
+``/uploads/<key>`` answers with a redirect to the object instead.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, RedirectResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from .settings import get_settings
+from .storage import IMMUTABLE, UPLOAD_DIR, LocalStorage, get_blob_storage
+
+REVALIDATE = "no-cache"
+
+# ab/cd/<sha256>.png, or ab/cd/<sha256>.<size>.webp for a derivative
+_CONTENT_ADDRESSED = re.compile(
+    r"^[0-9a-f]{2}/[0-9a-f]{2}/(?P<sha256>[0-9a-f]{64})(?:\.(?P<size>[a-z]+))?\.[a-z]+$"
+)
+
+
+def upload_etag(path: str) -> Optional[str]:
+    """Content-derived ETag for a path under ``UPLOAD_DIR``, or None."""
+    match = _CONTENT_ADDRESSED.match(path.replace(os.sep, "/"))
+    if match is None:
+        return None
+    if match["size"]:
+        return f'"{match["sha256"]}.{match["size"]}"'
+    return f'"{match["sha256"]}"'
+
+
+class UploadFileResponse(FileResponse):
+    # Fewer thread hops per PDF page range than the 64 KiB default
+    chunk_size = 256 * 1024
+
+
+class UploadFiles(StaticFiles):
+    """``StaticFiles`` for the uploads directory."""
+
+    def __init__(self, directory: str, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        # lookup_path() hands back resolved paths
+        self._root = os.path.realpath(directory)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        # Partial uploads live in .incoming/ until they're complete
+        if path.startswith("."):
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def file_response(
+        self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200
+    ) -> Response:
+        path = os.path.relpath(full_path, self._root)
+        etag = upload_etag(path)
+        headers = {"cache-control": IMMUTABLE if etag else REVALIDATE}
+        if etag:
+            headers["etag"] = etag
+        response = UploadFileResponse(
+            full_path, status_code=status_code, headers=headers, stat_result=stat_result
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+class UploadRedirects(StaticFiles):
+    """``/uploads`` for remote storage: redirects to the stored object's URL."""
+
+    def __init__(self, **kwargs):
+        super().__init__(directory=None, **kwargs)
+        self.storage = get_blob_storage()
+        # Presigned URLs must not be reused once expired; the object itself
+        # carries the long-lived Cache-Control
+        expiry = get_settings().storage_presign_expiry_seconds
+        self.cache_control = f"private, max-age={expiry // 2}"
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405, headers={"Allow": "GET, HEAD"})
+        if path.startswith("."):
+            raise HTTPException(status_code=404)
+        # Presigning is local computation; a missing object 404s at the store
+        url = self.storage.download_url(path.replace(os.sep, "/"))
+        return RedirectResponse(url, status_code=307, headers={"cache-control": self.cache_control})
+
+
+def upload_files_app() -> StaticFiles:
+    """The app to mount at ``/uploads`` for the configured storage."""
+    if isinstance(get_blob_storage(), LocalStorage):
+        UPLOAD_DIR.mkdir(exist_ok=True)
+        return UploadFiles(directory=str(UPLOAD_DIR))
+    return UploadRedirects()
@@ -0,0 +1,405 @@
+"""Where upload bytes live: the local ``uploads/`` directory or an S3 bucket.
+
+Stored files are addressed by key, their path relative to the store root
+(``ab/cd/<sha256>.png``). The URLs saved on profiles are ``/uploads/<key>``
+whichever backend holds the bytes. ``STORAGE_BACKEND`` picks one:
+
+* ``local`` (default) keeps files in ``UPLOAD_DIR``, served by the API.
+* ``s3`` keeps them in ``S3_BUCKET`` on AWS S3 or an S3-compatible store
+  (MinIO, or moto in development; set ``S3_ENDPOINT_URL``). ``/uploads``
+  redirects to presigned download URLs, or to ``S3_PUBLIC_BASE_URL``, and
+  clients can PUT files straight into the bucket with presigned URLs (see
+  :meth:`app.services.UploadService.create_direct_upload`). Then the bytes
+  never pass through the API processes, and any number of API nodes can
+  share the store.
+
+  A presigned PUT URL stays usable until it expires, so a client can recreate
+  a staging key (``.incoming/<id>``) after its session is over. The orphan
+  scan deletes staging keys with no live session at the end of each pass; a
+  bucket lifecycle rule expiring ``.incoming/`` after a day or two also
+  bounds them if the scan is turned off.
+
+Code that needs a file on disk, such as rendering in the image process pool,
+goes through :meth:`BlobStorage.reading` and :meth:`BlobStorage.writing`.
+The local backend hands out the real paths; S3 downloads to and uploads
+from temp files.
+
+The S3 backend requires boto3.
+"""
+
+from __future__ import annotations
+
+import base64
+import datetime as dt
+import errno
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+from .settings import get_settings
+
+UPLOAD_DIR = Path(__file__).resolve().parents[2] / "uploads"
+
+# Every key outside the dot-prefixed work areas (.incoming, .quarantine) is
+# content-addressed, so its bytes never change
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class StoredObject(NamedTuple):
+    key: str
+    size: int
+    # Seconds since the epoch
+    modified: float
+
+
+class PresignedUpload(NamedTuple):
+    """A request the client makes itself to put a file into storage."""
+
+    url: str
+    method: str
+    # Must be sent exactly as given; they are part of the signature
+    headers: Dict[str, str]
+    # When the URL stops working (naive UTC)
+    expires_at: dt.datetime
+
+
+class BlobStorage:
+    """Operations every storage backend provides."""
+
+    # Whether presign_upload() is available
+    supports_direct_uploads = False
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        raise NotImplementedError
+
+    def put_file(self, source: str, key: str, content_type: str) -> None:
+        """Store the local file ``source`` under ``key``; ``source`` is consumed."""
+        raise NotImplementedError
+
+    def move(self, key: str, new_key: str, content_type: Optional[str] = None) -> None:
+        """Rename a stored object; its modified time becomes now.
+
+        Raises FileNotFoundError if ``key`` doesn't exist.
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """Delete ``key``; deleting a missing key is not an error."""
+        raise NotImplementedError
+
+    def iter_objects(self, after: str = "", prefix: str = "") -> Iterator[StoredObject]:
+        """Stored objects in key order, starting after ``after``.
+
+        Keys under the dot-prefixed work areas are only listed when
+        ``prefix`` names one (say ``".quarantine/"``). The order is the
+        backend's own, so ``after`` must come from the same backend.
+        """
+        raise NotImplementedError
+
+    @contextmanager
+    def reading(self, key: str) -> Iterator[str]:
+        """Path of a local file holding ``key``'s bytes, for the ``with`` block."""
+        raise NotImplementedError
+        yield
+
+    @contextmanager
+    def writing(self, key: str, content_type: str) -> Iterator[str]:
+        """Local path to write ``key`` to; stored if the block exits cleanly.
+
+        Nothing is stored if no file was written at the path. Writers should
+        write atomically (temp file and rename), since the local backend
+        hands out the final path.
+        """
+        raise NotImplementedError
+        yield
+
+    def download_url(self, key: str) -> Optional[str]:
+        """Where a client can fetch ``key`` directly (None: the API serves it)."""
+        return None
+
+    def presign_upload(
+        self, key: str, content_type: str, size: int, sha256: str, expires_in: int
+    ) -> PresignedUpload:
+        raise NotImplementedError
+
+    def stored_sha256(self, key: str) -> Optional[str]:
+        """SHA-256 the backend checked when ``key`` was uploaded, if it kept one."""
+        return None
+
+
+class LocalStorage(BlobStorage):
+    """Files in a directory on this machine (shared disk for several nodes)."""
+
+    def __init__(self, root: Path = UPLOAD_DIR):
+        self.root = root
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            stat_result = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return StoredObject(key, stat_result.st_size, stat_result.st_mtime)
+
+    def put_file(self, source: str, key: str, content_type: str) -> None:
+        target = self._path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # mkstemp creates files 0600; uploads are served to anyone with the URL
+        os.chmod(source, 0o644)
+        try:
+            os.replace(source, target)
+        except OSError as exc:
+            if exc.errno != errno.EXDEV:
+                raise
+            # Temp files on another filesystem: copy next to the target, then rename
+            fd, temp_name = tempfile.mkstemp(dir=target.parent, suffix=".part")
+            os.close(fd)
+            try:
+                shutil.copyfile(source, temp_name)
+                os.chmod(temp_name, 0o644)
+                os.replace(temp_name, target)
+            except BaseException:
+                os.unlink(temp_name)
+                raise
+            os.unlink(source)
+
+    def move(self, key: str, new_key: str, content_type: Optional[str] = None) -> None:
+        target = self._path(new_key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self._path(key), target)
+        os.utime(target)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_objects(self, after: str = "", prefix: str = "") -> Iterator[StoredObject]:
+        # Sorted name by name at each level, so whole directories before
+        # ``after`` are skipped without being listed
+        after_parts = tuple(after.split("/")) if after else ()
+        prefix_parts = tuple(prefix.strip("/").split("/")) if prefix else ()
+
+        def walk(directory: str, parts: Tuple[str, ...]) -> Iterator[StoredObject]:
+            try:
+                entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+            except FileNotFoundError:
+                return
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                path = parts + (entry.name,)
+                if entry.is_dir(follow_symlinks=False):
+                    if path >= after_parts[: len(path)]:
+                        yield from walk(entry.path, path)
+                elif entry.is_file(follow_symlinks=False) and path > after_parts:
+                    stat_result = entry.stat(follow_symlinks=False)
+                    yield StoredObject("/".join(path), stat_result.st_size, stat_result.st_mtime)
+
+        return walk(str(self.root.joinpath(*prefix_parts)), prefix_parts)
+
+    @contextmanager
+    def reading(self, key: str) -> Iterator[str]:
+        yield str(self._path(key))
+
+    @contextmanager
+    def writing(self, key: str, content_type: str) -> Iterator[str]:
+        target = self._path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        yield str(target)
+
+
+class S3Storage(BlobStorage):
+    """Objects in an S3 bucket, through boto3."""
+
+    supports_direct_uploads = True
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        public_base_url: Optional[str] = None,
+        presign_expiry: int = 900,
+    ):
+        import boto3
+        from botocore.config import Config
+        from botocore.exceptions import ClientError
+
+        self.bucket = bucket
+        self.public_base_url = public_base_url.rstrip("/") if public_base_url else None
+        self.presign_expiry = presign_expiry
+        self._client_error = ClientError
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            config=Config(
+                signature_version="s3v4",
+                # MinIO and friends usually aren't set up for bucket subdomains
+                s3={"addressing_style": "path" if endpoint_url else "auto"},
+            ),
+        )
+
+    def _missing(self, exc: Exception) -> bool:
+        code = exc.response.get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def _head(self, key: str, **kwargs) -> Optional[dict]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key, **kwargs)
+        except self._client_error as exc:
+            if self._missing(exc):
+                return None
+            raise
+
+    def exists(self, key: str) -> bool:
+        return self._head(key) is not None
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        head = self._head(key)
+        if head is None:
+            return None
+        return StoredObject(key, head["ContentLength"], head["LastModified"].timestamp())
+
+    def _extra_args(self, key: str, content_type: str) -> Dict[str, str]:
+        extra = {"ContentType": content_type}
+        if not key.startswith("."):
+            extra["CacheControl"] = IMMUTABLE
+        return extra
+
+    def put_file(self, source: str, key: str, content_type: str) -> None:
+        self.client.upload_file(
+            source, self.bucket, key, ExtraArgs=self._extra_args(key, content_type)
+        )
+        os.unlink(source)
+
+    def move(self, key: str, new_key: str, content_type: Optional[str] = None) -> None:
+        copy = {"Bucket": self.bucket, "Key": new_key, "CopySource": {"Bucket": self.bucket, "Key": key}}
+        if content_type:
+            copy.update(MetadataDirective="REPLACE", **self._extra_args(new_key, content_type))
+        try:
+            # Server-side; the bytes don't come through this process
+            self.client.copy_object(**copy)
+        except self._client_error as exc:
+            if self._missing(exc):
+                raise FileNotFoundError(key) from exc
+            raise
+        self.delete(key)
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def iter_objects(self, after: str = "", prefix: str = "") -> Iterator[StoredObject]:
+        if not prefix:
+            # "/" sorts right after ".", so this skips .incoming/ and .quarantine/
+            after = max(after, "/")
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(
+            Bucket=self.bucket, Prefix=prefix, StartAfter=max(after, prefix)
+        ):
+            for item in page.get("Contents", ()):
+                yield StoredObject(item["Key"], item["Size"], item["LastModified"].timestamp())
+
+    @contextmanager
+    def reading(self, key: str) -> Iterator[str]:
+        fd, temp_name = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, key, temp_name)
+            yield temp_name
+        finally:
+            os.unlink(temp_name)
+
+    @contextmanager
+    def writing(self, key: str, content_type: str) -> Iterator[str]:
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, os.path.basename(key))
+        try:
+            yield path
+            if os.path.exists(path):
+                self.put_file(path, key, content_type)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def download_url(self, key: str) -> Optional[str]:
+        if self.public_base_url:
+            return f"{self.public_base_url}/{key}"
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=self.presign_expiry,
+        )
+
+    def presign_upload(
+        self, key: str, content_type: str, size: int, sha256: str, expires_in: int
+    ) -> PresignedUpload:
+        # Signing the length and checksum headers makes S3 reject a body of
+        # any other size or SHA-256, and keep the checksum for stored_sha256()
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ContentType": content_type,
+                "ContentLength": size,
+                "ChecksumSHA256": checksum,
+            },
+            ExpiresIn=expires_in,
+        )
+        return PresignedUpload(
+            url,
+            "PUT",
+            {
+                "Content-Type": content_type,
+                "Content-Length": str(size),
+                "x-amz-checksum-sha256": checksum,
+            },
+            dt.datetime.utcnow() + dt.timedelta(seconds=expires_in),
+        )
+
+    def stored_sha256(self, key: str) -> Optional[str]:
+        head = self._head(key, ChecksumMode="ENABLED")
+        checksum = head.get("ChecksumSHA256") if head else None
+        # Multipart uploads report a checksum of part checksums ("...-3")
+        if not checksum or "-" in checksum:
+            return None
+        return base64.b64decode(checksum).hex()
+
+
+@lru_cache()
+def get_blob_storage() -> BlobStorage:
+    """Return the process's storage backend, as configured."""
+
+    settings = get_settings()
+    if settings.storage_backend == "s3":
+        if not settings.s3_bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires S3_BUCKET")
+        return S3Storage(
+            settings.s3_bucket,
+            endpoint_url=settings.s3_endpoint_url or None,
+            region=settings.s3_region or None,
+            access_key_id=settings.s3_access_key_id or None,
+            secret_access_key=settings.s3_secret_access_key or None,
+            public_base_url=settings.s3_public_base_url or None,
+            presign_expiry=settings.storage_presign_expiry_seconds,
+        )
+    return LocalStorage()
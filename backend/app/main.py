@@ -1,21 +1,21 @@
 """FastAPI application factory."""
 
 from __future__ import annotations
-from pathlib import Path
 from sentence_transformers import SentenceTransformer
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
 from app.api import api_router
 from app.core import get_settings
+from app.core.lifespan import lifespan
+from app.core.static_files import upload_files_app
 
 # Initialize sentence transformer model
 model = SentenceTransformer('all-MiniLM-L6-v2')
 
 # Create FastAPI app
 settings = get_settings()
-app = FastAPI(title="MedPost API", debug=settings.debug)
+app = FastAPI(title="MedPost API", debug=settings.debug, lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -26,10 +26,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount uploads directory for serving static files
-UPLOAD_DIR = Path(__file__).parent.parent / "uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+# Serve uploads from the uploads directory, or redirect to the blob store
+app.mount("/uploads", upload_files_app(), name="uploads")
 
 # Include API router
 app.include_router(api_router)
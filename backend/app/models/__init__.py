@@ -22,10 +22,24 @@ from .base_model import (
     UserRole,
 )
 
-from .worker import Worker, Experience, SafetyCheck, CredentialType, WorkerCredential
+from .worker import (
+    Worker,
+    Experience,
+    SafetyCheck,
+    CredentialType,
+    WorkerCredential,
+    RESUME_SEARCH_CONFIG,
+)
 from .facility import Facility, FacilityAddress, SpecialtyType, FacilitySpecialty, FacilityCertification
 from .jobs import JobPost, JobPostRole, JobApplication
-from .user import User, RefreshToken, AuthAuditLog
+from .user import User, RefreshToken, RevokedToken, AuthAuditLog, normalize_email
+from .upload import (
+    DocumentAnalysis,
+    DocumentAnalysisStatus,
+    UploadBlob,
+    UploadScanCursor,
+    UploadSession,
+)
 
 __all__ = [
     "Base",
@@ -43,6 +57,7 @@ __all__ = [
     "SafetyCheck",
     "CredentialType",
     "WorkerCredential",
+    "RESUME_SEARCH_CONFIG",
     "Facility",
     "FacilityAddress",
     "SpecialtyType",
@@ -52,8 +67,15 @@ __all__ = [
     "JobPostRole",
     "JobApplication",
     "User",
+    "normalize_email",
     "RefreshToken",
+    "RevokedToken",
     "AuthAuditLog",
+    "UploadBlob",
+    "UploadSession",
+    "UploadScanCursor",
+    "DocumentAnalysis",
+    "DocumentAnalysisStatus",
     "AuthEventType",
     "UserRole",
 ]
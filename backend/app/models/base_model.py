@@ -145,3 +145,4 @@ class AuthEventType(str, Enum):
 class UserRole(str, Enum):
     WORKER = "WORKER"
     FACILITY = "FACILITY"
+    ADMIN = "ADMIN"
@@ -61,6 +61,8 @@ class Facility(Base, TimestampMixin):
 
     is_verified: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     verification_submitted_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # Written in batches by ActivityTracker, so it can lag by a flush interval
+    last_active_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="facility_profile")
@@ -96,6 +98,15 @@ class Facility(Base, TimestampMixin):
     )
 
 
+# Facility listings show the most recently active first, optionally by industry
+Index("ix_facilities_last_active", Facility.last_active_at.desc().nulls_last())
+Index(
+    "ix_facilities_industry_last_active",
+    Facility.industry,
+    Facility.last_active_at.desc().nulls_last(),
+)
+
+
 class FacilityAddress(Base):
     __tablename__ = "facility_addresses"
 
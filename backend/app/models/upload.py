@@ -0,0 +1,148 @@
+"""Content-addressed upload storage."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Enum as SAEnum,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    text,
+)
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base_model import Base, TimestampMixin
+
+
+class UploadBlob(Base, TimestampMixin):
+    """One stored file, keyed by the SHA-256 of its content.
+
+    ``ref_count`` is how many profile/credential URL columns point at the
+    blob, as of the last garbage-collection pass; blobs at zero are deleted
+    once ``last_uploaded_at`` is older than the grace period.
+    """
+
+    __tablename__ = "upload_blobs"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # Relative to UPLOAD_DIR, e.g. "ab/cd/abcd….png"
+    path: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
+    content_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    ref_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    last_uploaded_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+    # When the resized WebP copies of an image were written (NULL: not yet,
+    # or not an image)
+    derived_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The GC only ever looks at unreferenced blobs
+        Index(
+            "ix_upload_blobs_unreferenced",
+            "last_uploaded_at",
+            postgresql_where=text("ref_count = 0"),
+        ),
+        # The derivative backfill only looks at blobs not rendered yet
+        Index(
+            "ix_upload_blobs_underived",
+            "last_uploaded_at",
+            postgresql_where=text("derived_at IS NULL"),
+        ),
+    )
+
+
+class UploadSession(Base, TimestampMixin):
+    """A resumable or direct upload in progress.
+
+    The bytes received so far are in ``INCOMING_DIR/<id>.session``; chunks
+    are only accepted at ``received_bytes``, so the client can always resume
+    from the offset the server last acknowledged. A direct upload's file is
+    staged in storage as ``.incoming/<id>`` instead.
+    """
+
+    __tablename__ = "upload_sessions"
+
+    id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
+    content_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    received_bytes: Mapped[int] = mapped_column(
+        BigInteger, default=0, server_default="0", nullable=False
+    )
+    # Optional at creation; the client may instead send it when finalizing
+    sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    # Pushed forward by every chunk; expired sessions are deleted with their file
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
+class UploadScanCursor(Base, TimestampMixin):
+    """Where the orphaned-file scan of the upload storage stopped.
+
+    ``position`` is the last storage key checked; the scan lists files in
+    key order and resumes after it. Empty once a pass has finished.
+    """
+
+    __tablename__ = "upload_scan_cursors"
+
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    position: Mapped[str] = mapped_column(Text, default="", server_default="", nullable=False)
+    pass_started_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+
+
+class DocumentAnalysisStatus(str, Enum):
+    PENDING = "PENDING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
+class DocumentAnalysis(Base, TimestampMixin):
+    """What the verification review needs from an upload, computed off the request path.
+
+    Keyed by blob, so a file submitted by several accounts is analysed once.
+    PENDING rows are the work queue; see ``DocumentProcessingService``.
+    """
+
+    __tablename__ = "document_analyses"
+
+    sha256: Mapped[str] = mapped_column(
+        String(64), ForeignKey("upload_blobs.sha256", ondelete="CASCADE"), primary_key=True
+    )
+    status: Mapped[DocumentAnalysisStatus] = mapped_column(
+        SAEnum(DocumentAnalysisStatus),
+        default=DocumentAnalysisStatus.PENDING,
+        server_default=DocumentAnalysisStatus.PENDING.value,
+        nullable=False,
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    page_count: Mapped[Optional[int]] = mapped_column(Integer)
+    extracted_text: Mapped[Optional[str]] = mapped_column(Text)
+    # Relative to UPLOAD_DIR; PDFs only (images use their "card" derivative)
+    preview_path: Mapped[Optional[str]] = mapped_column(String(255))
+    # 64-bit dHash of the image or first page, as 16 hex digits
+    phash: Mapped[Optional[str]] = mapped_column(String(16))
+    error: Mapped[Optional[str]] = mapped_column(String(255))
+    processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    __table_args__ = (
+        Index(
+            "ix_document_analyses_pending",
+            "updated_at",
+            postgresql_where=text("status = 'PENDING'"),
+        ),
+    )
@@ -6,9 +6,9 @@ from datetime import datetime
 from typing import List, Optional
 from uuid import UUID, uuid4
 
-from sqlalchemy import Boolean, DateTime, Enum as SAEnum, ForeignKey, String, Text
+from sqlalchemy import Boolean, CheckConstraint, DateTime, Enum as SAEnum, ForeignKey, String, Text
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
-from sqlalchemy.orm import Mapped, relationship
+from sqlalchemy.orm import Mapped, relationship, validates
 
 from .base_model import (
     AuthEventType,
@@ -21,6 +21,8 @@ from .base_model import (
 
 class User(Base, TimestampMixin):
     __tablename__ = "users"
+    # Emails are stored lowercase so lookups can use the plain unique index
+    __table_args__ = (CheckConstraint("email = lower(email)", name="email_lowercase"),)
 
     id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True, default=uuid4)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
@@ -43,6 +45,14 @@ class User(Base, TimestampMixin):
         "AuthAuditLog", back_populates="user", cascade="all, delete-orphan"
     )
 
+    @validates("email")
+    def _normalize_email(self, key: str, value: str) -> str:
+        return normalize_email(value)
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
 
 class RefreshToken(Base, TimestampMixin):
     __tablename__ = "refresh_tokens"
@@ -52,11 +62,14 @@ class RefreshToken(Base, TimestampMixin):
         PGUUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), index=True
     )
     token_hash: Mapped[str] = mapped_column(String(128), unique=True, nullable=False)
-    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
-    revoked_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True, nullable=False)
+    revoked_at: Mapped[Optional[datetime]] = mapped_column(DateTime, index=True, nullable=True)
     revoked_reason: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     replaced_by_token_id: Mapped[Optional[UUID]] = mapped_column(
-        PGUUID(as_uuid=True), ForeignKey("refresh_tokens.id"), nullable=True
+        PGUUID(as_uuid=True),
+        ForeignKey("refresh_tokens.id", ondelete="SET NULL"),
+        index=True,
+        nullable=True,
     )
     ip_address: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
     user_agent: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
@@ -70,6 +83,22 @@ class RefreshToken(Base, TimestampMixin):
     )
 
 
+class RevokedToken(Base, TimestampMixin):
+    """An access-token ``jti`` revoked independently of its refresh token.
+
+    Written when a user or profile is deleted. Deleting the user takes its
+    ``refresh_tokens`` rows with it, so this table is what tells other
+    processes to stop accepting the user's access tokens. Rows are only
+    needed until ``expires_at``, when the last of those tokens has expired.
+    """
+
+    __tablename__ = "revoked_tokens"
+
+    jti: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True)
+    revoked_at: Mapped[datetime] = mapped_column(DateTime, index=True, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True, nullable=False)
+
+
 class AuthAuditLog(Base, TimestampMixin):
     __tablename__ = "auth_audit_logs"
 
@@ -93,4 +122,4 @@ class AuthAuditLog(Base, TimestampMixin):
     )
 
 
-__all__ = ["User", "RefreshToken", "AuthAuditLog"]
+__all__ = ["User", "RefreshToken", "RevokedToken", "AuthAuditLog", "normalize_email"]
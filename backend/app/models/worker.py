@@ -12,11 +12,12 @@ from sqlalchemy import (
     ForeignKey,
     Index,
     Integer,
+    Numeric,
     String,
     Text,
     UniqueConstraint,
 )
-from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base_model import (
@@ -28,6 +29,11 @@ from .base_model import (
     VerificationStatus,
 )
 
+# Text search configuration resume_search is built with; queries against it
+# must use the same one
+RESUME_SEARCH_CONFIG = "english"
+
+
 # ---------- Worker (core profile) ----------
 class Worker(Base, TimestampMixin):
     __tablename__ = "workers"
@@ -65,6 +71,22 @@ class Worker(Base, TimestampMixin):
     id_photo_url: Mapped[Optional[str]] = mapped_column(String(512))
     verification_submitted_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     verification_completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    # Denormalized ranking, maintained alongside endorsement writes
+    endorsement_count: Mapped[int] = mapped_column(
+        Integer, default=0, server_default="0", nullable=False
+    )
+    rank_score: Mapped[float] = mapped_column(
+        Numeric(8, 2, asdecimal=False), default=0, server_default="0", nullable=False
+    )
+    # Written in batches by ActivityTracker, so it can lag by a flush interval
+    last_active_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+    # Text search over the uploaded resume, filled in the background once its
+    # text has been extracted. resume_sha256 is the upload it was built from;
+    # it differs from resume_url's digest while a new resume waits its turn.
+    resume_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    resume_search: Mapped[Optional[str]] = mapped_column(TSVECTOR, nullable=True, deferred=True)
     
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="worker_profile")
@@ -90,9 +112,21 @@ class Worker(Base, TimestampMixin):
     __table_args__ = (
         Index("ix_workers_title_city", "title", "city"),
         Index("ix_workers_title_state", "title", "state_province"),
+        Index("ix_workers_resume_search", "resume_search", postgresql_using="gin"),
     )
 
 
+# "Best match first" listings filter on title/city and order by rank, most
+# recently active first among equal ranks
+Index(
+    "ix_workers_title_city_rank",
+    Worker.title,
+    Worker.city,
+    Worker.rank_score.desc(),
+    Worker.last_active_at.desc().nulls_last(),
+)
+
+
 class Experience(Base):
     __tablename__ = "experiences"
 
@@ -5,6 +5,13 @@ from .facilities import FacilityRepository
 from .jobs import JobRepository
 from .endorsements import EndorsementRepository
 from .users import UserRepository, RefreshTokenRepository, AuthAuditLogRepository
+from .bulk import BulkImportRepository
+from .uploads import (
+    DocumentAnalysisRepository,
+    UploadBlobRepository,
+    UploadScanCursorRepository,
+    UploadSessionRepository,
+)
 
 __all__ = [
     "WorkerRepository",
@@ -14,4 +21,9 @@ __all__ = [
     "UserRepository",
     "RefreshTokenRepository",
     "AuthAuditLogRepository",
+    "BulkImportRepository",
+    "UploadBlobRepository",
+    "UploadSessionRepository",
+    "UploadScanCursorRepository",
+    "DocumentAnalysisRepository",
 ]
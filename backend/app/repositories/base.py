@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
-from typing import Generic, Optional, Sequence, Type, TypeVar
+from datetime import datetime
+from typing import Any, Dict, Generic, Mapping, Optional, Sequence, Type, TypeVar
 
-from sqlalchemy import select
+from sqlalchemy import column, insert, or_, select, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.schemas.common import PaginationParams
@@ -33,3 +35,78 @@ class SQLAlchemyRepository(Generic[ModelT]):
 
     def delete(self, obj: ModelT) -> None:
         self.session.delete(obj)
+
+    # ------------------------------------------------------------------
+    # Single-statement writes
+    #
+    # These issue one INSERT/UPDATE ... RETURNING and hand back the mapped
+    # instance built from the returned row, so callers can commit without a
+    # preceding SELECT or a trailing refresh().
+    # ------------------------------------------------------------------
+    def insert_returning(self, values: Dict[str, Any], model: Optional[Type] = None):
+        model = model or self.model
+        stmt = insert(model).values(**values).returning(model)
+        return self.session.execute(stmt).scalar_one()
+
+    def update_returning(
+        self, *criteria, values: Dict[str, Any], model: Optional[Type] = None
+    ):
+        """Update the row matching ``criteria``; ``None`` when nothing matched."""
+        model = model or self.model
+        if not values:
+            return self.session.execute(select(model).where(*criteria)).scalars().first()
+        stmt = (
+            update(model)
+            .where(*criteria)
+            .values(**values)
+            .returning(model)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        return self.session.execute(stmt).scalars().first()
+
+    def upsert_returning(
+        self,
+        values: Dict[str, Any],
+        constraint: str,
+        update_columns: Sequence[str],
+        model: Optional[Type] = None,
+    ):
+        """INSERT ... ON CONFLICT ON CONSTRAINT ... DO UPDATE ... RETURNING."""
+        model = model or self.model
+        stmt = pg_insert(model).values(**values)
+        stmt = (
+            stmt.on_conflict_do_update(
+                constraint=constraint,
+                set_={column: stmt.excluded[column] for column in update_columns},
+            )
+            .returning(model)
+            .execution_options(populate_existing=True)
+        )
+        return self.session.execute(stmt).scalar_one()
+
+    def advance_timestamps(self, column_name: str, stamps: Mapping[Any, datetime]) -> int:
+        """Move ``column_name`` forward to each row's stamp in one statement.
+
+        ``stamps`` maps primary keys to timestamps and is sent as
+        ``UPDATE ... FROM (VALUES ...)``. Rows already stamped at or after
+        their new value are left alone, so replays and out-of-order flushes
+        never move a timestamp backwards, and ``updated_at`` is not touched.
+        Returns the number of rows changed.
+        """
+        if not stamps:
+            return 0
+        table = self.model.__table__
+        target = table.c[column_name]
+        stamped = values(
+            column("id", table.c.id.type), column("stamp", target.type), name="stamped"
+        ).data(list(stamps.items()))
+        stmt = (
+            update(table)
+            .where(table.c.id == stamped.c.id)
+            .where(or_(target.is_(None), target < stamped.c.stamp))
+            .values({target: stamped.c.stamp})
+        )
+        if "updated_at" in table.c:
+            # A bookkeeping stamp, not an edit: keep the onupdate default off it
+            stmt = stmt.values({table.c.updated_at: table.c.updated_at})
+        return self.session.execute(stmt).rowcount
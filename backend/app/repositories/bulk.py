@@ -0,0 +1,114 @@
+"""Staging-table helpers used by bulk imports."""
+
+from __future__ import annotations
+
+from typing import IO, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import Table, text
+from sqlalchemy.orm import Session
+
+ROW_NUMBER_COLUMN = "_row_no"
+
+
+class BulkImportRepository:
+    """Loads rows into temporary staging tables with ``COPY`` and promotes them.
+
+    Staging tables mirror the live table (``LIKE ... INCLUDING DEFAULTS``) plus a
+    row number column used to map database-level rejections back to the
+    caller's input. They are dropped automatically when the transaction ends.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    @staticmethod
+    def staging_name(table: Table) -> str:
+        return f"_import_{table.name}"
+
+    def create_staging(self, table: Table) -> None:
+        self.session.execute(
+            text(
+                f"CREATE TEMP TABLE {self.staging_name(table)} "
+                f"({ROW_NUMBER_COLUMN} integer NOT NULL, "
+                f"LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+        )
+
+    def copy_rows(self, table: Table, columns: Sequence[str], buffer: IO[str]) -> None:
+        """Stream a CSV buffer into the staging table for ``table``."""
+
+        column_list = ", ".join([ROW_NUMBER_COLUMN, *columns])
+        dbapi_connection = self.session.connection().connection
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {self.staging_name(table)} ({column_list}) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+
+    def conflicting_rows(
+        self, table: Table, column: str, case_insensitive: bool = False
+    ) -> List[Tuple[int, str]]:
+        """Return staged rows whose ``column`` already exists in the live table."""
+
+        staged = f"s.{column}"
+        live = f"t.{column}"
+        if case_insensitive:
+            staged, live = f"lower({staged})", f"lower({live})"
+        rows = self.session.execute(
+            text(
+                f"SELECT s.{ROW_NUMBER_COLUMN}, s.{column}::text "
+                f"FROM {self.staging_name(table)} s "
+                f"JOIN {table.name} t ON {live} = {staged}"
+            )
+        )
+        return [(row[0], row[1]) for row in rows]
+
+    def missing_references(
+        self, table: Table, column: str, target: Table
+    ) -> List[Tuple[int, str]]:
+        """Return staged rows whose foreign key does not resolve in ``target``."""
+
+        rows = self.session.execute(
+            text(
+                f"SELECT s.{ROW_NUMBER_COLUMN}, s.{column}::text "
+                f"FROM {self.staging_name(table)} s "
+                f"LEFT JOIN {target.name} t ON t.id = s.{column} "
+                "WHERE t.id IS NULL"
+            )
+        )
+        return [(row[0], row[1]) for row in rows]
+
+    def discard_rows(self, tables: Iterable[Table], row_numbers: Iterable[int]) -> None:
+        rejected = sorted(set(row_numbers))
+        if not rejected:
+            return
+        for table in tables:
+            self.session.execute(
+                text(
+                    f"DELETE FROM {self.staging_name(table)} "
+                    f"WHERE {ROW_NUMBER_COLUMN} = ANY(:rows)"
+                ),
+                {"rows": rejected},
+            )
+
+    def promote(self, table: Table, columns: Sequence[str]) -> int:
+        """Insert every staged row into the live table in one statement."""
+
+        column_list = ", ".join(columns)
+        result = self.session.execute(
+            text(
+                f"INSERT INTO {table.name} ({column_list}) "
+                f"SELECT {column_list} FROM {self.staging_name(table)} "
+                f"ORDER BY {ROW_NUMBER_COLUMN}"
+            )
+        )
+        return result.rowcount
+
+    def staged_counts(self, tables: Iterable[Table]) -> Dict[str, int]:
+        return {
+            table.name: self.session.execute(
+                text(f"SELECT count(*) FROM {self.staging_name(table)}")
+            ).scalar_one()
+            for table in tables
+        }
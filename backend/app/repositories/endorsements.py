@@ -5,47 +5,96 @@ from __future__ import annotations
 from typing import List, Optional
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import bindparam, delete, select
 from sqlalchemy.orm import Session
 
 from app.models import Endorsement
 from .base import SQLAlchemyRepository
 
 
+# Hot lookups built once; see workers.py.
+_ENDORSEMENTS_FOR_WORKER = select(Endorsement).where(
+    Endorsement.worker_id == bindparam("worker_id")
+)
+_ENDORSEMENTS_FOR_FACILITY = select(Endorsement).where(
+    Endorsement.facility_id == bindparam("facility_id")
+)
+_ENDORSEMENT_FOR_WORKER = _ENDORSEMENTS_FOR_WORKER.where(
+    Endorsement.id == bindparam("endorsement_id")
+)
+_ENDORSEMENT_FOR_FACILITY = _ENDORSEMENTS_FOR_FACILITY.where(
+    Endorsement.id == bindparam("endorsement_id")
+)
+_ENDORSEMENT_FOR_FACILITY_AND_WORKER = _ENDORSEMENTS_FOR_FACILITY.where(
+    Endorsement.worker_id == bindparam("worker_id")
+)
+
+
 class EndorsementRepository(SQLAlchemyRepository[Endorsement]):
     def __init__(self, session: Session):
         super().__init__(Endorsement, session)
 
     def list_for_worker(self, worker_id: UUID) -> List[Endorsement]:
-        stmt = select(Endorsement).where(Endorsement.worker_id == worker_id)
-        return self.session.execute(stmt).scalars().all()
+        return self.session.execute(
+            _ENDORSEMENTS_FOR_WORKER, {"worker_id": worker_id}
+        ).scalars().all()
 
     def list_for_facility(self, facility_id: UUID) -> List[Endorsement]:
-        stmt = select(Endorsement).where(Endorsement.facility_id == facility_id)
-        return self.session.execute(stmt).scalars().all()
+        return self.session.execute(
+            _ENDORSEMENTS_FOR_FACILITY, {"facility_id": facility_id}
+        ).scalars().all()
 
     def get_for_worker(self, endorsement_id: UUID, worker_id: UUID) -> Optional[Endorsement]:
-        stmt = select(Endorsement).where(
-            Endorsement.id == endorsement_id, Endorsement.worker_id == worker_id
-        )
-        return self.session.execute(stmt).scalars().first()
+        return self.session.execute(
+            _ENDORSEMENT_FOR_WORKER, {"endorsement_id": endorsement_id, "worker_id": worker_id}
+        ).scalars().first()
 
     def get_for_facility(self, endorsement_id: UUID, facility_id: UUID) -> Optional[Endorsement]:
-        stmt = select(Endorsement).where(
-            Endorsement.id == endorsement_id, Endorsement.facility_id == facility_id
-        )
-        return self.session.execute(stmt).scalars().first()
+        return self.session.execute(
+            _ENDORSEMENT_FOR_FACILITY,
+            {"endorsement_id": endorsement_id, "facility_id": facility_id},
+        ).scalars().first()
 
     def get_for_facility_and_worker(
         self, facility_id: UUID, worker_id: UUID
     ) -> Optional[Endorsement]:
-        stmt = select(Endorsement).where(
-            Endorsement.facility_id == facility_id, Endorsement.worker_id == worker_id
-        )
-        return self.session.execute(stmt).scalars().first()
+        return self.session.execute(
+            _ENDORSEMENT_FOR_FACILITY_AND_WORKER,
+            {"facility_id": facility_id, "worker_id": worker_id},
+        ).scalars().first()
 
     def add_endorsement(self, payload: dict) -> Endorsement:
-        endorsement = Endorsement(**payload)
-        self.session.add(endorsement)
-        self.session.flush()
-        return endorsement
+        return self.insert_returning(payload)
+
+    def delete_returning_worker(self, *criteria) -> Optional[UUID]:
+        """Delete the matching endorsement; the endorsed worker's id, if one was deleted."""
+        stmt = (
+            delete(Endorsement)
+            .where(*criteria)
+            .returning(Endorsement.worker_id)
+            .execution_options(synchronize_session=False)
+        )
+        return self.session.execute(stmt).scalar_one_or_none()
+
+    def delete_for_facility(self, endorsement_id: UUID, facility_id: UUID) -> Optional[UUID]:
+        return self.delete_returning_worker(
+            Endorsement.id == endorsement_id, Endorsement.facility_id == facility_id
+        )
+
+    def delete_for_worker(self, endorsement_id: UUID, worker_id: UUID) -> Optional[UUID]:
+        return self.delete_returning_worker(
+            Endorsement.id == endorsement_id, Endorsement.worker_id == worker_id
+        )
+
+    def endorsed_worker_ids(self, facility_id: UUID) -> List[UUID]:
+        stmt = select(Endorsement.worker_id).where(Endorsement.facility_id == facility_id)
+        return self.session.execute(stmt).scalars().all()
+
+    def update_for_facility(
+        self, endorsement_id: UUID, facility_id: UUID, payload: dict
+    ) -> Optional[Endorsement]:
+        return self.update_returning(
+            Endorsement.id == endorsement_id,
+            Endorsement.facility_id == facility_id,
+            values=payload,
+        )
@@ -5,13 +5,23 @@ from __future__ import annotations
 from typing import List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import bindparam, func, select
 from sqlalchemy.orm import Session
 
 from app.models import Facility, FacilityCertification, FacilityCertificationCode
 from app.schemas import FacilityFilter, PaginationParams
 from .base import SQLAlchemyRepository
 
+# Hot lookups built once; see workers.py.
+_FACILITY_BY_USER_ID = select(Facility).where(Facility.user_id == bindparam("user_id"))
+_FACILITY_ID_BY_USER_ID = select(Facility.id).where(Facility.user_id == bindparam("user_id"))
+_CERTIFICATIONS_FOR_FACILITY = select(FacilityCertification).where(
+    FacilityCertification.facility_id == bindparam("facility_id")
+)
+_CERTIFICATION_BY_CODE = _CERTIFICATIONS_FOR_FACILITY.where(
+    FacilityCertification.code == bindparam("code")
+)
+
 
 class FacilityRepository(SQLAlchemyRepository[Facility]):
     def __init__(self, session: Session):
@@ -21,29 +31,34 @@ class FacilityRepository(SQLAlchemyRepository[Facility]):
         return self.session.get(Facility, facility_id)
 
     def get_by_user_id(self, user_id: UUID) -> Optional[Facility]:
-        stmt = select(Facility).where(Facility.user_id == user_id)
-        return self.session.execute(stmt).scalars().first()
+        return self.session.execute(_FACILITY_BY_USER_ID, {"user_id": user_id}).scalars().first()
+
+    def id_for_user(self, user_id: UUID) -> Optional[UUID]:
+        return self.session.execute(_FACILITY_ID_BY_USER_ID, {"user_id": user_id}).scalar()
 
     def list_certifications(self, facility_id: UUID) -> List[FacilityCertification]:
-        stmt = select(FacilityCertification).where(
-            FacilityCertification.facility_id == facility_id
-        )
-        return self.session.execute(stmt).scalars().all()
+        return self.session.execute(
+            _CERTIFICATIONS_FOR_FACILITY, {"facility_id": facility_id}
+        ).scalars().all()
 
     def get_certification_by_code(
         self, facility_id: UUID, code: FacilityCertificationCode
     ) -> Optional[FacilityCertification]:
-        stmt = select(FacilityCertification).where(
-            FacilityCertification.facility_id == facility_id,
-            FacilityCertification.code == code,
-        )
-        return self.session.execute(stmt).scalars().first()
+        return self.session.execute(
+            _CERTIFICATION_BY_CODE, {"facility_id": facility_id, "code": code}
+        ).scalars().first()
 
     def add_certification(self, certification: FacilityCertification) -> FacilityCertification:
         self.session.add(certification)
         self.session.flush()
         return certification
 
+    def insert_certification(self, payload: dict) -> FacilityCertification:
+        return self.insert_returning(payload, model=FacilityCertification)
+
+    def update_facility(self, facility_id: UUID, payload: dict) -> Optional[Facility]:
+        return self.update_returning(Facility.id == facility_id, values=payload)
+
     def list_facilities(
         self, filters: FacilityFilter, params: Optional[PaginationParams] = None
     ) -> Tuple[List[Facility], int]:
@@ -52,7 +67,7 @@ class FacilityRepository(SQLAlchemyRepository[Facility]):
             stmt = stmt.where(Facility.industry == filters.industry)
         total_stmt = select(func.count()).select_from(stmt.subquery())
         total = self.session.execute(total_stmt).scalar_one()
-        query = stmt
+        query = stmt.order_by(Facility.last_active_at.desc().nulls_last(), Facility.id)
         if params:
             query = query.offset(params.offset).limit(params.limit)
         facilities = self.session.execute(query).scalars().all()
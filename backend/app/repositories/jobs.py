@@ -2,16 +2,45 @@
 
 from __future__ import annotations
 
-from typing import List, Optional
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import String, bindparam, column, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Session
 
 from app.models import JobPost, JobPostRole, JobApplication
 from app.schemas import JobFilter, PaginationParams
 from .base import SQLAlchemyRepository
 
+# Hot lookups built once; see workers.py.
+_JOB_FOR_FACILITY = select(JobPost).where(
+    JobPost.id == bindparam("job_id"),
+    JobPost.facility_id == bindparam("facility_id"),
+)
+_APPLICATIONS_FOR_JOB = select(JobApplication).where(
+    JobApplication.job_post_id == bindparam("job_post_id")
+)
+_APPLICATIONS_FOR_FACILITY = (
+    select(JobApplication)
+    .join(JobPost)
+    .where(JobPost.facility_id == bindparam("facility_id"))
+    .order_by(JobApplication.created_at.desc())
+)
+_APPLICATIONS_FOR_FACILITY_JOB = _APPLICATIONS_FOR_FACILITY.where(
+    JobApplication.job_post_id == bindparam("job_post_id")
+)
+_APPLICATION_FOR_WORKER = select(JobApplication).where(
+    JobApplication.id == bindparam("application_id"),
+    JobApplication.worker_id == bindparam("worker_id"),
+)
+_APPLICATIONS_FOR_WORKER = (
+    select(JobApplication)
+    .where(JobApplication.worker_id == bindparam("worker_id"))
+    .order_by(JobApplication.created_at.desc())
+)
+
 
 class JobRepository(SQLAlchemyRepository[JobPost]):
     def __init__(self, session: Session):
@@ -39,34 +68,57 @@ class JobRepository(SQLAlchemyRepository[JobPost]):
         return self.session.get(JobPost, job_id)
 
     def get_job_for_facility(self, job_id: UUID, facility_id: UUID) -> Optional[JobPost]:
-        stmt = select(JobPost).where(
-            JobPost.id == job_id,
-            JobPost.facility_id == facility_id,
-        )
-        return self.session.execute(stmt).scalars().first()
+        return self.session.execute(
+            _JOB_FOR_FACILITY, {"job_id": job_id, "facility_id": facility_id}
+        ).scalars().first()
 
     def add_application(self, payload: dict) -> JobApplication:
-        obj = JobApplication(**payload)
-        self.session.add(obj)
-        self.session.flush()
-        return obj
+        return self.insert_returning(payload, model=JobApplication)
+
+    def update_job_for_facility(
+        self, job_id: UUID, facility_id: UUID, payload: dict
+    ) -> Optional[JobPost]:
+        return self.update_returning(
+            JobPost.id == job_id, JobPost.facility_id == facility_id, values=payload
+        )
+
+    def update_application_for_worker(
+        self, application_id: UUID, worker_id: UUID, payload: dict
+    ) -> Optional[JobApplication]:
+        return self.update_returning(
+            JobApplication.id == application_id,
+            JobApplication.worker_id == worker_id,
+            values=payload,
+            model=JobApplication,
+        )
+
+    def update_application_for_facility(
+        self, application_id: UUID, facility_id: UUID, payload: dict
+    ) -> Optional[JobApplication]:
+        facility_jobs = select(JobPost.id).where(JobPost.facility_id == facility_id)
+        return self.update_returning(
+            JobApplication.id == application_id,
+            JobApplication.job_post_id.in_(facility_jobs.scalar_subquery()),
+            values=payload,
+            model=JobApplication,
+        )
 
     def list_applications(self, job_post_id: UUID) -> List[JobApplication]:
-        stmt = select(JobApplication).where(JobApplication.job_post_id == job_post_id)
-        return self.session.execute(stmt).scalars().all()
+        return self.session.execute(
+            _APPLICATIONS_FOR_JOB, {"job_post_id": job_post_id}
+        ).scalars().all()
 
     def list_applications_for_facility(
         self, facility_id: UUID, job_post_id: Optional[UUID] = None
     ) -> List[JobApplication]:
-        stmt = (
-            select(JobApplication)
-            .join(JobPost)
-            .where(JobPost.facility_id == facility_id)
-        )
         if job_post_id:
-            stmt = stmt.where(JobApplication.job_post_id == job_post_id)
-        stmt = stmt.order_by(JobApplication.created_at.desc())
-        return self.session.execute(stmt).scalars().all()
+            return self.session.execute(
+                _APPLICATIONS_FOR_FACILITY_JOB,
+                {"facility_id": facility_id, "job_post_id": job_post_id},
+            ).scalars().all()
+        return self.session.execute(
+            _APPLICATIONS_FOR_FACILITY, {"facility_id": facility_id}
+        ).scalars().all()
 
     def get_application(self, application_id: UUID) -> Optional[JobApplication]:
         return self.session.get(JobApplication, application_id)
@@ -74,16 +126,43 @@ class JobRepository(SQLAlchemyRepository[JobPost]):
     def get_application_for_worker(
         self, application_id: UUID, worker_id: UUID
     ) -> Optional[JobApplication]:
-        stmt = select(JobApplication).where(
-            JobApplication.id == application_id,
-            JobApplication.worker_id == worker_id,
-        )
-        return self.session.execute(stmt).scalars().first()
+        return self.session.execute(
+            _APPLICATION_FOR_WORKER, {"application_id": application_id, "worker_id": worker_id}
+        ).scalars().first()
 
     def list_applications_for_worker(self, worker_id: UUID) -> List[JobApplication]:
+        return self.session.execute(
+            _APPLICATIONS_FOR_WORKER, {"worker_id": worker_id}
+        ).scalars().all()
+
+    def application_ids_for_facility(
+        self, application_ids: Iterable[UUID], facility_id: UUID
+    ) -> Set[UUID]:
+        """Return the subset of ``application_ids`` on this facility's job posts."""
+        stmt = (
+            select(JobApplication.id)
+            .join(JobPost, JobPost.id == JobApplication.job_post_id)
+            .where(
+                JobApplication.id.in_(list(application_ids)),
+                JobPost.facility_id == facility_id,
+            )
+        )
+        return set(self.session.execute(stmt).scalars().all())
+
+    def update_application_statuses(
+        self, changes: Sequence[Tuple[UUID, str]]
+    ) -> List[JobApplication]:
+        """Apply ``(application_id, status)`` pairs in one UPDATE ... FROM (VALUES ...)."""
+        changed = values(
+            column("id", PGUUID(as_uuid=True)),
+            column("status", String),
+            name="changed",
+        ).data(list(changes))
         stmt = (
-            select(JobApplication)
-            .where(JobApplication.worker_id == worker_id)
-            .order_by(JobApplication.created_at.desc())
+            update(JobApplication)
+            .where(JobApplication.id == changed.c.id)
+            .values(status=changed.c.status, updated_at=datetime.utcnow())
+            .returning(JobApplication)
+            .execution_options(synchronize_session=False, populate_existing=True)
         )
         return self.session.execute(stmt).scalars().all()
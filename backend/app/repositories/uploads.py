@@ -0,0 +1,438 @@
+"""Upload blob, scan cursor, upload session and document analysis repositories."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Collection, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import Row, bindparam, func, literal, or_, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models import (
+    RESUME_SEARCH_CONFIG,
+    DocumentAnalysis,
+    DocumentAnalysisStatus,
+    Facility,
+    FacilityCertification,
+    SafetyCheck,
+    UploadBlob,
+    UploadScanCursor,
+    UploadSession,
+    Worker,
+    WorkerCredential,
+)
+from .base import SQLAlchemyRepository
+
+# Every column that may hold a URL returned by the upload endpoints. A new
+# column storing upload URLs must be listed here, or the GC will treat the
+# files it points at as unreferenced.
+UPLOAD_REFERENCE_COLUMNS = (
+    Worker.profile_image_url,
+    Worker.resume_url,
+    Worker.selfie_url,
+    Worker.id_photo_url,
+    Facility.profile_image_url,
+    Facility.id_photo_url,
+    WorkerCredential.evidence_url,
+    SafetyCheck.evidence_url,
+    FacilityCertification.evidence_url,
+)
+
+# Picks the digest out of ".../uploads/ab/cd/<sha256>.ext", whether the
+# client stored the bare path or prefixed it with a host
+_DIGEST_IN_URL = "/uploads/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})"
+# The path under UPLOAD_DIR, for files stored before content addressing
+_PATH_IN_URL = "/uploads/([^?#]+)"
+
+
+def _reference_counts():
+    references = union_all(
+        *(
+            select(func.substring(column, _DIGEST_IN_URL).label("sha256")).where(
+                column.like("%/uploads/%")
+            )
+            for column in UPLOAD_REFERENCE_COLUMNS
+        )
+    ).subquery("upload_references")
+    return (
+        select(references.c.sha256, func.count().label("total"))
+        .where(references.c.sha256.is_not(None))
+        .group_by(references.c.sha256)
+        .subquery("reference_counts")
+    )
+
+
+def _recount_references():
+    counts = _reference_counts()
+    current = UploadBlob.__table__.alias("current_blobs")
+    recounted = (
+        select(current.c.sha256, func.coalesce(counts.c.total, 0).label("total"))
+        .select_from(current.outerjoin(counts, counts.c.sha256 == current.c.sha256))
+        .subquery("recounted")
+    )
+    return (
+        update(UploadBlob)
+        .where(UploadBlob.sha256 == recounted.c.sha256)
+        .where(UploadBlob.ref_count != recounted.c.total)
+        .values(ref_count=recounted.c.total)
+    )
+
+
+_RECOUNT_REFERENCES = _recount_references()
+_REGISTER_BLOB = pg_insert(UploadBlob).values(
+    sha256=bindparam("sha256"),
+    path=bindparam("path"),
+    content_type=bindparam("content_type"),
+    size_bytes=bindparam("size_bytes"),
+    last_uploaded_at=bindparam("uploaded_at"),
+)
+_REGISTER_BLOB = _REGISTER_BLOB.on_conflict_do_update(
+    index_elements=[UploadBlob.sha256],
+    set_={
+        "last_uploaded_at": _REGISTER_BLOB.excluded.last_uploaded_at,
+        "updated_at": _REGISTER_BLOB.excluded.last_uploaded_at,
+    },
+).returning(UploadBlob.path, UploadBlob.content_type, UploadBlob.derived_at)
+_MARK_DERIVED = (
+    update(UploadBlob)
+    .where(UploadBlob.sha256 == bindparam("blob_sha256"))
+    .values(derived_at=bindparam("stamp"))
+)
+_UNDERIVED_BLOBS = (
+    select(UploadBlob)
+    .where(
+        UploadBlob.derived_at.is_(None),
+        UploadBlob.content_type.in_(bindparam("content_types", expanding=True)),
+        UploadBlob.last_uploaded_at < bindparam("uploaded_before"),
+    )
+    .order_by(UploadBlob.last_uploaded_at.desc())
+    .limit(bindparam("batch_size"))
+)
+_LOCK_SESSION = (
+    select(UploadSession)
+    .where(UploadSession.id == bindparam("session_id"))
+    .with_for_update()
+    .execution_options(populate_existing=True)
+)
+_EXPIRED_SESSIONS = (
+    select(UploadSession)
+    .where(UploadSession.expires_at < bindparam("now"))
+    .order_by(UploadSession.expires_at)
+    .limit(bindparam("batch_size"))
+    .with_for_update(skip_locked=True)
+)
+_EXISTING_SESSIONS = select(UploadSession.id).where(
+    UploadSession.id.in_(bindparam("session_ids", expanding=True))
+)
+# Core insert: column defaults fill status, attempts and the timestamps
+_ENQUEUE_ANALYSES = (
+    pg_insert(DocumentAnalysis.__table__)
+    .from_select(
+        ["sha256"],
+        select(UploadBlob.sha256).where(
+            UploadBlob.sha256.in_(bindparam("digests", expanding=True))
+        ),
+    )
+    .on_conflict_do_nothing(index_elements=["sha256"])
+)
+_NEXT_PENDING_ANALYSIS = (
+    select(DocumentAnalysis, UploadBlob)
+    .join(UploadBlob, UploadBlob.sha256 == DocumentAnalysis.sha256)
+    .where(
+        DocumentAnalysis.status == DocumentAnalysisStatus.PENDING,
+        DocumentAnalysis.updated_at < bindparam("touched_before"),
+    )
+    .order_by(DocumentAnalysis.updated_at)
+    .limit(1)
+    .with_for_update(skip_locked=True, of=DocumentAnalysis)
+)
+# Verification photos checked against each other for reuse
+PHOTO_HASH_COLUMNS = (
+    ("worker", Worker.id, Worker.id_photo_url),
+    ("worker", Worker.id, Worker.selfie_url),
+    ("facility", Facility.id, Facility.id_photo_url),
+)
+
+
+def _photo_hashes():
+    return union_all(
+        *(
+            select(
+                literal(kind).label("kind"),
+                owner_id.label("owner_id"),
+                literal(column.key).label("field"),
+                DocumentAnalysis.sha256,
+                DocumentAnalysis.phash,
+            )
+            .join_from(
+                owner_id.class_,
+                DocumentAnalysis,
+                DocumentAnalysis.sha256 == func.substring(column, _DIGEST_IN_URL),
+            )
+            .where(column.like("%/uploads/%"), DocumentAnalysis.phash.is_not(None))
+            for kind, owner_id, column in PHOTO_HASH_COLUMNS
+        )
+    )
+
+
+_PHOTO_HASHES = _photo_hashes()
+# The upload a worker's resume_url points at, and whether resume_search was
+# built from something else
+_RESUME_DIGEST = func.substring(Worker.resume_url, _DIGEST_IN_URL)
+_RESUME_OUTDATED = Worker.resume_sha256.is_distinct_from(_RESUME_DIGEST)
+_ENQUEUE_RESUMES = (
+    pg_insert(DocumentAnalysis.__table__)
+    .from_select(
+        ["sha256"],
+        select(UploadBlob.sha256)
+        .join_from(Worker, UploadBlob, UploadBlob.sha256 == _RESUME_DIGEST)
+        # Workers sharing a resume repeat its digest; the conflict clause skips them
+        .where(_RESUME_OUTDATED),
+    )
+    .on_conflict_do_nothing(index_elements=["sha256"])
+)
+
+
+def _index_resumes():
+    # Workers whose resume was analysed (or failed, or removed) since it was indexed
+    outdated = (
+        select(
+            Worker.id,
+            _RESUME_DIGEST.label("digest"),
+            DocumentAnalysis.extracted_text,
+        )
+        .outerjoin(DocumentAnalysis, DocumentAnalysis.sha256 == _RESUME_DIGEST)
+        .where(
+            _RESUME_OUTDATED,
+            or_(
+                _RESUME_DIGEST.is_(None),
+                DocumentAnalysis.status.in_(
+                    [DocumentAnalysisStatus.DONE, DocumentAnalysisStatus.FAILED]
+                ),
+            ),
+        )
+        .limit(bindparam("batch_size"))
+        .subquery("outdated_resumes")
+    )
+    return (
+        update(Worker)
+        .where(Worker.id == outdated.c.id)
+        .values(
+            resume_sha256=outdated.c.digest,
+            # NULL when there is no text to search
+            resume_search=func.to_tsvector(RESUME_SEARCH_CONFIG, outdated.c.extracted_text),
+            # Background indexing isn't a profile edit
+            updated_at=Worker.updated_at,
+        )
+    )
+
+
+_INDEX_RESUMES = _index_resumes()
+
+
+def _live_upload_keys():
+    paths = bindparam("paths", expanding=True)
+    return union_all(
+        select(UploadBlob.sha256.label("key")).where(
+            UploadBlob.sha256.in_(bindparam("digests", expanding=True))
+        ),
+        *(
+            select(func.substring(column, _PATH_IN_URL).label("key")).where(
+                column.like("%/uploads/%"), func.substring(column, _PATH_IN_URL).in_(paths)
+            )
+            for column in UPLOAD_REFERENCE_COLUMNS
+        ),
+    )
+
+
+_LIVE_UPLOAD_KEYS = _live_upload_keys()
+_ADOPT_BLOB = (
+    pg_insert(UploadBlob)
+    .values(
+        sha256=bindparam("sha256"),
+        path=bindparam("path"),
+        content_type=bindparam("content_type"),
+        size_bytes=bindparam("size_bytes"),
+        last_uploaded_at=bindparam("uploaded_at"),
+    )
+    .on_conflict_do_nothing()
+)
+_CREATE_SCAN_CURSOR = (
+    pg_insert(UploadScanCursor.__table__)
+    .values(name=bindparam("name"))
+    .on_conflict_do_nothing(index_elements=["name"])
+)
+_CLAIM_SCAN_CURSOR = (
+    select(UploadScanCursor)
+    .where(UploadScanCursor.name == bindparam("name"))
+    .with_for_update(skip_locked=True)
+    .execution_options(populate_existing=True)
+)
+_UNREFERENCED_BLOBS = (
+    select(UploadBlob)
+    .where(
+        UploadBlob.ref_count == 0,
+        UploadBlob.last_uploaded_at < bindparam("uploaded_before"),
+    )
+    .order_by(UploadBlob.last_uploaded_at)
+    .limit(bindparam("batch_size"))
+    .with_for_update(skip_locked=True)
+)
+
+
+class UploadBlobRepository(SQLAlchemyRepository[UploadBlob]):
+    def __init__(self, session: Session):
+        super().__init__(UploadBlob, session)
+
+    def register(
+        self, sha256: str, path: str, content_type: str, size_bytes: int, uploaded_at: datetime
+    ) -> Row:
+        """Insert the blob, or mark an existing one as just uploaded again.
+
+        Takes the row lock, which keeps the GC off this blob until the
+        caller's transaction ends. Returns the stored row's ``path``,
+        ``content_type`` and ``derived_at``; an existing blob keeps the path
+        it was first stored under, whatever ``path`` says.
+        """
+        return self.session.execute(
+            _REGISTER_BLOB,
+            {
+                "sha256": sha256,
+                "path": path,
+                "content_type": content_type,
+                "size_bytes": size_bytes,
+                "uploaded_at": uploaded_at,
+            },
+        ).one()
+
+    def mark_derived(self, sha256: str, derived_at: datetime) -> None:
+        self.session.execute(_MARK_DERIVED, {"blob_sha256": sha256, "stamp": derived_at})
+
+    def underived(
+        self, content_types: Collection[str], uploaded_before: datetime, batch_size: int
+    ) -> List[UploadBlob]:
+        """Newest blobs of ``content_types`` still missing their derivatives."""
+        return self.session.execute(
+            _UNDERIVED_BLOBS,
+            {
+                "content_types": list(content_types),
+                "uploaded_before": uploaded_before,
+                "batch_size": batch_size,
+            },
+        ).scalars().all()
+
+    def recount_references(self) -> int:
+        """Set every ``ref_count`` from the URL columns; returns rows changed."""
+        return self.session.execute(_RECOUNT_REFERENCES).rowcount
+
+    def claim_unreferenced(self, uploaded_before: datetime, batch_size: int) -> List[UploadBlob]:
+        """Lock up to ``batch_size`` unreferenced blobs last uploaded before the cutoff."""
+        return self.session.execute(
+            _UNREFERENCED_BLOBS, {"uploaded_before": uploaded_before, "batch_size": batch_size}
+        ).scalars().all()
+
+    def live_keys(self, digests: Collection[str], paths: Collection[str]) -> Set[str]:
+        """Which of ``digests`` have a blob, and which ``paths`` a URL column refers to.
+
+        One statement for a whole batch of files found on disk.
+        """
+        if not digests and not paths:
+            return set()
+        return set(
+            self.session.execute(
+                _LIVE_UPLOAD_KEYS, {"digests": list(digests), "paths": list(paths)}
+            ).scalars()
+        )
+
+    def adopt(self, blobs: List[Dict[str, object]]) -> None:
+        """Insert rows for stored files that have none; existing rows are left alone.
+
+        Each dict has sha256, path, content_type, size_bytes and uploaded_at.
+        """
+        if blobs:
+            self.session.execute(_ADOPT_BLOB, blobs)
+
+
+class UploadScanCursorRepository(SQLAlchemyRepository[UploadScanCursor]):
+    def __init__(self, session: Session):
+        super().__init__(UploadScanCursor, session)
+
+    def claim(self, name: str) -> Optional[UploadScanCursor]:
+        """Lock the named cursor, creating it on first use.
+
+        Returns None while another process holds it, so only one process
+        scans at a time.
+        """
+        self.session.execute(_CREATE_SCAN_CURSOR, {"name": name})
+        return self.session.execute(_CLAIM_SCAN_CURSOR, {"name": name}).scalars().first()
+
+
+class UploadSessionRepository(SQLAlchemyRepository[UploadSession]):
+    def __init__(self, session: Session):
+        super().__init__(UploadSession, session)
+
+    def lock(self, session_id: UUID) -> Optional[UploadSession]:
+        """Row-lock the session, so chunks for it are appended one at a time."""
+        return self.session.execute(_LOCK_SESSION, {"session_id": session_id}).scalars().first()
+
+    def claim_expired(self, now: datetime, batch_size: int) -> List[UploadSession]:
+        return self.session.execute(
+            _EXPIRED_SESSIONS, {"now": now, "batch_size": batch_size}
+        ).scalars().all()
+
+    def existing_ids(self, session_ids: Collection[UUID]) -> Set[UUID]:
+        if not session_ids:
+            return set()
+        return set(
+            self.session.execute(
+                _EXISTING_SESSIONS, {"session_ids": list(session_ids)}
+            ).scalars()
+        )
+
+
+class DocumentAnalysisRepository(SQLAlchemyRepository[DocumentAnalysis]):
+    def __init__(self, session: Session):
+        super().__init__(DocumentAnalysis, session)
+
+    def enqueue(self, digests: Collection[str]) -> int:
+        """Queue analysis of the stored blobs among ``digests``; returns rows added.
+
+        Blobs already queued or analysed are left alone.
+        """
+        if not digests:
+            return 0
+        return self.session.execute(
+            _ENQUEUE_ANALYSES, {"digests": list(digests)}
+        ).rowcount
+
+    def claim_next(
+        self, touched_before: datetime
+    ) -> Optional[Tuple[DocumentAnalysis, UploadBlob]]:
+        """Lock the longest-waiting pending analysis no other worker holds, with its blob."""
+        row = self.session.execute(
+            _NEXT_PENDING_ANALYSIS, {"touched_before": touched_before}
+        ).first()
+        return (row[0], row[1]) if row else None
+
+    def photo_hashes(self):
+        """``(kind, owner_id, field, sha256, phash)`` for every hashed verification photo."""
+        return self.session.execute(_PHOTO_HASHES).all()
+
+    def enqueue_resumes(self) -> int:
+        """Queue analysis of resumes uploaded since their worker was last indexed."""
+        return self.session.execute(_ENQUEUE_RESUMES).rowcount
+
+    def index_resumes(self, batch_size: int) -> int:
+        """Rebuild ``resume_search`` for up to ``batch_size`` workers whose resume text is ready.
+
+        Returns workers updated.
+        """
+        return self.session.execute(_INDEX_RESUMES, {"batch_size": batch_size}).rowcount
+
+    def for_digests(self, digests: Collection[str]) -> List[DocumentAnalysis]:
+        if not digests:
+            return []
+        stmt = select(DocumentAnalysis).where(DocumentAnalysis.sha256.in_(list(digests)))
+        return self.session.execute(stmt).scalars().all()
@@ -2,26 +2,112 @@
 
 from __future__ import annotations
 
-from typing import Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
 
-from sqlalchemy import func, select, update
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, delete, func, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
 
-from app.models import AuthAuditLog, RefreshToken, User
+from app.models import AuthAuditLog, RefreshToken, RevokedToken, User, normalize_email
 from .base import SQLAlchemyRepository
 
+# Hot lookups built once; see workers.py.
+# users.email is stored lowercase (ck_users_email_lowercase), so normalizing
+# the argument lets the lookup use the unique index instead of a scan
+_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+_REFRESH_TOKEN_BY_HASH = select(RefreshToken).where(
+    RefreshToken.token_hash == bindparam("token_hash")
+)
+
+
+def _with_live_predecessors(seed):
+    """Extend ``seed`` rows with the tokens they replaced, while still live.
+
+    A refresh token rotated less than an access-token lifetime ago was issued
+    alongside an access token that may still be in use, so revoking a session
+    has to revoke those ids too.
+    """
+    chain = seed.cte("revoked_chain", recursive=True)
+    predecessor = aliased(RefreshToken)
+    chain = chain.union(
+        select(predecessor.id, predecessor.revoked_at)
+        .join(chain, predecessor.replaced_by_token_id == chain.c.id)
+        .where(predecessor.revoked_at >= bindparam("live_since"))
+    )
+    return select(chain.c.id, chain.c.revoked_at)
+
+
+_REVOKED_SESSION_SEED = select(RefreshToken.id, RefreshToken.revoked_at).where(
+    RefreshToken.revoked_at >= bindparam("revoked_since"),
+    RefreshToken.revoked_reason.is_distinct_from("rotated"),
+)
+_REVOKED_SESSIONS = _with_live_predecessors(_REVOKED_SESSION_SEED)
+_REVOKED_SESSION = _with_live_predecessors(
+    _REVOKED_SESSION_SEED.where(RefreshToken.id == bindparam("token_id"))
+)
+# Every session of a user: open ones are closed, and the ids of those closed
+# less than an access-token lifetime ago come back too, since their access
+# tokens may still be live
+_REVOKE_USER_SESSIONS = (
+    update(RefreshToken)
+    .where(
+        RefreshToken.user_id == bindparam("owner_id"),
+        or_(RefreshToken.revoked_at.is_(None), RefreshToken.revoked_at >= bindparam("live_since")),
+    )
+    .values(
+        revoked_at=func.coalesce(RefreshToken.revoked_at, bindparam("revoked_now")),
+        revoked_reason=func.coalesce(RefreshToken.revoked_reason, bindparam("reason")),
+    )
+    .returning(RefreshToken.id)
+)
+_PURGEABLE_REFRESH_TOKENS = (
+    select(RefreshToken.id)
+    .where(
+        or_(
+            RefreshToken.expires_at < bindparam("now"),
+            RefreshToken.revoked_at < bindparam("revoked_before"),
+        )
+    )
+    .limit(bindparam("batch_size"))
+    .with_for_update(skip_locked=True)
+)
+_PURGE_REFRESH_TOKENS = delete(RefreshToken).where(
+    RefreshToken.id.in_(_PURGEABLE_REFRESH_TOKENS.scalar_subquery())
+)
+# Revocations that don't live on a refresh token (the user row is gone)
+_ADD_REVOKED_TOKENS = pg_insert(RevokedToken).on_conflict_do_nothing(index_elements=["jti"])
+_REVOKED_TOKENS = select(RevokedToken.jti, RevokedToken.expires_at).where(
+    RevokedToken.revoked_at >= bindparam("revoked_since"),
+    RevokedToken.expires_at > bindparam("now"),
+)
+_PURGE_REVOKED_TOKENS = delete(RevokedToken).where(RevokedToken.expires_at <= bindparam("now"))
+_SET_LAST_LOGIN = (
+    update(User).where(User.id == bindparam("user_id")).values(last_login_at=func.now())
+)
+_SET_LAST_LOGIN_AND_PASSWORD = _SET_LAST_LOGIN.values(
+    hashed_password=bindparam("hashed_password")
+)
+
 
 class UserRepository(SQLAlchemyRepository[User]):
     def __init__(self, session: Session):
         super().__init__(User, session)
 
     def get_by_email(self, email: str) -> Optional[User]:
-        stmt = select(User).where(func.lower(User.email) == func.lower(email))
-        return self.session.execute(stmt).scalars().first()
+        return self.session.execute(
+            _USER_BY_EMAIL, {"email": normalize_email(email)}
+        ).scalars().first()
 
-    def set_last_login(self, user: User) -> None:
+    def set_last_login(self, user: User, rehashed_password: Optional[str] = None) -> None:
+        """Stamp the login, swapping in an upgraded password hash in the same UPDATE."""
+        if rehashed_password is None:
+            self.session.execute(_SET_LAST_LOGIN, {"user_id": user.id})
+            return
         self.session.execute(
-            update(User).where(User.id == user.id).values(last_login_at=func.now())
+            _SET_LAST_LOGIN_AND_PASSWORD,
+            {"user_id": user.id, "hashed_password": rehashed_password},
         )
 
 
@@ -30,11 +116,86 @@ class RefreshTokenRepository(SQLAlchemyRepository[RefreshToken]):
         super().__init__(RefreshToken, session)
 
     def get_by_hash(self, token_hash: str) -> Optional[RefreshToken]:
-        stmt = select(RefreshToken).where(RefreshToken.token_hash == token_hash)
-        return self.session.execute(stmt).scalars().first()
+        return self.session.execute(
+            _REFRESH_TOKEN_BY_HASH, {"token_hash": token_hash}
+        ).scalars().first()
+
+    def revoked_sessions(
+        self,
+        revoked_since: datetime,
+        live_since: datetime,
+        token_id: Optional[UUID] = None,
+    ) -> List[Tuple[UUID, datetime]]:
+        """``(id, revoked_at)`` of tokens revoked (not rotated) since ``revoked_since``.
+
+        Includes the tokens each one replaced that were rotated after
+        ``live_since``. Pass ``token_id`` to look at a single session.
+        """
+        params = {"revoked_since": revoked_since, "live_since": live_since}
+        if token_id is None:
+            return self.session.execute(_REVOKED_SESSIONS, params).all()
+        return self.session.execute(_REVOKED_SESSION, {**params, "token_id": token_id}).all()
+
+    def revoke_user_sessions(
+        self, user_id: UUID, now: datetime, live_since: datetime, reason: str
+    ) -> List[UUID]:
+        """Revoke every open session of ``user_id``; the caller commits.
+
+        Returns the ids whose access tokens may still be live: those just
+        revoked and those revoked or rotated since ``live_since``.
+        """
+        return self.session.execute(
+            _REVOKE_USER_SESSIONS,
+            {"owner_id": user_id, "revoked_now": now, "live_since": live_since, "reason": reason},
+            execution_options={"synchronize_session": False},
+        ).scalars().all()
+
+    def add_revoked_tokens(
+        self, token_ids: Sequence[UUID], now: datetime, expires_at: datetime
+    ) -> None:
+        """Record ``token_ids`` in ``revoked_tokens``; the caller commits."""
+        if not token_ids:
+            return
+        self.session.execute(
+            _ADD_REVOKED_TOKENS,
+            [
+                {"jti": token_id, "revoked_at": now, "expires_at": expires_at}
+                for token_id in token_ids
+            ],
+        )
+
+    def revoked_tokens(self, revoked_since: datetime, now: datetime) -> List[Tuple[UUID, datetime]]:
+        """``(jti, expires_at)`` recorded since ``revoked_since`` and not yet expired."""
+        return self.session.execute(
+            _REVOKED_TOKENS, {"revoked_since": revoked_since, "now": now}
+        ).all()
+
+    def purge_revoked_tokens(self, now: datetime) -> int:
+        """Delete ``revoked_tokens`` rows whose access tokens have all expired."""
+        result = self.session.execute(
+            _PURGE_REVOKED_TOKENS,
+            {"now": now},
+            execution_options={"synchronize_session": False},
+        )
+        return result.rowcount
+
+    def purge_batch(self, now: datetime, revoked_before: datetime, batch_size: int) -> int:
+        """Delete up to ``batch_size`` expired or long-revoked tokens; returns the count.
+
+        Rows locked by a concurrent purge are skipped rather than waited on.
+        """
+        result = self.session.execute(
+            _PURGE_REFRESH_TOKENS,
+            {"now": now, "revoked_before": revoked_before, "batch_size": batch_size},
+            execution_options={"synchronize_session": False},
+        )
+        return result.rowcount
 
 
 class AuthAuditLogRepository(SQLAlchemyRepository[AuthAuditLog]):
     def __init__(self, session: Session):
         super().__init__(AuthAuditLog, session)
 
+    def insert_many(self, rows: Sequence[Dict[str, Any]]) -> None:
+        """Insert audit rows; SQLAlchemy sends them as multi-row INSERT ... VALUES."""
+        self.session.execute(insert(AuthAuditLog), list(rows))
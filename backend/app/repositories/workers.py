@@ -2,14 +2,12 @@
 
 from __future__ import annotations
 
-from typing import List, Optional, Tuple
+from typing import Iterable, List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import bindparam, func, select, update
 from sqlalchemy.orm import Session, joinedload
 
-from app.models.base_model import Endorsement
-
 from ..models import (
     Experience,
     SafetyCheck,
@@ -20,6 +18,38 @@ from ..models import (
 from app.schemas import PaginationParams, WorkerFilter
 from .base import SQLAlchemyRepository
 
+# rank_score gained (or lost) per endorsement
+ENDORSEMENT_RANK_DELTA = 1
+
+# Hot lookups are built once at import time. Executing the same statement
+# object lets SQLAlchemy reuse its memoized cache key and compiled SQL instead
+# of rebuilding and re-hashing a select() on every call.
+_WORKER_WITH_PROFILE = select(Worker).options(
+    joinedload(Worker.user),
+    joinedload(Worker.experiences),
+)
+_WORKER_BY_ID = _WORKER_WITH_PROFILE.where(Worker.id == bindparam("worker_id"))
+_WORKER_BY_USER_ID = _WORKER_WITH_PROFILE.where(Worker.user_id == bindparam("user_id"))
+_WORKER_ID_BY_USER_ID = select(Worker.id).where(Worker.user_id == bindparam("user_id"))
+_EXPERIENCES_FOR_WORKER = select(Experience).where(
+    Experience.worker_id == bindparam("worker_id")
+)
+_EXPERIENCE_FOR_WORKER = _EXPERIENCES_FOR_WORKER.where(
+    Experience.id == bindparam("experience_id")
+)
+_CREDENTIALS_FOR_WORKER = select(WorkerCredential).where(
+    WorkerCredential.worker_id == bindparam("worker_id")
+)
+_CREDENTIAL_FOR_WORKER = _CREDENTIALS_FOR_WORKER.where(
+    WorkerCredential.id == bindparam("credential_id")
+)
+_SAFETY_CHECKS_FOR_WORKER = select(SafetyCheck).where(
+    SafetyCheck.worker_id == bindparam("worker_id")
+)
+_SAFETY_CHECK_FOR_TIER = _SAFETY_CHECKS_FOR_WORKER.where(
+    SafetyCheck.tier == bindparam("tier")
+)
+
 
 class WorkerRepository(SQLAlchemyRepository[Worker]):
     def __init__(self, session: Session):
@@ -36,90 +66,105 @@ class WorkerRepository(SQLAlchemyRepository[Worker]):
         if filters.education_level:
             stmt = stmt.where(Worker.education_level == filters.education_level)
         if filters.has_endorsements is not None:
-            endorsement_exists = (
-                select(Endorsement.id)
-                .where(Endorsement.worker_id == Worker.id)
-                .exists()
-            )
             if filters.has_endorsements:
-                stmt = stmt.where(endorsement_exists)
+                stmt = stmt.where(Worker.endorsement_count > 0)
             else:
-                stmt = stmt.where(~endorsement_exists)
+                stmt = stmt.where(Worker.endorsement_count == 0)
         total_stmt = select(func.count()).select_from(stmt.subquery())
         total = self.session.execute(total_stmt).scalar_one()
-        query = stmt
+        query = stmt.order_by(
+            Worker.rank_score.desc(), Worker.last_active_at.desc().nulls_last(), Worker.id
+        )
         if params:
             query = query.offset(params.offset).limit(params.limit)
         workers = self.session.execute(query).scalars().all()
         return workers, total
 
     def get_worker(self, worker_id: UUID) -> Optional[Worker]:
-        stmt = select(Worker).where(Worker.id == worker_id).options(
-            joinedload(Worker.user),
-            joinedload(Worker.experiences)
-        )
-        return self.session.execute(stmt).scalars().first()
+        return self.session.execute(_WORKER_BY_ID, {"worker_id": worker_id}).scalars().first()
 
     def get_by_user_id(self, user_id: UUID) -> Optional[Worker]:
-        stmt = select(Worker).where(Worker.user_id == user_id).options(
-            joinedload(Worker.user),
-            joinedload(Worker.experiences)
-        )
-        return self.session.execute(stmt).scalars().first()
+        return self.session.execute(_WORKER_BY_USER_ID, {"user_id": user_id}).scalars().first()
 
-    def add_experience(self, worker_id: UUID, payload: dict) -> Experience:
-        obj = Experience(worker_id=worker_id, **payload)
-        self.session.add(obj)
-        self.session.commit()
-        self.session.refresh(obj)
-        return obj
+    def id_for_user(self, user_id: UUID) -> Optional[UUID]:
+        return self.session.execute(_WORKER_ID_BY_USER_ID, {"user_id": user_id}).scalar()
 
-    def list_experiences(self, worker_id: UUID) -> List[Experience]:
-        stmt = select(Experience).where(Experience.worker_id == worker_id)
-        return self.session.execute(stmt).scalars().all()
+    def add_experience(self, worker_id: UUID, payload: dict) -> Experience:
+        return self.insert_returning({"worker_id": worker_id, **payload}, model=Experience)
 
-    def get_experience(self, worker_id: UUID, experience_id: UUID) -> Optional[Experience]:
-        stmt = select(Experience).where(
+    def update_experience(
+        self, worker_id: UUID, experience_id: UUID, payload: dict
+    ) -> Optional[Experience]:
+        return self.update_returning(
             Experience.worker_id == worker_id,
             Experience.id == experience_id,
+            values=payload,
+            model=Experience,
         )
-        return self.session.execute(stmt).scalars().first()
+
+    def list_experiences(self, worker_id: UUID) -> List[Experience]:
+        return self.session.execute(
+            _EXPERIENCES_FOR_WORKER, {"worker_id": worker_id}
+        ).scalars().all()
+
+    def get_experience(self, worker_id: UUID, experience_id: UUID) -> Optional[Experience]:
+        return self.session.execute(
+            _EXPERIENCE_FOR_WORKER, {"worker_id": worker_id, "experience_id": experience_id}
+        ).scalars().first()
 
     def delete_experience(self, experience: Experience) -> None:
         self.session.delete(experience)
 
     def add_credential(self, worker_id: UUID, payload: dict) -> WorkerCredential:
-        obj = WorkerCredential(worker_id=worker_id, **payload)
-        self.session.add(obj)
-        self.session.flush()
-        return obj
+        return self.insert_returning({"worker_id": worker_id, **payload}, model=WorkerCredential)
 
     def list_credentials(self, worker_id: UUID) -> List[WorkerCredential]:
-        stmt = select(WorkerCredential).where(WorkerCredential.worker_id == worker_id)
-        return self.session.execute(stmt).scalars().all()
+        return self.session.execute(
+            _CREDENTIALS_FOR_WORKER, {"worker_id": worker_id}
+        ).scalars().all()
 
     def get_credential(self, worker_id: UUID, credential_id: UUID) -> Optional[WorkerCredential]:
-        stmt = select(WorkerCredential).where(
-            WorkerCredential.worker_id == worker_id,
-            WorkerCredential.id == credential_id,
-        )
-        return self.session.execute(stmt).scalars().first()
+        return self.session.execute(
+            _CREDENTIAL_FOR_WORKER, {"worker_id": worker_id, "credential_id": credential_id}
+        ).scalars().first()
 
     def add_safety_check(self, worker_id: UUID, payload: dict) -> SafetyCheck:
-        obj = SafetyCheck(worker_id=worker_id, **payload)
-        self.session.add(obj)
-        self.session.flush()
-        return obj
+        return self.insert_returning({"worker_id": worker_id, **payload}, model=SafetyCheck)
+
+    def upsert_safety_check(self, worker_id: UUID, payload: dict) -> SafetyCheck:
+        """Create or replace the worker's check for ``payload["tier"]``."""
+        return self.upsert_returning(
+            {"worker_id": worker_id, **payload},
+            constraint="uq_worker_tier_once",
+            update_columns=[key for key in payload if key != "tier"],
+            model=SafetyCheck,
+        )
+
+    def adjust_endorsement_stats(self, worker_ids: Iterable[UUID], delta: int) -> None:
+        """Add ``delta`` endorsements to each worker, updating rank_score to match."""
+        worker_ids = list(worker_ids)
+        if not worker_ids or not delta:
+            return
+        self.session.execute(
+            update(Worker)
+            .where(Worker.id.in_(worker_ids))
+            .values(
+                endorsement_count=Worker.endorsement_count + delta,
+                rank_score=Worker.rank_score + delta * ENDORSEMENT_RANK_DELTA,
+            )
+        )
+
+    def update_worker(self, worker_id: UUID, payload: dict) -> Optional[Worker]:
+        return self.update_returning(Worker.id == worker_id, values=payload)
 
     def list_safety_checks(self, worker_id: UUID) -> List[SafetyCheck]:
-        stmt = select(SafetyCheck).where(SafetyCheck.worker_id == worker_id)
-        return self.session.execute(stmt).scalars().all()
+        return self.session.execute(
+            _SAFETY_CHECKS_FOR_WORKER, {"worker_id": worker_id}
+        ).scalars().all()
 
     def get_safety_check_by_tier(
         self, worker_id: UUID, tier: SafetyTier
     ) -> Optional[SafetyCheck]:
-        stmt = select(SafetyCheck).where(
-            SafetyCheck.worker_id == worker_id,
-            SafetyCheck.tier == tier,
-        )
-        return self.session.execute(stmt).scalars().first()
+        return self.session.execute(
+            _SAFETY_CHECK_FOR_TIER, {"worker_id": worker_id, "tier": tier}
+        ).scalars().first()
@@ -12,6 +12,8 @@ from .jobs import (
     JobApplicationCreate,
     JobApplicationRead,
     JobApplicationUpdate,
+    JobApplicationStatusChange,
+    JobApplicationStatusBatch,
     JobApplication,
 )
 from .endorsement import EndorsementCreate, EndorsementUpdate, EndorsementRead
@@ -25,6 +27,14 @@ from .auth import (
     VerificationSubmit,
     VerificationResponse,
 )
+from .bulk_import import (
+    BulkImportFormat,
+    BulkImportKind,
+    BulkImportReport,
+    BulkImportRowError,
+    FacilityImportRow,
+    WorkerImportRow,
+)
 
 """Import helper"""
 
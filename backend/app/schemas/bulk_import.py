@@ -0,0 +1,47 @@
+"""Bulk import DTOs."""
+
+from __future__ import annotations
+
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel, SecretStr
+
+from .auth import FacilityRegistrationRequest, WorkerRegistrationRequest
+
+
+class BulkImportKind(str, Enum):
+    WORKERS = "workers"
+    FACILITIES = "facilities"
+    JOB_POSTS = "job_posts"
+
+
+class BulkImportFormat(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class WorkerImportRow(WorkerRegistrationRequest):
+    """Registration payload where the password may be issued later."""
+
+    password: Optional[SecretStr] = None
+
+
+class FacilityImportRow(FacilityRegistrationRequest):
+    """Registration payload where the password may be issued later."""
+
+    password: Optional[SecretStr] = None
+
+
+class BulkImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+
+class BulkImportReport(BaseModel):
+    kind: BulkImportKind
+    dry_run: bool
+    total_rows: int
+    inserted: int
+    rejected: int
+    errors: List[BulkImportRowError] = []
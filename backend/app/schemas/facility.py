@@ -2,13 +2,14 @@
 """Facility pydantic schemas"""
 
 from __future__ import annotations
-from pydantic import BaseModel, EmailStr, HttpUrl, field_validator
+from pydantic import BaseModel, EmailStr, HttpUrl, computed_field, field_validator
 from typing import Optional, List
 from uuid import UUID
 from datetime import datetime
 from app.models.base_model import Industry
 
 from app.models.base_model import Industry, FacilityCertificationCode, VerificationStatus
+from app.core.images import derivative_url
 
 # Address schemas
 from uuid import UUID
@@ -117,6 +118,12 @@ class FacilityRead(BaseModel):
     updated_at: datetime
     certifications: List[FacilityCertificationRead] = []
 
+    # List rows show avatars; point them at the small derivative
+    @computed_field
+    @property
+    def profile_image_thumb_url(self) -> Optional[str]:
+        return derivative_url(self.profile_image_url, "thumb")
+
     class Config:
         from_attributes = True
 
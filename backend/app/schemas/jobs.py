@@ -4,7 +4,7 @@
 from datetime import datetime
 from typing import Optional, List
 from uuid import UUID
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl
 from enum import Enum
 
 # Enum, list of selections
@@ -110,6 +110,13 @@ class JobApplicationUpdate(BaseModel):
     email: Optional[str] = None
     status: Optional[str] = None
 
+class JobApplicationStatusChange(BaseModel):
+    application_id: UUID
+    status: ApplicationStatus
+
+class JobApplicationStatusBatch(BaseModel):
+    updates: List[JobApplicationStatusChange] = Field(min_length=1, max_length=500)
+
 class JobApplicationRead(JobApplicationBase):
     id: UUID
     job_post_id: UUID
@@ -2,12 +2,13 @@
 """Pydantic schema for worker model"""
 
 from __future__ import annotations
-from pydantic import BaseModel, EmailStr, HttpUrl
+from pydantic import BaseModel, EmailStr, HttpUrl, computed_field
 from typing import Optional, List
 from uuid import UUID
 from datetime import datetime, date
 from ..models.base_model import WorkerTitle, EducationLevel, VerificationStatus
 from ..core import PuertoRicoMunicipality
+from ..core.images import derivative_url
 
 # Creates input
 class WorkerCreate(BaseModel):
@@ -56,10 +57,17 @@ class WorkerRead(BaseModel):
     selfie_url: Optional[str] = None
     id_photo_url: Optional[str] = None
     verification_submitted_at: Optional[datetime] = None
+    endorsement_count: int = 0
     created_at: datetime
     updated_at: datetime
     experiences: List[dict] = []
 
+    # List rows show avatars; point them at the small derivative
+    @computed_field
+    @property
+    def profile_image_thumb_url(self) -> Optional[str]:
+        return derivative_url(self.profile_image_url, "thumb")
+
     class Config:
         from_attributes = True   # Object relational mapping mode
 
@@ -5,6 +5,10 @@ from .facilities_service import FacilitiesService
 from .jobs_service import JobsService
 from .endorsements_service import EndorsementsService
 from .auth_service import AuthService
+from .bulk_import_service import BulkImportService
+from .refresh_token_service import RefreshTokenService
+from .upload_service import UploadService
+from .document_processing import DocumentProcessingService
 
 __all__ = [
     "WorkersService",
@@ -12,4 +16,8 @@ __all__ = [
     "JobsService",
     "EndorsementsService",
     "AuthService",
+    "BulkImportService",
+    "RefreshTokenService",
+    "UploadService",
+    "DocumentProcessingService",
 ]
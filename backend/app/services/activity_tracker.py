@@ -0,0 +1,180 @@
+"""Buffered last-login and last-active stamps, and the recency score built on them.
+
+Logins used to stamp ``users.last_login_at`` with an UPDATE inside the login
+transaction. Logins, and every authenticated request made by a worker or a
+facility, now call :meth:`ActivityTracker.record`. That only keeps the latest
+time per id in memory, so repeated events for the same id between flushes
+cost nothing extra. :meth:`ActivityTracker.flush` runs every
+``ACTIVITY_FLUSH_SECONDS`` from the app lifespan and once more on shutdown.
+It writes each kind of id in one ``UPDATE ... FROM (VALUES ...)``.
+
+Recorded stamps also stay in a bounded in-memory LRU, so ranking code can ask
+for :meth:`ActivityTracker.recency` without a query. The score is 1.0 for
+"active now" and halves for every ``ACTIVITY_RECENCY_HALF_LIFE_HOURS`` of
+inactivity; never seen scores 0.0.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple, Type
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.metrics import metrics
+from app.core.settings import get_settings
+from app.db import get_session_factory
+from app.repositories import FacilityRepository, UserRepository, WorkerRepository
+from app.repositories.base import SQLAlchemyRepository
+
+# kind -> (repository, timestamp column it maintains)
+ACTIVITY_COLUMNS: Dict[str, Tuple[Type[SQLAlchemyRepository], str]] = {
+    "user": (UserRepository, "last_login_at"),
+    "worker": (WorkerRepository, "last_active_at"),
+    "facility": (FacilityRepository, "last_active_at"),
+}
+
+
+def recency_score(last_seen: Optional[datetime], now: datetime, half_life: timedelta) -> float:
+    """Exponential decay of ``now - last_seen``: 1.0 when fresh, 0.5 after ``half_life``."""
+    if last_seen is None:
+        return 0.0
+    age = (now - last_seen).total_seconds()
+    if age <= 0:
+        return 1.0
+    return 0.5 ** (age / half_life.total_seconds())
+
+
+class ActivityTracker:
+    """Coalesces activity stamps in memory and writes them in bulk."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        half_life: timedelta,
+        max_entries: int,
+    ):
+        self.session_factory = session_factory
+        self.half_life = half_life
+        self.max_entries = max_entries
+        self._pending: Dict[str, Dict[UUID, datetime]] = self._empty()
+        self._seen: "OrderedDict[Tuple[str, UUID], datetime]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Keeps a slow flush and the next scheduled one from interleaving
+        self._flush_lock = threading.Lock()
+
+        self.recorded = metrics.counter("activity.recorded")
+        self.written = metrics.counter("activity.written")
+        self.flush_errors = metrics.counter("activity.flush_errors")
+        self.flush_time = metrics.timing("activity.flush")
+        metrics.callback_gauge("activity.pending", self.pending_count)
+
+    @staticmethod
+    def _empty() -> Dict[str, Dict[UUID, datetime]]:
+        return {kind: {} for kind in ACTIVITY_COLUMNS}
+
+    def pending_count(self) -> int:
+        return sum(len(stamps) for stamps in self._pending.values())
+
+    # ------------------------------------------------------------------
+    # Producers
+    # ------------------------------------------------------------------
+    def record(self, kind: str, entity_id: Optional[UUID], at: Optional[datetime] = None) -> None:
+        """Note that ``entity_id`` was active at ``at`` (default: now, UTC)."""
+        if entity_id is None:
+            return
+        at = at or datetime.utcnow()
+        with self._lock:
+            pending = self._pending[kind]
+            previous = pending.get(entity_id)
+            if previous is None or at > previous:
+                pending[entity_id] = at
+            self._remember(kind, entity_id, at)
+        self.recorded.inc()
+
+    def _remember(self, kind: str, entity_id: UUID, at: datetime) -> None:
+        key = (kind, entity_id)
+        previous = self._seen.pop(key, None)
+        self._seen[key] = at if previous is None or at > previous else previous
+        while len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Readers
+    # ------------------------------------------------------------------
+    def last_seen(self, kind: str, entity_id: UUID) -> Optional[datetime]:
+        with self._lock:
+            return self._seen.get((kind, entity_id))
+
+    def recency(
+        self,
+        kind: str,
+        entity_id: UUID,
+        stored: Optional[datetime] = None,
+        now: Optional[datetime] = None,
+    ) -> float:
+        """Recency score for ``entity_id``.
+
+        Pass the row's stored ``last_active_at`` as ``stored`` to cover ids
+        this process hasn't seen since it started; the later of the two wins.
+        """
+        seen = self.last_seen(kind, entity_id)
+        if stored is not None and (seen is None or stored > seen):
+            seen = stored
+        return recency_score(seen, now or datetime.utcnow(), self.half_life)
+
+    # ------------------------------------------------------------------
+    # Writer
+    # ------------------------------------------------------------------
+    def flush(self) -> int:
+        """Write everything recorded since the last flush; returns rows changed."""
+        with self._flush_lock:
+            with self._lock:
+                batches, self._pending = self._pending, self._empty()
+            if not any(batches.values()):
+                return 0
+            started = time.perf_counter()
+            session = self.session_factory()
+            try:
+                changed = 0
+                for kind, stamps in batches.items():
+                    repository, column_name = ACTIVITY_COLUMNS[kind]
+                    changed += repository(session).advance_timestamps(column_name, stamps)
+                session.commit()
+            except Exception:
+                session.rollback()
+                self.flush_errors.inc()
+                self._requeue(batches)
+                raise
+            finally:
+                session.close()
+            self.flush_time.observe(time.perf_counter() - started)
+            self.written.inc(changed)
+            return changed
+
+    def _requeue(self, batches: Dict[str, Dict[UUID, datetime]]) -> None:
+        # Merge back under anything recorded meanwhile so the next flush retries
+        with self._lock:
+            for kind, stamps in batches.items():
+                pending = self._pending[kind]
+                for entity_id, at in stamps.items():
+                    previous = pending.get(entity_id)
+                    if previous is None or at > previous:
+                        pending[entity_id] = at
+
+
+@lru_cache()
+def get_activity_tracker() -> ActivityTracker:
+    """Return the process-wide activity tracker."""
+
+    settings = get_settings()
+    return ActivityTracker(
+        get_session_factory(),
+        half_life=timedelta(hours=settings.activity_recency_half_life_hours),
+        max_entries=settings.activity_max_entries,
+    )
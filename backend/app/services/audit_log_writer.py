@@ -0,0 +1,185 @@
+"""Buffered writer for ``auth_audit_logs``.
+
+Audit rows used to be inserted inside the register/login transaction, adding
+an INSERT (and its index updates) to the hottest endpoints. Routine events
+are now handed to this writer after the request commits and written by a
+background thread in multi-row inserts, flushed when ``batch_size`` rows are
+waiting or ``flush_interval`` seconds after the first one arrived.
+
+Event types listed in ``AUDIT_LOG_SYNC_EVENTS`` (logouts and other
+security-relevant events by default; ``*`` for all) bypass the buffer and
+are written in the request transaction as before. A full buffer or a stopped
+writer also falls back to writing inline, so events are never dropped for
+lack of space. On shutdown the buffer is drained before the process exits.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Collection, Dict, List, Optional, Sequence
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.metrics import metrics
+from app.core.settings import get_settings
+from app.db import get_session_factory
+from app.models import AuthEventType
+from app.repositories import AuthAuditLogRepository
+
+logger = logging.getLogger(__name__)
+
+AuditRow = Dict[str, Any]
+
+_STOP = object()
+
+
+class AuditLogWriter:
+    """Background thread that batches audit rows into multi-row inserts."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        sync_events: Collection[str],
+        batch_size: int,
+        flush_interval: float,
+        max_queue: int,
+    ):
+        self.session_factory = session_factory
+        self.sync_all = "*" in sync_events
+        self.sync_events = frozenset(sync_events)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.written = metrics.counter("auth.audit.written")
+        self.dropped = metrics.counter("auth.audit.dropped")
+        self.inline = metrics.counter("auth.audit.inline_fallback")
+        self.flush_time = metrics.timing("auth.audit.flush")
+        metrics.callback_gauge("auth.audit.queue_depth", self._queue.qsize)
+
+    def is_synchronous(self, event_type: AuthEventType) -> bool:
+        """Whether events of this type must be written in the request transaction."""
+        return self.sync_all or event_type.value in self.sync_events
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="audit-log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush everything queued so far and stop the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    # ------------------------------------------------------------------
+    # Producers
+    # ------------------------------------------------------------------
+    def submit(self, rows: Sequence[AuditRow]) -> None:
+        """Queue committed events; writes inline if the writer can't take them."""
+        if self._thread is None:
+            self.inline.inc(len(rows))
+            self._write(rows)
+            return
+        for index, row in enumerate(rows):
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self.inline.inc(len(rows) - index)
+                self._write(rows[index:])
+                return
+
+    # ------------------------------------------------------------------
+    # Consumer
+    # ------------------------------------------------------------------
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[AuditRow] = []
+            item = self._queue.get()
+            if item is _STOP:
+                stopping = True
+            else:
+                batch.append(item)
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+            if stopping:
+                # Pick up anything submitted while shutting down
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not _STOP:
+                        batch.append(item)
+            for start in range(0, len(batch), self.batch_size):
+                self._write(batch[start : start + self.batch_size])
+
+    def _write(self, rows: Sequence[AuditRow]) -> None:
+        if not rows:
+            return
+        started = time.perf_counter()
+        try:
+            self._insert(rows)
+        except SQLAlchemyError:
+            # One bad row (say, its user deleted meanwhile) must not sink the batch
+            for row in rows:
+                try:
+                    self._insert([row])
+                except SQLAlchemyError:
+                    self.dropped.inc()
+                    logger.exception("Dropping audit event %s", row.get("event_type"))
+        self.flush_time.observe(time.perf_counter() - started)
+
+    def _insert(self, rows: Sequence[AuditRow]) -> None:
+        session = self.session_factory()
+        try:
+            AuthAuditLogRepository(session).insert_many(rows)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        self.written.inc(len(rows))
+
+
+@lru_cache()
+def get_audit_log_writer() -> AuditLogWriter:
+    """Return the process-wide audit log writer."""
+
+    settings = get_settings()
+    return AuditLogWriter(
+        get_session_factory(),
+        sync_events=settings.audit_log_sync_events,
+        batch_size=settings.audit_log_batch_size,
+        flush_interval=settings.audit_log_flush_interval_ms / 1000,
+        max_queue=settings.audit_log_queue_size,
+    )
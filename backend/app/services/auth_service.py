@@ -5,14 +5,16 @@ from __future__ import annotations
 import datetime as dt
 import hashlib
 import secrets
-from typing import Optional, Tuple
-from uuid import UUID
+from typing import List, Optional, Tuple
+from uuid import UUID, uuid4
 
 import jwt
 from fastapi import HTTPException, status
-from passlib.context import CryptContext
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
+from app.core.passwords import PasswordHasher, PasswordHasherBusyError, get_password_hasher
+from app.core.security import get_token_cache
 from app.core.settings import Settings, get_settings
 from app.models import (
     AuthAuditLog,
@@ -32,32 +34,60 @@ from app.schemas import (
     TokenPair,
     WorkerRegistrationRequest,
 )
+from .activity_tracker import ActivityTracker, get_activity_tracker
+from .audit_log_writer import AuditLogWriter, AuditRow, get_audit_log_writer
+from .refresh_token_service import RefreshTokenService
 
 
 class AuthService:
     """Service encapsulating password hashing, token minting and auditing."""
 
-    def __init__(self, session: Session, settings: Optional[Settings] = None):
+    def __init__(
+        self,
+        session: Session,
+        settings: Optional[Settings] = None,
+        passwords: Optional[PasswordHasher] = None,
+        audit: Optional[AuditLogWriter] = None,
+        activity: Optional[ActivityTracker] = None,
+    ):
         self.session = session
         self.settings = settings or get_settings()
         self.user_repo = UserRepository(session)
         self.refresh_repo = RefreshTokenRepository(session)
-        self.password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.passwords = passwords or get_password_hasher()
+        self.audit = audit or get_audit_log_writer()
+        self.activity = activity or get_activity_tracker()
+        # Buffered audit rows, handed to the writer once the request commits
+        self._pending_audit: List[AuditRow] = []
 
     # ------------------------------------------------------------------
     # Registration flows
+    #
+    # Password hashing is awaited on the hashing pool; the database work
+    # around it stays synchronous and runs in the request threadpool.
     # ------------------------------------------------------------------
-    def register_worker(
+    async def register_worker(
         self,
         payload: WorkerRegistrationRequest,
         ip_address: Optional[str] = None,
         user_agent: Optional[str] = None,
     ) -> TokenPair:
-        self._ensure_email_available(payload.email)
+        await run_in_threadpool(self._ensure_email_available, payload.email)
+        hashed_password = await self._hash_password(payload.password.get_secret_value())
+        return await run_in_threadpool(
+            self._create_worker, payload, hashed_password, ip_address, user_agent
+        )
 
+    def _create_worker(
+        self,
+        payload: WorkerRegistrationRequest,
+        hashed_password: str,
+        ip_address: Optional[str],
+        user_agent: Optional[str],
+    ) -> TokenPair:
         user = User(
-            email=payload.email.lower(),
-            hashed_password=self._hash_password(payload.password.get_secret_value()),
+            email=payload.email,
+            hashed_password=hashed_password,
             role=UserRole.WORKER,
         )
         
@@ -90,20 +120,31 @@ class AuthService:
         )
 
         self._log_event(user, AuthEventType.REGISTRATION, refresh_obj, ip_address, user_agent)
-        self.session.commit()
+        self._commit()
         return token_pair
 
-    def register_facility(
+    async def register_facility(
         self,
         payload: FacilityRegistrationRequest,
         ip_address: Optional[str] = None,
         user_agent: Optional[str] = None,
     ) -> TokenPair:
-        self._ensure_email_available(payload.email)
+        await run_in_threadpool(self._ensure_email_available, payload.email)
+        hashed_password = await self._hash_password(payload.password.get_secret_value())
+        return await run_in_threadpool(
+            self._create_facility, payload, hashed_password, ip_address, user_agent
+        )
 
+    def _create_facility(
+        self,
+        payload: FacilityRegistrationRequest,
+        hashed_password: str,
+        ip_address: Optional[str],
+        user_agent: Optional[str],
+    ) -> TokenPair:
         user = User(
-            email=payload.email.lower(),
-            hashed_password=self._hash_password(payload.password.get_secret_value()),
+            email=payload.email,
+            hashed_password=hashed_password,
             role=UserRole.FACILITY,
         )
 
@@ -147,19 +188,30 @@ class AuthService:
         )
 
         self._log_event(user, AuthEventType.REGISTRATION, refresh_obj, ip_address, user_agent)
-        self.session.commit()
+        self._commit()
         return token_pair
 
     # ------------------------------------------------------------------
     # Login flows
     # ------------------------------------------------------------------
-    def login_worker(
+    async def login_worker(
         self,
         payload: LoginRequest,
         ip_address: Optional[str] = None,
         user_agent: Optional[str] = None,
     ) -> TokenPair:
-        user = self._authenticate(payload)
+        user, rehashed_password = await self._authenticate(payload)
+        return await run_in_threadpool(
+            self._complete_worker_login, user, rehashed_password, ip_address, user_agent
+        )
+
+    def _complete_worker_login(
+        self,
+        user: User,
+        rehashed_password: Optional[str],
+        ip_address: Optional[str],
+        user_agent: Optional[str],
+    ) -> TokenPair:
         if user.role != UserRole.WORKER:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account is not a worker")
         if not user.worker_profile:
@@ -171,18 +223,31 @@ class AuthService:
             user_agent=user_agent,
             worker_id=user.worker_profile.id,
         )
-        self.user_repo.set_last_login(user)
+        self._record_login(user, rehashed_password)
         self._log_event(user, AuthEventType.LOGIN, refresh_obj, ip_address, user_agent)
-        self.session.commit()
+        self._commit()
+        self.activity.record("user", user.id)
+        self.activity.record("worker", user.worker_profile.id)
         return token_pair
 
-    def login_facility(
+    async def login_facility(
         self,
         payload: LoginRequest,
         ip_address: Optional[str] = None,
         user_agent: Optional[str] = None,
     ) -> TokenPair:
-        user = self._authenticate(payload)
+        user, rehashed_password = await self._authenticate(payload)
+        return await run_in_threadpool(
+            self._complete_facility_login, user, rehashed_password, ip_address, user_agent
+        )
+
+    def _complete_facility_login(
+        self,
+        user: User,
+        rehashed_password: Optional[str],
+        ip_address: Optional[str],
+        user_agent: Optional[str],
+    ) -> TokenPair:
         if user.role != UserRole.FACILITY:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account is not a facility")
         if not user.facility_profile:
@@ -194,9 +259,11 @@ class AuthService:
             user_agent=user_agent,
             facility_id=user.facility_profile.id,
         )
-        self.user_repo.set_last_login(user)
+        self._record_login(user, rehashed_password)
         self._log_event(user, AuthEventType.LOGIN, refresh_obj, ip_address, user_agent)
-        self.session.commit()
+        self._commit()
+        self.activity.record("user", user.id)
+        self.activity.record("facility", user.facility_profile.id)
         return token_pair
 
     # ------------------------------------------------------------------
@@ -232,8 +299,8 @@ class AuthService:
         stored.revoked_at = now
         stored.revoked_reason = "rotated"
         stored.replaced_by_token_id = new_refresh.id
-        self._log_event(user, AuthEventType.REFRESH, new_refresh, ip_address, user_agent)
-        self.session.commit()
+        self._log_event(user, AuthEventType.TOKEN_REFRESH, new_refresh, ip_address, user_agent)
+        self._commit()
         return token_pair
 
     def logout(
@@ -248,15 +315,15 @@ class AuthService:
 
         if not stored:
             # Unknown token - still create an audit trail for observability.
-            audit = AuthAuditLog(
-                user_id=None,
-                event_type=AuthEventType.LOGOUT,
-                ip_address=ip_address,
-                user_agent=user_agent,
+            self._log_event(
+                None,
+                AuthEventType.LOGOUT,
+                None,
+                ip_address,
+                user_agent,
                 detail="Attempted logout with unknown refresh token",
             )
-            self.session.add(audit)
-            self.session.commit()
+            self._commit()
             return
 
         if stored.revoked_at is None:
@@ -264,31 +331,59 @@ class AuthService:
             stored.revoked_reason = "user_logout"
 
         self._log_event(stored.user, AuthEventType.LOGOUT, stored, ip_address, user_agent)
-        self.session.commit()
+        self._commit()
+        # Reject the access tokens issued with this session from now on
+        RefreshTokenService(self.session).revoke_session(stored.id)
+        # Stop serving this user's access tokens from the verified-token cache
+        get_token_cache().invalidate_subject(stored.user_id)
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
     def _ensure_email_available(self, email: str) -> None:
-        if self.user_repo.get_by_email(email):
+        if self._find_user(email):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
-    def _authenticate(self, payload: LoginRequest) -> User:
-        user = self.user_repo.get_by_email(payload.email)
+    def _find_user(self, email: str) -> Optional[User]:
+        user = self.user_repo.get_by_email(email)
+        # End the read transaction so the connection goes back to the pool
+        # while the password hash runs, instead of idling through the queue.
+        self.session.commit()
+        return user
+
+    async def _authenticate(self, payload: LoginRequest) -> Tuple[User, Optional[str]]:
+        """Check the credentials; also returns a replacement hash if the stored one is outdated."""
+        user = await run_in_threadpool(self._find_user, payload.email)
         if not user:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
         if not user.is_active:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account disabled")
-        # Truncate password to 72 bytes (bcrypt limit)
-        password_bytes = payload.password.get_secret_value()[:72]
-        if not self.password_context.verify(password_bytes, user.hashed_password):
+        # Bulk-imported accounts carry a placeholder until a password is set
+        if not self.passwords.identify(user.hashed_password):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
-        return user
+        try:
+            valid, rehashed_password = await self.passwords.verify_and_update(
+                payload.password.get_secret_value(), user.hashed_password
+            )
+        except PasswordHasherBusyError:
+            raise self._hasher_busy()
+        if not valid:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
+        return user, rehashed_password
 
-    def _hash_password(self, password: str) -> str:
-        # Truncate password to 72 bytes (bcrypt limit)
-        password_truncated = password[:72]
-        return self.password_context.hash(password_truncated)
+    async def _hash_password(self, password: str) -> str:
+        try:
+            return await self.passwords.hash(password)
+        except PasswordHasherBusyError:
+            raise self._hasher_busy()
+
+    @staticmethod
+    def _hasher_busy() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-in attempts in progress, please retry",
+            headers={"Retry-After": "1"},
+        )
 
     def _issue_token_pair(
         self,
@@ -309,6 +404,9 @@ class AuthService:
         print(f"Facility ID param: {facility_id} (type: {type(facility_id).__name__ if facility_id else 'None'})")
         print(f"User role: {user.role}")
 
+        # The access token's jti is its refresh token's id, so revoking the
+        # session (logout) can revoke the access token too
+        refresh_id = uuid4()
         payload = {
             "sub": str(user.id),
             "role": user.role.value,
@@ -316,6 +414,7 @@ class AuthService:
             "iat": int(now.timestamp()),
             "exp": int(access_exp.timestamp()),
             "type": "access",
+            "jti": str(refresh_id),
         }
         if worker_id:
             print(f"Adding worker_id to token: {worker_id}")
@@ -333,6 +432,7 @@ class AuthService:
 
         refresh_token_plain = secrets.token_urlsafe(48)
         refresh_obj = RefreshToken(
+            id=refresh_id,
             user_id=user.id,
             token_hash=self._hash_token(refresh_token_plain),
             expires_at=refresh_exp,
@@ -359,20 +459,42 @@ class AuthService:
 
     def _log_event(
         self,
-        user: User,
+        user: Optional[User],
         event_type: AuthEventType,
         refresh_token: Optional[RefreshToken],
         ip_address: Optional[str],
         user_agent: Optional[str],
+        detail: Optional[str] = None,
     ) -> None:
-        log = AuthAuditLog(
-            user_id=user.id,
-            event_type=event_type,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            refresh_token_id=refresh_token.id if refresh_token else None,
-        )
-        self.session.add(log)
+        now = dt.datetime.utcnow()
+        row = {
+            "id": uuid4(),
+            "user_id": user.id if user else None,
+            "event_type": event_type,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "refresh_token_id": refresh_token.id if refresh_token else None,
+            "detail": detail,
+            "created_at": now,
+            "updated_at": now,
+        }
+        if self.audit.is_synchronous(event_type):
+            self.session.add(AuthAuditLog(**row))
+        else:
+            self._pending_audit.append(row)
+
+    def _record_login(self, user: User, rehashed_password: Optional[str]) -> None:
+        # last_login_at is normally written later by the activity tracker; an
+        # upgraded hash has to be saved now, and stamps the login for free
+        if rehashed_password is not None:
+            self.user_repo.set_last_login(user, rehashed_password)
+
+    def _commit(self) -> None:
+        """Commit, then queue the audit rows that depend on what was committed."""
+        self.session.commit()
+        if self._pending_audit:
+            rows, self._pending_audit = self._pending_audit, []
+            self.audit.submit(rows)
 
     def _profile_ids(self, user: User) -> Tuple[Optional[UUID], Optional[UUID]]:
         worker_id = user.worker_profile.id if user.worker_profile else None
@@ -0,0 +1,360 @@
+"""Bulk ingestion of workers, facilities and job posts."""
+
+from __future__ import annotations
+
+import csv
+import datetime as dt
+import io
+import json
+from dataclasses import dataclass
+from enum import Enum
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple, Type
+from uuid import UUID, uuid4
+
+from pydantic import BaseModel, SecretStr, ValidationError
+from sqlalchemy import Column, Table
+from sqlalchemy.orm import Session
+
+from app.core import PuertoRicoMunicipality
+from app.core.passwords import MAX_PASSWORD_LENGTH, get_password_context
+from app.models import Facility, JobPost, User, UserRole, Worker, normalize_email
+from app.repositories import BulkImportRepository
+from app.schemas import (
+    BulkImportFormat,
+    BulkImportKind,
+    BulkImportReport,
+    BulkImportRowError,
+    FacilityImportRow,
+    JobPostCreate,
+    WorkerImportRow,
+)
+
+# Stored for imported accounts without a password. It is not a valid hash for
+# any passlib scheme, so the account cannot log in until a password is set.
+UNUSABLE_PASSWORD_HASH = "!"
+
+USERS = User.__table__
+WORKERS = Worker.__table__
+FACILITIES = Facility.__table__
+JOB_POSTS = JobPost.__table__
+
+
+@dataclass(frozen=True)
+class _ImportSpec:
+    schema: Type[BaseModel]
+    tables: Tuple[Table, ...]  # insert order; the last one is the imported entity
+    build: Callable[[Any], Dict[str, Dict[str, Any]]]
+    unique: Tuple[Tuple[Table, str, bool], ...] = ()  # (table, column, case_insensitive)
+    references: Tuple[Tuple[Table, str, Table], ...] = ()
+
+
+class _StagingBatch:
+    """Accumulates CSV-encoded rows per staging table until the next COPY."""
+
+    def __init__(self, tables: Tuple[Table, ...]):
+        self.tables = tables
+        self.size = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self.buffers = {table.name: io.StringIO() for table in self.tables}
+        self.writers = {name: csv.writer(buffer) for name, buffer in self.buffers.items()}
+
+    def add(self, row_no: int, rows: Dict[str, Dict[str, Any]]) -> None:
+        for table in self.tables:
+            values = rows[table.name]
+            self.writers[table.name].writerow(
+                [row_no, *(_copy_value(values.get(column.name)) for column in table.columns)]
+            )
+        self.size += 1
+
+    def flush(self, repo: BulkImportRepository) -> None:
+        if not self.size:
+            return
+        for table in self.tables:
+            buffer = self.buffers[table.name]
+            buffer.seek(0)
+            repo.copy_rows(table, [column.name for column in table.columns], buffer)
+        self.size = 0
+        self._reset()
+
+
+class BulkImportService:
+    """Validate rows with the API schemas and load them with ``COPY``.
+
+    Rows are validated in Python, copied into per-transaction staging tables in
+    batches, checked against the live tables with set-based queries and then
+    promoted with one ``INSERT ... SELECT`` per table. A dry run performs every
+    step except the promotion and rolls the transaction back.
+    """
+
+    def __init__(self, session: Session, batch_size: int = 5000):
+        self.session = session
+        self.repo = BulkImportRepository(session)
+        self.batch_size = batch_size
+        self.password_context = get_password_context()
+
+    def run(
+        self,
+        kind: BulkImportKind,
+        stream: IO[str],
+        fmt: BulkImportFormat,
+        dry_run: bool = False,
+    ) -> BulkImportReport:
+        spec = self._spec(kind)
+        errors: Dict[int, List[str]] = {}
+        seen: Dict[Tuple[str, str], int] = {}
+        total = 0
+        inserted = 0
+
+        try:
+            for table in spec.tables:
+                self.repo.create_staging(table)
+
+            batch = _StagingBatch(spec.tables)
+            for row_no, record, problem in self._records(stream, fmt):
+                total += 1
+                if problem:
+                    errors[row_no] = [problem]
+                    continue
+                try:
+                    payload = spec.schema.model_validate(record)
+                    rows = spec.build(payload)
+                except ValidationError as exc:
+                    errors[row_no] = [_format_error(err) for err in exc.errors()]
+                    continue
+                except ValueError as exc:
+                    errors[row_no] = [str(exc)]
+                    continue
+
+                duplicate = self._claim_unique_keys(spec, rows, seen, row_no)
+                if duplicate:
+                    errors[row_no] = [duplicate]
+                    continue
+
+                batch.add(row_no, rows)
+                if batch.size >= self.batch_size:
+                    batch.flush(self.repo)
+            batch.flush(self.repo)
+
+            conflicts = self._database_conflicts(spec)
+            for row_no, messages in conflicts.items():
+                errors.setdefault(row_no, []).extend(messages)
+            self.repo.discard_rows(spec.tables, conflicts.keys())
+
+            primary = spec.tables[-1]
+            if dry_run:
+                inserted = self.repo.staged_counts([primary])[primary.name]
+                self.session.rollback()
+            else:
+                for table in spec.tables:
+                    inserted = self.repo.promote(
+                        table, [column.name for column in table.columns]
+                    )
+                self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        return BulkImportReport(
+            kind=kind,
+            dry_run=dry_run,
+            total_rows=total,
+            inserted=inserted,
+            rejected=len(errors),
+            errors=[
+                BulkImportRowError(row=row_no, errors=messages)
+                for row_no, messages in sorted(errors.items())
+            ],
+        )
+
+    # ------------------------------------------------------------------
+    # Parsing and validation
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _records(
+        stream: IO[str], fmt: BulkImportFormat
+    ) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+        if fmt == BulkImportFormat.CSV:
+            reader = csv.DictReader(stream)
+            for row_no, record in enumerate(reader, start=1):
+                yield row_no, {
+                    key: value for key, value in record.items() if key and value not in (None, "")
+                }, None
+            return
+
+        row_no = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            row_no += 1
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield row_no, None, f"Invalid JSON: {exc.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield row_no, None, "Expected a JSON object"
+                continue
+            yield row_no, record, None
+
+    @staticmethod
+    def _claim_unique_keys(
+        spec: _ImportSpec,
+        rows: Dict[str, Dict[str, Any]],
+        seen: Dict[Tuple[str, str], int],
+        row_no: int,
+    ) -> Optional[str]:
+        keys = []
+        for table, column, case_insensitive in spec.unique:
+            value = str(rows[table.name][column])
+            key = (f"{table.name}.{column}", value.lower() if case_insensitive else value)
+            if key in seen:
+                return f"{column}: duplicates row {seen[key]}"
+            keys.append(key)
+        for key in keys:
+            seen[key] = row_no
+        return None
+
+    def _database_conflicts(self, spec: _ImportSpec) -> Dict[int, List[str]]:
+        conflicts: Dict[int, List[str]] = {}
+        for table, column, case_insensitive in spec.unique:
+            for row_no, value in self.repo.conflicting_rows(table, column, case_insensitive):
+                conflicts.setdefault(row_no, []).append(f"{column}: {value} already exists")
+        for table, column, target in spec.references:
+            for row_no, value in self.repo.missing_references(table, column, target):
+                conflicts.setdefault(row_no, []).append(f"{column}: {value} does not exist")
+        return conflicts
+
+    # ------------------------------------------------------------------
+    # Row builders
+    # ------------------------------------------------------------------
+    def _spec(self, kind: BulkImportKind) -> _ImportSpec:
+        if kind == BulkImportKind.WORKERS:
+            return _ImportSpec(
+                schema=WorkerImportRow,
+                tables=(USERS, WORKERS),
+                build=self._worker_rows,
+                # Emails are lowercased on the way in and stored lowercase
+                unique=((USERS, "email", False),),
+            )
+        if kind == BulkImportKind.FACILITIES:
+            return _ImportSpec(
+                schema=FacilityImportRow,
+                tables=(USERS, FACILITIES),
+                build=self._facility_rows,
+                unique=((USERS, "email", False), (FACILITIES, "legal_name", False)),
+            )
+        return _ImportSpec(
+            schema=JobPostCreate,
+            tables=(JOB_POSTS,),
+            build=self._job_post_rows,
+            references=((JOB_POSTS, "facility_id", FACILITIES),),
+        )
+
+    def _user_values(
+        self, email: str, password: Optional[SecretStr], role: UserRole
+    ) -> Dict[str, Any]:
+        if password is None:
+            hashed_password = UNUSABLE_PASSWORD_HASH
+        else:
+            hashed_password = self.password_context.hash(
+                password.get_secret_value()[:MAX_PASSWORD_LENGTH]
+            )
+        return _with_defaults(
+            USERS,
+            {"id": uuid4(), "email": normalize_email(email), "hashed_password": hashed_password, "role": role},
+        )
+
+    def _worker_rows(self, payload: WorkerImportRow) -> Dict[str, Dict[str, Any]]:
+        user = self._user_values(payload.email, payload.password, UserRole.WORKER)
+        worker = {
+            "user_id": user["id"],
+            "full_name": payload.full_name,
+            "title": payload.title,
+            "bio": payload.bio,
+            "profile_image_url": _optional_str(payload.profile_image_url),
+            "resume_url": _optional_str(payload.resume_url),
+            "city": _municipality(payload.city),
+            "state_province": payload.state_province,
+            "postal_code": payload.postal_code,
+            "phone": payload.phone,
+            "education_level": payload.education_level,
+        }
+        return {USERS.name: user, WORKERS.name: _with_defaults(WORKERS, worker)}
+
+    def _facility_rows(self, payload: FacilityImportRow) -> Dict[str, Dict[str, Any]]:
+        user = self._user_values(payload.email, payload.password, UserRole.FACILITY)
+        facility = payload.model_dump(
+            exclude={"email", "password", "profile_image_url"}, exclude_none=True
+        )
+        facility.update(
+            user_id=user["id"],
+            profile_image_url=_optional_str(payload.profile_image_url),
+            hq_city=_municipality(payload.hq_city),
+        )
+        return {USERS.name: user, FACILITIES.name: _with_defaults(FACILITIES, facility)}
+
+    def _job_post_rows(self, payload: JobPostCreate) -> Dict[str, Dict[str, Any]]:
+        job = payload.model_dump(exclude_none=True)
+        job["city"] = _municipality(payload.city)
+        return {JOB_POSTS.name: _with_defaults(JOB_POSTS, job)}
+
+
+def _with_defaults(table: Table, values: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply the ORM column defaults that the ORM would add on flush."""
+
+    row = dict(values)
+    for column in table.columns:
+        if row.get(column.name) is None:
+            row[column.name] = _column_default(column)
+    return row
+
+
+def _column_default(column: Column) -> Any:
+    default = column.default
+    if default is None:
+        return None
+    if default.is_callable:
+        return default.arg(None)
+    if default.is_scalar:
+        return default.arg
+    return None
+
+
+def _copy_value(value: Any) -> Any:
+    """Render a Python value in PostgreSQL's CSV ``COPY`` text format."""
+
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, Enum):
+        # SQLAlchemy persists Python enums by member name.
+        return value.name
+    if isinstance(value, (dt.datetime, dt.date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _optional_str(value: Any) -> Optional[str]:
+    return str(value) if value else None
+
+
+def _municipality(value: Optional[str]) -> Optional[str]:
+    """Map a municipality label or key to the stored enum name."""
+
+    if not value:
+        return None
+    needle = value.strip()
+    for municipality in PuertoRicoMunicipality:
+        if needle.upper() == municipality.name or needle.casefold() == municipality.value.casefold():
+            return municipality.name
+    raise ValueError(f"city: {value} is not a Puerto Rico municipality")
+
+
+def _format_error(error: dict) -> str:
+    location = ".".join(str(part) for part in error.get("loc", ()))
+    return f"{location}: {error['msg']}" if location else error["msg"]
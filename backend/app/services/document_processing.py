@@ -0,0 +1,166 @@
+"""Background analysis of verification documents.
+
+Submitting a verification queues the submitted files (one
+``document_analyses`` row per blob, status PENDING) in the same transaction.
+:meth:`DocumentProcessingService.process_pending` runs every
+``DOCUMENT_PROCESSING_INTERVAL_SECONDS`` from the app lifespan. It claims rows
+one at a time with ``FOR UPDATE SKIP LOCKED``, so several API processes can
+work the queue, and analyses each file in the image process pool (see
+:mod:`app.core.documents`).
+
+ID photo and selfie hashes also feed the in-process duplicate-photo index
+(:mod:`app.core.phash_index`), which :meth:`load_photo_index` rebuilds every
+``DUPLICATE_PHOTO_INDEX_REFRESH_SECONDS``.
+
+Resume text feeds worker search. Every ``RESUME_INDEX_INTERVAL_SECONDS``,
+:meth:`index_resumes` queues resumes uploaded since their worker was last
+indexed. It then rebuilds ``workers.resume_search`` from the extracted text
+for those that are done. Text is extracted once per distinct file, however
+many workers share it, and the worker rows record which file they were
+indexed from, so nothing is lost to a restart.
+
+A file that fails goes to the back of the queue and is retried on later runs
+until it has failed ``DOCUMENT_MAX_ATTEMPTS`` times, then marked FAILED. Work
+interrupted by a restart rolls back and is picked up again.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import logging
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.documents import PREVIEW, analyze_document
+from app.core.images import ImageProcessorBusyError, derivative_path, get_image_processor
+from app.core.metrics import metrics
+from app.core.phash_index import PhotoOwner, get_perceptual_hash_index
+from app.core.settings import get_settings
+from app.models import DocumentAnalysis, DocumentAnalysisStatus
+from app.repositories import DocumentAnalysisRepository
+
+from .upload_service import upload_digest
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentProcessingService:
+    def __init__(self, session: Session):
+        self.session = session
+        self.repo = DocumentAnalysisRepository(session)
+        self.settings = get_settings()
+
+    def enqueue(self, urls: Iterable[Optional[str]]) -> int:
+        """Queue the uploads behind ``urls`` for analysis; the caller commits.
+
+        URLs that don't point at a stored upload are ignored.
+        """
+        digests = {digest for digest in map(upload_digest, urls) if digest}
+        return self.repo.enqueue(digests)
+
+    def analyses_for(self, urls: Iterable[Optional[str]]) -> Dict[str, DocumentAnalysis]:
+        """Analyses of the uploads behind ``urls``, keyed by URL, in one query."""
+        by_digest = {url: upload_digest(url) for url in urls if url}
+        found = {
+            analysis.sha256: analysis
+            for analysis in self.repo.for_digests({d for d in by_digest.values() if d})
+        }
+        return {url: found[digest] for url, digest in by_digest.items() if digest in found}
+
+    def load_photo_index(self) -> int:
+        """Rebuild the duplicate-photo index from the database; returns photos indexed."""
+        rows = self.repo.photo_hashes()
+        return get_perceptual_hash_index().replace(
+            (row.phash, PhotoOwner(row.kind, row.owner_id, row.field, row.sha256))
+            for row in rows
+        )
+
+    def find_reused_photos(
+        self, kind: str, owner_id: UUID, phashes: Mapping[str, Optional[str]]
+    ) -> List[Tuple[str, int, PhotoOwner]]:
+        """Other accounts' photos within ``DUPLICATE_PHOTO_MAX_DISTANCE`` of this one's.
+
+        ``phashes`` maps this account's photo fields to their hashes. Returns
+        ``(field, distance, other photo)``, closest first, one per other photo.
+        """
+        index = get_perceptual_hash_index()
+        if not index.loaded:
+            self.load_photo_index()
+        closest: Dict[PhotoOwner, Tuple[str, int]] = {}
+        for field, phash in phashes.items():
+            for distance, other in index.search(phash, self.settings.duplicate_photo_max_distance):
+                if (other.kind, other.owner_id) == (kind, owner_id):
+                    continue
+                if other not in closest or distance < closest[other][1]:
+                    closest[other] = (field, distance)
+        matches = [(field, distance, other) for other, (field, distance) in closest.items()]
+        return sorted(matches, key=lambda match: match[1])
+
+    def index_resumes(self, batch_size: Optional[int] = None) -> int:
+        """Queue new resumes, then index those with text ready; returns workers indexed."""
+        batch_size = batch_size or self.settings.resume_index_batch_size
+        queued = self.repo.enqueue_resumes()
+        self.session.commit()
+        if queued:
+            logger.info("Queued %d resumes for text extraction", queued)
+        indexed = 0
+        while True:
+            updated = self.repo.index_resumes(batch_size)
+            self.session.commit()
+            indexed += updated
+            if updated < batch_size:
+                break
+        metrics.counter("documents.resumes_indexed").inc(indexed)
+        return indexed
+
+    def process_pending(self, batch_size: Optional[int] = None) -> int:
+        """Analyse up to ``batch_size`` queued files (blocking); returns how many were handled."""
+        batch_size = batch_size or self.settings.document_processing_batch_size
+        processor = get_image_processor()
+        # Rows touched during this run (a failure bumps updated_at) wait for the next one
+        started = dt.datetime.utcnow()
+        handled = 0
+        while handled < batch_size:
+            claimed = self.repo.claim_next(started)
+            if claimed is None:
+                break
+            analysis, blob = claimed
+            preview_path = derivative_path(blob.path, PREVIEW)
+            try:
+                result = processor.call_sync(
+                    analyze_document,
+                    blob.path,
+                    blob.content_type,
+                    self.settings.document_text_max_chars,
+                    self.settings.image_webp_quality,
+                )
+            except ImageProcessorBusyError:
+                self.session.rollback()
+                break
+            except Exception as exc:
+                logger.exception("Could not analyse upload %s", blob.path)
+                self._record_failure(analysis, exc)
+            else:
+                analysis.status = DocumentAnalysisStatus.DONE
+                analysis.page_count = result["page_count"]
+                # Postgres text can't hold NUL, which some PDF text layers contain
+                text = result["text"]
+                analysis.extracted_text = text.replace("\x00", "") if text else None
+                analysis.phash = result["phash"]
+                analysis.preview_path = preview_path if result["preview"] else None
+                analysis.error = None
+                analysis.processed_at = dt.datetime.utcnow()
+                metrics.counter("documents.processed").inc()
+            self.session.commit()
+            handled += 1
+        return handled
+
+    def _record_failure(self, analysis: DocumentAnalysis, exc: Exception) -> None:
+        analysis.attempts += 1
+        analysis.error = f"{type(exc).__name__}: {exc}"[:255]
+        if analysis.attempts >= self.settings.document_max_attempts:
+            analysis.status = DocumentAnalysisStatus.FAILED
+            analysis.processed_at = dt.datetime.utcnow()
+            metrics.counter("documents.failed").inc()
@@ -54,8 +54,8 @@ class EndorsementsService:
         )
         data["facility_id"] = facility_id
         endorsement = self.repo.add_endorsement(data)
+        self.workers.adjust_endorsement_stats([payload.worker_id], 1)
         self.session.commit()
-        self.session.refresh(endorsement)
         return endorsement
 
     def update_endorsement(
@@ -64,34 +64,31 @@ class EndorsementsService:
         facility_id: UUID,
         payload: EndorsementUpdate,
     ) -> Optional[Endorsement]:
-        endorsement = self.repo.get_for_facility(endorsement_id, facility_id)
-        if not endorsement:
-            return None
-
         data = (
             payload.model_dump(mode="json", exclude_unset=True)
             if hasattr(payload, "model_dump")
             else payload.dict(exclude_unset=True)
         )
-        for key, value in data.items():
-            setattr(endorsement, key, value)
+        endorsement = self.repo.update_for_facility(endorsement_id, facility_id, data)
+        if not endorsement:
+            return None
         self.session.commit()
-        self.session.refresh(endorsement)
         return endorsement
 
     def delete_as_facility(self, endorsement_id: UUID, facility_id: UUID) -> bool:
-        endorsement = self.repo.get_for_facility(endorsement_id, facility_id)
-        if not endorsement:
-            return False
-        self.repo.delete(endorsement)
-        self.session.commit()
-        return True
+        worker_id = self.repo.delete_for_facility(endorsement_id, facility_id)
+        return self._finish_delete(worker_id)
 
     def delete_as_worker(self, endorsement_id: UUID, worker_id: UUID) -> bool:
-        endorsement = self.repo.get_for_worker(endorsement_id, worker_id)
-        if not endorsement:
+        deleted_for = self.repo.delete_for_worker(endorsement_id, worker_id)
+        return self._finish_delete(deleted_for)
+
+    def _finish_delete(self, worker_id: Optional[UUID]) -> bool:
+        # DELETE ... RETURNING: a concurrent delete of the same row returns
+        # nothing here, so the count is only decremented once.
+        if worker_id is None:
             return False
-        self.repo.delete(endorsement)
+        self.workers.adjust_endorsement_stats([worker_id], -1)
         self.session.commit()
         return True
 
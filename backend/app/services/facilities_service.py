@@ -7,8 +7,9 @@ from uuid import UUID
 
 from sqlalchemy.orm import Session
 
+from app.core.security import get_profile_id_cache, get_token_cache
 from app.models import Facility, FacilityCertification, VerificationStatus
-from app.repositories import FacilityRepository
+from app.repositories import EndorsementRepository, FacilityRepository, WorkerRepository
 from app.schemas import (
     FacilityCertificationCreate,
     FacilityCertificationRead,
@@ -19,6 +20,9 @@ from app.schemas import (
     PaginationParams,
 )
 
+from .refresh_token_service import RefreshTokenService
+
+
 class FacilityCertificationExists(Exception):
     """Raised when attempting to create a duplicate certification."""
 
@@ -27,6 +31,8 @@ class FacilitiesService:
     def __init__(self, session: Session):
         self.session = session
         self.repo = FacilityRepository(session)
+        self.endorsements = EndorsementRepository(session)
+        self.workers = WorkerRepository(session)
 
     def list_facilities(
         self, filters: FacilityFilter, pagination: PaginationParams
@@ -37,65 +43,57 @@ class FacilitiesService:
         return self.repo.get_facility(facility_id)
 
     def create_facility(self, payload: FacilityCreate) -> Facility:
-        facility = Facility(**payload.dict(exclude_unset=True))
-        self.repo.add(facility)
+        facility = self.repo.insert_returning(payload.dict(exclude_unset=True))
         self.session.commit()
-        self.session.refresh(facility)
         return facility
 
     def get_facility_for_user(self, user_id: UUID) -> Facility | None:
         return self.repo.get_by_user_id(user_id)
 
     def update_facility(self, facility_id: UUID, payload: FacilityUpdate) -> Facility | None:
-        facility = self.repo.get_facility(facility_id)
+        facility = self.repo.update_facility(facility_id, payload.dict(exclude_unset=True))
         if not facility:
             return None
-        
-        payload_dict = payload.dict(exclude_unset=True)
-        print(f"\n=== UPDATE FACILITY SERVICE ===")
-        print(f"Facility ID: {facility_id}")
-        print(f"Payload dict: {payload_dict}")
-        print(f"Payload keys: {list(payload_dict.keys())}")
-        
-        for key, value in payload_dict.items():
-            print(f"  Setting {key} = {value} (type: {type(value).__name__})")
-            setattr(facility, key, value)
-        
-        print(f"Facility object after setattr:")
-        print(f"  hq_city: {facility.hq_city}")
-        print(f"  hq_address_line1: {facility.hq_address_line1}")
-        print(f"  hq_state_province: {facility.hq_state_province}")
-        print(f"  hq_postal_code: {facility.hq_postal_code}")
-        print(f"  phone_e164: {facility.phone_e164}")
-        
         self.session.commit()
-        self.session.refresh(facility)
-        
-        print(f"Facility after commit/refresh:")
-        print(f"  hq_city: {facility.hq_city}")
-        print(f"  hq_address_line1: {facility.hq_address_line1}")
-        print(f"  hq_state_province: {facility.hq_state_province}")
-        print(f"  hq_postal_code: {facility.hq_postal_code}")
-        print(f"  phone_e164: {facility.phone_e164}")
-        print(f"=== END UPDATE FACILITY SERVICE ===\n")
-        
         return facility
 
     def delete_facility(self, facility_id: UUID) -> bool:
         facility = self.repo.get_facility(facility_id)
         if not facility:
             return False
-        
+
+        self._release_endorsements(facility_id)
         user = facility.user
         if user:
+            RefreshTokenService(self.session).revoke_user(user.id, "user_deleted")
             self.session.delete(user)
         else:
             # If no user, just delete the facility directly
             self.repo.delete(facility)
         
         self.session.commit()
+        get_token_cache().invalidate_subject(facility.user_id)
+        get_profile_id_cache().invalidate_user(facility.user_id)
         return True
 
+    def delete_profile(self, facility: Facility) -> None:
+        """Delete the facility profile but keep its user account."""
+        self._release_endorsements(facility.id)
+        if facility.user_id:
+            RefreshTokenService(self.session).revoke_user(facility.user_id, "profile_deleted")
+        self.session.delete(facility)
+        self.session.commit()
+        get_token_cache().invalidate_subject(facility.user_id)
+        get_profile_id_cache().invalidate_user(facility.user_id)
+
+    def _release_endorsements(self, facility_id: UUID) -> None:
+        # Endorsement rows cascade with the facility; take them off the
+        # endorsed workers' counts in the same transaction. Each facility
+        # endorses a worker at most once.
+        self.workers.adjust_endorsement_stats(
+            self.endorsements.endorsed_worker_ids(facility_id), -1
+        )
+
     def list_certifications(
         self, facility_id: UUID
     ) -> Optional[List[FacilityCertification]]:
@@ -114,15 +112,15 @@ class FacilitiesService:
         if self.repo.get_certification_by_code(facility_id, payload.code):
             raise FacilityCertificationExists
 
-        certification = FacilityCertification(
-            facility_id=facility_id,
-            code=payload.code,
-            evidence_url=str(payload.evidence_url),
-            status=VerificationStatus.PENDING,
+        certification = self.repo.insert_certification(
+            {
+                "facility_id": facility_id,
+                "code": payload.code,
+                "evidence_url": str(payload.evidence_url),
+                "status": VerificationStatus.PENDING,
+            }
         )
-        self.repo.add_certification(certification)
         self.session.commit()
-        self.session.refresh(certification)
         return certification
 
     def get_facility_with_certifications(self, facility_id: UUID) -> FacilityWithCertifications | None:
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID
 
 from sqlalchemy.orm import Session
@@ -12,6 +12,7 @@ from app.repositories import FacilityRepository, JobRepository, WorkerRepository
 from app.schemas import (
     JobApplicationCreate,
     JobApplicationRead,
+    JobApplicationStatusBatch,
     JobApplicationUpdate,
     JobFilter,
     JobPostCreate,
@@ -20,6 +21,14 @@ from app.schemas import (
 )
 
 
+class ApplicationsNotFoundError(Exception):
+    """Raised when a batch references applications the facility does not own."""
+
+    def __init__(self, application_ids: List[UUID]):
+        super().__init__(application_ids)
+        self.application_ids = application_ids
+
+
 class JobsService:
     def __init__(self, session: Session):
         self.session = session
@@ -42,48 +51,38 @@ class JobsService:
             if hasattr(payload, "model_dump")
             else payload.dict(exclude_unset=True)
         )
-        job = JobPost(**data)
-        self.repo.add(job)
+        job = self.repo.insert_returning(data)
         self.session.commit()
-        self.session.refresh(job)
         return job
 
     def replace_job(
         self, job_id: UUID, facility_id: UUID, payload: JobPostCreate
     ) -> JobPost | None:
-        job = self.repo.get_job(job_id)
-        if not job or job.facility_id != facility_id:
-            return None
-
         data = (
             payload.model_dump(mode="json", exclude_unset=True)
             if hasattr(payload, "model_dump")
             else payload.dict(exclude_unset=True)
         )
         data.pop("facility_id", None)
-        for key, value in data.items():
-            setattr(job, key, value)
+        job = self.repo.update_job_for_facility(job_id, facility_id, data)
+        if not job:
+            return None
         self.session.commit()
-        self.session.refresh(job)
         return job
 
     def update_job(
         self, job_id: UUID, facility_id: UUID, payload: JobPostUpdate
     ) -> JobPost | None:
-        job = self.repo.get_job(job_id)
-        if not job or job.facility_id != facility_id:
-            return None
-
         update_data = (
             payload.model_dump(mode="json", exclude_unset=True)
             if hasattr(payload, "model_dump")
             else payload.dict(exclude_unset=True)
         )
         update_data.pop("facility_id", None)
-        for key, value in update_data.items():
-            setattr(job, key, value)
+        job = self.repo.update_job_for_facility(job_id, facility_id, update_data)
+        if not job:
+            return None
         self.session.commit()
-        self.session.refresh(job)
         return job
 
     def apply(self, payload: JobApplicationCreate) -> JobApplicationRead:
@@ -111,7 +110,6 @@ class JobsService:
         )
         application = self.repo.add_application(data)
         self.session.commit()
-        self.session.refresh(application)
         return JobApplicationRead.from_orm(application)
 
     def list_applications(
@@ -139,46 +137,50 @@ class JobsService:
     def update_application(
         self, application_id: UUID, worker_id: UUID, payload: JobApplicationUpdate
     ) -> Optional[JobApplicationRead]:
-        application = self.repo.get_application_for_worker(application_id, worker_id)
-        if not application:
-            return None
-
         data = (
             payload.model_dump(mode="json", exclude_unset=True)
             if hasattr(payload, "model_dump")
             else payload.dict(exclude_unset=True)
         )
-        for key, value in data.items():
-            setattr(application, key, value)
+        application = self.repo.update_application_for_worker(application_id, worker_id, data)
+        if not application:
+            return None
         self.session.commit()
-        self.session.refresh(application)
         return JobApplicationRead.from_orm(application)
 
     def update_application_status(
         self, application_id: UUID, facility_id: UUID, payload: JobApplicationUpdate
     ) -> Optional[JobApplicationRead]:
         """Update application status by facility (authorization check included)."""
-        # Get the application
-        application = self.repo.get_application(application_id)
-        if not application:
-            return None
-        
-        # Verify the application belongs to a job posting of this facility
-        job_post = self.repo.get_job(application.job_post_id)
-        if not job_post or job_post.facility_id != facility_id:
-            return None
-
         data = (
             payload.model_dump(mode="json", exclude_unset=True)
             if hasattr(payload, "model_dump")
             else payload.dict(exclude_unset=True)
         )
-        for key, value in data.items():
-            setattr(application, key, value)
+        # The update only matches applications on this facility's job posts
+        application = self.repo.update_application_for_facility(application_id, facility_id, data)
+        if not application:
+            return None
         self.session.commit()
-        self.session.refresh(application)
         return JobApplicationRead.from_orm(application)
 
+    def update_application_statuses(
+        self, facility_id: UUID, payload: JobApplicationStatusBatch
+    ) -> List[JobApplicationRead]:
+        """Update many application statuses at once; all must belong to the facility."""
+        # Later entries for the same application win, as with sequential PATCHes
+        changes: Dict[UUID, str] = {
+            change.application_id: change.status.value for change in payload.updates
+        }
+        owned = self.repo.application_ids_for_facility(changes.keys(), facility_id)
+        missing = [application_id for application_id in changes if application_id not in owned]
+        if missing:
+            raise ApplicationsNotFoundError(missing)
+
+        applications = self.repo.update_application_statuses(list(changes.items()))
+        self.session.commit()
+        return [JobApplicationRead.from_orm(app) for app in applications]
+
     def delete_application(self, application_id: UUID, worker_id: UUID) -> bool:
         application = self.repo.get_application_for_worker(application_id, worker_id)
         if not application:
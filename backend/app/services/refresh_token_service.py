@@ -0,0 +1,144 @@
+"""Refresh-token housekeeping: access-token revocation and the expiry purge."""
+
+from __future__ import annotations
+
+import datetime as dt
+import time
+from typing import Iterable, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.revocation import RevocationStore, get_revocation_store
+from app.core.settings import get_settings
+from app.repositories import RefreshTokenRepository
+
+
+class RefreshTokenService:
+    """Keeps the in-process revocation store in step with the database.
+
+    Access tokens carry the id of the refresh token issued with them as their
+    ``jti``. Revoking a session (logout) therefore means revoking that id, and
+    the ids of tokens it replaced recently enough that their access tokens
+    are still live. Revocations that must outlive the user row are kept in
+    ``revoked_tokens``.
+    """
+
+    def __init__(self, session: Session, store: Optional[RevocationStore] = None):
+        self.session = session
+        self.repo = RefreshTokenRepository(session)
+        # An empty store is falsy (it has __len__)
+        self.store = store if store is not None else get_revocation_store()
+        self.settings = get_settings()
+
+    @property
+    def access_token_lifetime(self) -> dt.timedelta:
+        return dt.timedelta(minutes=self.settings.access_token_expire_minutes)
+
+    # ------------------------------------------------------------------
+    # Revocation store
+    # ------------------------------------------------------------------
+    def revoke_session(self, token_id: UUID) -> None:
+        """Revoke the access tokens of a just-revoked refresh token."""
+        now = self._now()
+        rows = self.repo.revoked_sessions(
+            revoked_since=now - self.access_token_lifetime,
+            live_since=now - self.access_token_lifetime,
+            token_id=token_id,
+        )
+        self.store.revoke_many(self._entries(rows))
+
+    def revoke_user(self, user_id: UUID, reason: str) -> int:
+        """Revoke every session and live access token of ``user_id``; the caller commits.
+
+        Used when a user or their profile is deleted: access tokens carry the
+        profile id, so they must not outlive it. The refresh tokens are marked
+        revoked, and the live ids are also written to ``revoked_tokens``,
+        which survives the user row being deleted in the same transaction;
+        other processes pick them up on their next sync.
+        """
+        now = self._now()
+        token_ids = self.repo.revoke_user_sessions(
+            user_id, now, now - self.access_token_lifetime, reason
+        )
+        expires_at = now + self.access_token_lifetime
+        self.repo.add_revoked_tokens(token_ids, now, expires_at)
+        self.store.revoke_many(
+            (str(token_id), expires_at.timestamp()) for token_id in token_ids
+        )
+        return len(token_ids)
+
+    def load_revocations(self) -> int:
+        """Rebuild the store from the database (startup)."""
+        now = self._now()
+        since = now - self.access_token_lifetime
+        rows = self.repo.revoked_sessions(revoked_since=since, live_since=since)
+        tokens = self.repo.revoked_tokens(revoked_since=since, now=now)
+        self.session.commit()
+        self.store.replace([*self._entries(rows), *self._token_entries(tokens)])
+        return len(rows) + len(tokens)
+
+    def sync_revocations(self, since: dt.datetime) -> int:
+        """Add revocations made since ``since`` (by any process) and prune old ones."""
+        now = self._now()
+        rows = self.repo.revoked_sessions(
+            revoked_since=since, live_since=now - self.access_token_lifetime
+        )
+        tokens = self.repo.revoked_tokens(revoked_since=since, now=now)
+        self.session.commit()
+        self.store.revoke_many([*self._entries(rows), *self._token_entries(tokens)])
+        self.store.prune(time.time())
+        return len(rows) + len(tokens)
+
+    def _entries(self, rows: Iterable[Tuple[UUID, dt.datetime]]) -> Iterable[Tuple[str, float]]:
+        lifetime = self.access_token_lifetime
+        # An access token issued before revocation expires within one lifetime of it
+        return [
+            (str(token_id), (self._ensure_utc(revoked_at) + lifetime).timestamp())
+            for token_id, revoked_at in rows
+        ]
+
+    def _token_entries(
+        self, rows: Iterable[Tuple[UUID, dt.datetime]]
+    ) -> Iterable[Tuple[str, float]]:
+        return [(str(jti), self._ensure_utc(expires_at).timestamp()) for jti, expires_at in rows]
+
+    # ------------------------------------------------------------------
+    # Purge
+    # ------------------------------------------------------------------
+    def purge(self, batch_size: Optional[int] = None, max_batches: Optional[int] = None) -> int:
+        """Delete expired and long-revoked refresh tokens in short transactions.
+
+        Each batch is its own transaction, so locks are held for one batch of
+        rows at a time and logins keep flowing while a large backlog drains.
+        Expired ``revoked_tokens`` rows go in a final transaction.
+        """
+        batch_size = batch_size or self.settings.refresh_token_purge_batch_size
+        retention = dt.timedelta(hours=self.settings.refresh_token_revoked_retention_hours)
+        # Revoked rows must outlive the access tokens issued with them, or a
+        # restart would forget those revocations
+        retention = max(retention, self.access_token_lifetime)
+
+        deleted = batches = 0
+        while max_batches is None or batches < max_batches:
+            now = self._now()
+            count = self.repo.purge_batch(now, now - retention, batch_size)
+            self.session.commit()
+            deleted += count
+            batches += 1
+            if count < batch_size:
+                break
+        # Rows here are few (deleted users) and only kept until they expire
+        deleted += self.repo.purge_revoked_tokens(self._now())
+        self.session.commit()
+        return deleted
+
+    @staticmethod
+    def _now() -> dt.datetime:
+        return dt.datetime.now(dt.timezone.utc)
+
+    @staticmethod
+    def _ensure_utc(value: dt.datetime) -> dt.datetime:
+        if value.tzinfo is None:
+            return value.replace(tzinfo=dt.timezone.utc)
+        return value.astimezone(dt.timezone.utc)
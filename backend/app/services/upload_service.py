@@ -0,0 +1,859 @@
+"""Content-addressed upload storage.
+
+Uploads are stored once per distinct content, under the SHA-256 of their
+bytes: ``uploads/ab/cd/abcd….png``. The digest is computed while the upload
+is streamed to a temp file. Uploading content that is already stored returns
+the existing URL and discards the copy.
+
+``upload_blobs`` keeps a row per stored file. Profiles reference files only by
+URL, so reference counts are not maintained on every profile write; the
+garbage collector recounts them from the URL columns in one statement, then
+deletes files whose count is zero and that nobody has uploaded for
+``UPLOAD_GC_GRACE_HOURS``.
+
+Files are kept in the configured blob storage (see :mod:`app.core.storage`),
+the uploads directory or an S3 bucket, under the same paths either way.
+
+Files can also end up stored with no row behind them: uuid-named uploads
+from before content addressing, derivatives rendered after their blob was
+collected, a blob whose insert was rolled back after the file was moved
+into place. The orphan scan lists the storage a batch at a time from a
+cursor kept in ``upload_scan_cursors``. It checks each batch against the
+blobs and URL columns in one query and moves files nothing refers to under
+``.quarantine/``, where they are deleted after
+``UPLOAD_ORPHAN_QUARANTINE_DAYS``. Stray originals of content-addressed
+files get a blob row instead, so the GC above decides whether they go.
+Each finished pass also deletes direct-upload staging objects (below) whose
+session is gone.
+
+Large documents can also be sent as a resumable upload: create a session,
+append chunks at the offset the server last acknowledged, then finalize with
+the SHA-256 of the whole file. The partial file stays in ``INCOMING_DIR``
+until then, and sessions idle for ``UPLOAD_SESSION_TTL_HOURS`` are deleted,
+along with any file left in ``INCOMING_DIR`` that long.
+Partial files are local, so with several API nodes a session's requests
+must reach the same one.
+
+With storage that supports it (S3), a client can instead PUT the file
+straight into the store: a direct upload gets a session and a presigned URL
+for the staging key ``.incoming/<id>``. Completing it checks the staged
+object's size and SHA-256, then moves it to its content address.
+
+Images also get resized WebP derivatives (see :mod:`app.core.images`),
+rendered in the image process pool once the upload has been stored. The
+backfill job renders any that were skipped or lost to a restart.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.documents import PREVIEW
+from app.core.images import (
+    DERIVATIVE_SIZES,
+    IMAGE_CONTENT_TYPES,
+    ImageProcessorBusyError,
+    derivative_path,
+    get_image_processor,
+)
+from app.core.metrics import metrics
+from app.core.settings import get_settings
+from app.core.storage import (
+    UPLOAD_DIR,
+    BlobStorage,
+    LocalStorage,
+    PresignedUpload,
+    StoredObject,
+    get_blob_storage,
+)
+from app.db import session_scope
+from app.models import UploadSession
+from app.repositories import (
+    UploadBlobRepository,
+    UploadScanCursorRepository,
+    UploadSessionRepository,
+)
+
+logger = logging.getLogger(__name__)
+
+# Partial files are written here, then stored once complete. With local
+# storage it is on the same filesystem, so storing is an atomic rename.
+INCOMING_DIR = UPLOAD_DIR / ".incoming"
+# Direct uploads are staged under here in the storage
+INCOMING_PREFIX = ".incoming/"
+# Orphaned files wait under here before deletion; move one back to restore
+# it. Like .incoming, it is never served.
+QUARANTINE_PREFIX = ".quarantine/"
+ORPHAN_SCAN = "orphans"
+
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+CHUNK_SIZE = 1024 * 1024
+
+# The stored extension follows the content type, not the client's filename,
+# so the same bytes always land on the same path
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/jpg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "application/pdf": ".pdf",
+}
+# Reversed so ".jpg" maps back to "image/jpeg"
+CONTENT_TYPES = {
+    extension: content_type for content_type, extension in reversed(EXTENSIONS.items())
+}
+
+# ab/cd/<sha256>.png, or ab/cd/<sha256>.<size>.webp for a derivative
+_STORED_FILE = re.compile(
+    r"^[0-9a-f]{2}/[0-9a-f]{2}/(?P<sha256>[0-9a-f]{64})(?:\.[a-z]+)?\.[a-z]+$"
+)
+
+
+# Renders started from requests; held so the tasks aren't garbage collected
+_render_tasks: Set[asyncio.Task] = set()
+
+
+def blob_path(sha256: str, content_type: str) -> str:
+    """Storage key of a blob (its path relative to ``UPLOAD_DIR``)."""
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}{EXTENSIONS.get(content_type, '')}"
+
+
+_DIGEST_IN_URL = re.compile(r"/uploads/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})")
+
+
+def upload_digest(url: Optional[str]) -> Optional[str]:
+    """SHA-256 of the blob an upload URL points at (None for other URLs)."""
+    match = _DIGEST_IN_URL.search(url or "")
+    return match.group(1) if match else None
+
+
+class UploadService:
+    def __init__(self, session: Session, storage: Optional[BlobStorage] = None):
+        self.session = session
+        self.storage = storage or get_blob_storage()
+        self.incoming = INCOMING_DIR
+        self.repo = UploadBlobRepository(session)
+        self.sessions = UploadSessionRepository(session)
+        self.cursors = UploadScanCursorRepository(session)
+        self.settings = get_settings()
+
+    # ------------------------------------------------------------------
+    # Storing uploads
+    # ------------------------------------------------------------------
+    async def store(self, upload_file: UploadFile, allowed_types: set) -> str:
+        """Stream the upload to storage and return its URL.
+
+        The file is copied in ``CHUNK_SIZE`` pieces to a temp file and hashed
+        on the way, so memory use doesn't grow with the upload and an
+        oversized file is rejected as soon as it passes ``MAX_FILE_SIZE``.
+        Disk writes run in the threadpool.
+        """
+        _check_type(upload_file.content_type, allowed_types)
+
+        await run_in_threadpool(self.incoming.mkdir, parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=self.incoming, suffix=".part")
+        digest = hashlib.sha256()
+        size = 0
+        kept = False
+        try:
+            with os.fdopen(fd, "wb") as buffer:
+                while chunk := await upload_file.read(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > MAX_FILE_SIZE:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB",
+                        )
+                    await run_in_threadpool(_write_chunk, buffer, digest, chunk)
+            sha256 = digest.hexdigest()
+            path, derived = await run_in_threadpool(
+                self._keep_file, temp_name, sha256, upload_file.content_type, size
+            )
+            kept = True
+        except OSError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to save file: {str(e)}",
+            )
+        finally:
+            # Also on a client disconnect (CancelledError). Unlinked inline:
+            # a cancelled task can't be relied on to finish another await.
+            if not kept:
+                _discard(temp_name)
+        self._schedule_derivatives(upload_file.content_type, sha256, path, derived)
+        return f"/uploads/{path}"
+
+    def _keep_file(
+        self, temp_name: str, sha256: str, content_type: str, size: int
+    ) -> Tuple[str, bool]:
+        """:meth:`_keep` for a local temp file."""
+        return self._keep(
+            sha256,
+            content_type,
+            size,
+            lambda path: self.storage.put_file(temp_name, path, content_type),
+            lambda: _discard(temp_name),
+        )
+
+    def _keep(
+        self,
+        sha256: str,
+        content_type: str,
+        size: int,
+        store: Callable[[str], None],
+        discard: Callable[[], None],
+    ) -> Tuple[str, bool]:
+        """Register the blob and ``store(path)`` its bytes, unless already stored.
+
+        If the blob is already stored, ``discard()`` drops the copy instead.
+        The same bytes sent again under another content type reuse the
+        blob's first path, so there is only ever one copy. Returns the
+        blob's path and whether there is nothing left to render for it.
+        """
+        try:
+            # The row lock taken here keeps the GC from deleting the file
+            # between the existence check and the commit
+            blob = self.repo.register(
+                sha256, blob_path(sha256, content_type), content_type, size, dt.datetime.utcnow()
+            )
+            if self.storage.exists(blob.path):
+                discard()
+            else:
+                store(blob.path)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        # Derivatives follow the stored blob's type, not this upload's
+        done = blob.derived_at is not None or blob.content_type not in IMAGE_CONTENT_TYPES
+        return blob.path, done
+
+    # ------------------------------------------------------------------
+    # Resumable uploads
+    # ------------------------------------------------------------------
+    def _session_file(self, session_id: UUID) -> Path:
+        return self.incoming / f"{session_id}.session"
+
+    def _lock_session(self, session_id: UUID) -> UploadSession:
+        upload = self.sessions.lock(session_id)
+        if upload is None or upload.expires_at < dt.datetime.utcnow():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found"
+            )
+        return upload
+
+    def create_session(
+        self,
+        content_type: str,
+        filename: str,
+        size_bytes: int,
+        sha256: Optional[str],
+        allowed_types: set,
+    ) -> UploadSession:
+        _check_type(content_type, allowed_types)
+        if size_bytes > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB",
+            )
+        self.incoming.mkdir(parents=True, exist_ok=True)
+        upload = self.sessions.insert_returning(
+            {
+                "content_type": content_type,
+                "filename": filename,
+                "size_bytes": size_bytes,
+                "sha256": sha256.lower() if sha256 else None,
+                "expires_at": self._session_expiry(),
+            }
+        )
+        self.session.commit()
+        return upload
+
+    def get_session(self, session_id: UUID) -> UploadSession:
+        upload = self.sessions.get(session_id)
+        if upload is None or upload.expires_at < dt.datetime.utcnow():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found"
+            )
+        return upload
+
+    async def append_chunk(
+        self, session_id: UUID, offset: int, chunks: AsyncIterator[bytes]
+    ) -> UploadSession:
+        """Write the request body at ``offset``; returns the session after it.
+
+        The chunk is read into memory (at most ``UPLOAD_CHUNK_MAX_BYTES``)
+        before the session row is locked, so a slow client never holds the
+        lock. A chunk cut off mid-request is dropped whole; the client
+        resends it from the acknowledged offset.
+        """
+        limit = self.settings.upload_chunk_max_bytes
+        data = bytearray()
+        async for piece in chunks:
+            data += piece
+            if len(data) > limit:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Chunk too large. Maximum size: {limit} bytes",
+                )
+        return await run_in_threadpool(self._append, session_id, offset, bytes(data))
+
+    def _append(self, session_id: UUID, offset: int, data: bytes) -> UploadSession:
+        try:
+            upload = self._lock_session(session_id)
+            if offset != upload.received_bytes:
+                raise _offset_conflict(upload, "Chunk offset does not match the upload")
+            if offset + len(data) > upload.size_bytes:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Chunk extends past the declared file size",
+                )
+            _write_at(self._session_file(session_id), offset, data)
+            upload.received_bytes = offset + len(data)
+            upload.expires_at = self._session_expiry()
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return upload
+
+    async def finish_session(
+        self, session_id: UUID, sha256: Optional[str]
+    ) -> Tuple[str, str, str]:
+        """Check the completed file against its checksum and store it.
+
+        Returns the stored file's URL, and the session's filename and content type.
+        """
+        filename, content_type, digest, path, derived = await run_in_threadpool(
+            self._finish, session_id, sha256
+        )
+        self._schedule_derivatives(content_type, digest, path, derived)
+        return f"/uploads/{path}", filename, content_type
+
+    def _finish(
+        self, session_id: UUID, sha256: Optional[str]
+    ) -> Tuple[str, str, str, str, bool]:
+        temp_name = str(self._session_file(session_id))
+        try:
+            upload = self._lock_session(session_id)
+            if upload.received_bytes != upload.size_bytes:
+                raise _offset_conflict(upload, "Upload is incomplete")
+            expected = (sha256 or upload.sha256 or "").lower()
+            if not expected:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="sha256 of the complete file is required",
+                )
+            digest = _hash_file(temp_name)
+            if digest != expected:
+                # There's no telling which chunk is wrong; the client starts over
+                self.sessions.delete(upload)
+                self.session.commit()
+                _discard(temp_name)
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Checksum mismatch; upload the file again",
+                )
+            filename, content_type, size = upload.filename, upload.content_type, upload.size_bytes
+            self.sessions.delete(upload)
+        except Exception:
+            self.session.rollback()
+            raise
+        # Commits the session row's deletion along with the blob
+        path, derived = self._keep_file(temp_name, digest, content_type, size)
+        return filename, content_type, digest, path, derived
+
+    def cancel_session(self, session_id: UUID) -> None:
+        try:
+            upload = self._lock_session(session_id)
+            self.sessions.delete(upload)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        _discard(str(self._session_file(session_id)))
+        if self.storage.supports_direct_uploads:
+            self.storage.delete(_staging_key(session_id))
+
+    def expire_sessions(self, batch_size: Optional[int] = None) -> int:
+        """Delete sessions past their expiry, and their partial files."""
+        batch_size = batch_size or self.settings.upload_gc_batch_size
+        expired = 0
+        while True:
+            uploads = self.sessions.claim_expired(dt.datetime.utcnow(), batch_size)
+            for upload in uploads:
+                _discard(str(self._session_file(upload.id)))
+                if self.storage.supports_direct_uploads:
+                    self.storage.delete(_staging_key(upload.id))
+                self.sessions.delete(upload)
+            self.session.commit()
+            expired += len(uploads)
+            if len(uploads) < batch_size:
+                return expired
+
+    def purge_incoming(self) -> int:
+        """Delete files in ``INCOMING_DIR`` idle for a session TTL; returns how many.
+
+        :meth:`expire_sessions` removes the files of sessions it expires;
+        this catches the rest: temp files of requests that died mid-write
+        and session files whose row is already gone. Every chunk rewrites
+        its session file, so nothing idle that long can still be in use.
+        """
+        cutoff = time.time() - self.settings.upload_session_ttl_hours * 3600
+        try:
+            entries = list(os.scandir(self.incoming))
+        except FileNotFoundError:
+            return 0
+        purged = 0
+        for entry in entries:
+            try:
+                if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    purged += 1
+            except FileNotFoundError:
+                continue
+        metrics.counter("uploads.incoming_purged").inc(purged)
+        return purged
+
+    def _session_expiry(self) -> dt.datetime:
+        return dt.datetime.utcnow() + dt.timedelta(hours=self.settings.upload_session_ttl_hours)
+
+    # ------------------------------------------------------------------
+    # Direct uploads
+    # ------------------------------------------------------------------
+    def create_direct_upload(
+        self,
+        content_type: str,
+        filename: str,
+        size_bytes: int,
+        sha256: str,
+        allowed_types: set,
+    ) -> Tuple[str, Optional[UploadSession], Optional[PresignedUpload]]:
+        """Start an upload the client sends straight to storage.
+
+        Returns the URL the file will have, and the session and presigned
+        request to send it with. If the content is already stored, it is
+        registered again and there is no session: the URL is ready.
+        """
+        if not self.storage.supports_direct_uploads:
+            raise HTTPException(
+                status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                detail="Direct uploads need remote storage; upload through the API",
+            )
+        _check_type(content_type, allowed_types)
+        if size_bytes > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB",
+            )
+        sha256 = sha256.lower()
+        path = self._register_stored(sha256, content_type, size_bytes)
+        if path is not None:
+            return f"/uploads/{path}", None, None
+
+        upload = self.sessions.insert_returning(
+            {
+                "content_type": content_type,
+                "filename": filename,
+                "size_bytes": size_bytes,
+                "sha256": sha256,
+                "expires_at": self._session_expiry(),
+            }
+        )
+        self.session.commit()
+        expires_in = min(
+            self.settings.upload_session_ttl_hours * 3600,
+            self.settings.storage_presign_expiry_seconds,
+        )
+        presigned = self.storage.presign_upload(
+            _staging_key(upload.id), content_type, size_bytes, sha256, expires_in
+        )
+        return f"/uploads/{blob_path(sha256, content_type)}", upload, presigned
+
+    def _register_stored(self, sha256: str, content_type: str, size: int) -> Optional[str]:
+        """Register another upload of a stored blob; None if it isn't stored."""
+        try:
+            blob = self.repo.register(
+                sha256, blob_path(sha256, content_type), content_type, size, dt.datetime.utcnow()
+            )
+            if not self.storage.exists(blob.path):
+                self.session.rollback()
+                return None
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return blob.path
+
+    async def finish_direct_upload(self, session_id: UUID) -> Tuple[str, str, str]:
+        """Check the staged object against the session and store it.
+
+        Returns the stored file's URL, and the session's filename and content type.
+        """
+        filename, content_type, digest, path, derived = await run_in_threadpool(
+            self._finish_direct, session_id
+        )
+        self._schedule_derivatives(content_type, digest, path, derived)
+        return f"/uploads/{path}", filename, content_type
+
+    def _finish_direct(self, session_id: UUID) -> Tuple[str, str, str, str, bool]:
+        staging = _staging_key(session_id)
+        try:
+            upload = self._lock_session(session_id)
+            staged = self.storage.stat(staging)
+            if staged is None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="The file has not been uploaded yet",
+                )
+            # Checked first, so an oversized object is never downloaded
+            if staged.size != upload.size_bytes:
+                self._reject_staged(upload, staging, "Size mismatch; upload the file again")
+            # S3 checks the checksum the PUT was signed with; stores that
+            # don't keep one get the file hashed here
+            digest = self.storage.stored_sha256(staging)
+            if digest is None:
+                with self.storage.reading(staging) as local_path:
+                    digest = _hash_file(local_path)
+            if digest != upload.sha256:
+                self._reject_staged(upload, staging, "Checksum mismatch; upload the file again")
+            filename, content_type, size = upload.filename, upload.content_type, upload.size_bytes
+            self.sessions.delete(upload)
+        except Exception:
+            self.session.rollback()
+            raise
+        # Commits the session row's deletion along with the blob
+        path, derived = self._keep(
+            digest,
+            content_type,
+            size,
+            lambda path: self.storage.move(staging, path, content_type),
+            lambda: self.storage.delete(staging),
+        )
+        return filename, content_type, digest, path, derived
+
+    def _reject_staged(self, upload: UploadSession, staging: str, detail: str) -> None:
+        # There's no fixing a bad object in place; the client starts over
+        self.sessions.delete(upload)
+        self.session.commit()
+        self.storage.delete(staging)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+    def purge_staged_uploads(self, batch_size: Optional[int] = None) -> int:
+        """Delete direct-upload staging objects whose session is gone; returns how many.
+
+        A presigned PUT still works after its session completes, is
+        cancelled or expires, and the object it leaves has nothing else
+        to clean it up.
+        """
+        if not self.storage.supports_direct_uploads:
+            return 0
+        batch_size = batch_size or self.settings.upload_orphan_scan_batch_size
+        staged = self.storage.iter_objects(prefix=INCOMING_PREFIX)
+        purged = 0
+        while batch := list(islice(staged, batch_size)):
+            by_session: Dict[UUID, str] = {}
+            for item in batch:
+                try:
+                    by_session[UUID(item.key[len(INCOMING_PREFIX):])] = item.key
+                except ValueError:
+                    # Not a staging key at all
+                    self.storage.delete(item.key)
+                    purged += 1
+            live = self.sessions.existing_ids(by_session.keys())
+            self.session.commit()
+            for session_id, key in by_session.items():
+                if session_id not in live:
+                    self.storage.delete(key)
+                    purged += 1
+        metrics.counter("uploads.staged_purged").inc(purged)
+        return purged
+
+    # ------------------------------------------------------------------
+    # Image derivatives
+    # ------------------------------------------------------------------
+    def _schedule_derivatives(
+        self, content_type: str, sha256: str, path: str, derived: bool
+    ) -> None:
+        if content_type in IMAGE_CONTENT_TYPES and not derived:
+            task = asyncio.create_task(self._derive(sha256, path))
+            _render_tasks.add(task)
+            task.add_done_callback(_render_tasks.discard)
+
+    async def _derive(self, sha256: str, path: str) -> None:
+        """Render derivatives after the request; failures are left to the backfill."""
+        try:
+            await get_image_processor().render(path)
+            await run_in_threadpool(_mark_derived, sha256)
+        except ImageProcessorBusyError:
+            pass
+        except Exception:
+            logger.exception("Could not render derivatives of %s", path)
+
+    def build_missing_derivatives(self, batch_size: Optional[int] = None) -> int:
+        """Render derivatives for images that don't have them yet (blocking).
+
+        Skips uploads from the last minute, which the request that stored
+        them is probably still rendering. Returns how many blobs were
+        handled, including ones that failed to render.
+        """
+        batch_size = batch_size or self.settings.image_backfill_batch_size
+        processor = get_image_processor()
+        blobs = self.repo.underived(
+            IMAGE_CONTENT_TYPES, dt.datetime.utcnow() - dt.timedelta(minutes=1), batch_size
+        )
+        self.session.commit()
+        handled = 0
+        for blob in blobs:
+            try:
+                processor.render_sync(blob.path)
+            except ImageProcessorBusyError:
+                break
+            except Exception:
+                # Usually a file that isn't the image its content type claims.
+                # Mark it anyway so it doesn't come back in every batch and
+                # crowd out real work; its derivative URLs will 404.
+                logger.exception("Could not render derivatives of %s", blob.path)
+            self.repo.mark_derived(blob.sha256, dt.datetime.utcnow())
+            self.session.commit()
+            handled += 1
+        return handled
+
+    # ------------------------------------------------------------------
+    # Garbage collection
+    # ------------------------------------------------------------------
+    def collect_garbage(
+        self, batch_size: Optional[int] = None, max_batches: Optional[int] = None
+    ) -> int:
+        """Recount references, then delete unreferenced blobs past the grace period.
+
+        Each batch is its own transaction. Files are unlinked while their
+        rows are still locked, so an upload of the same content waits for
+        the batch and then stores the file again.
+        """
+        batch_size = batch_size or self.settings.upload_gc_batch_size
+        grace = dt.timedelta(hours=self.settings.upload_gc_grace_hours)
+
+        self.repo.recount_references()
+        self.session.commit()
+
+        deleted = batches = 0
+        while max_batches is None or batches < max_batches:
+            blobs = self.repo.claim_unreferenced(dt.datetime.utcnow() - grace, batch_size)
+            for blob in blobs:
+                self.storage.delete(blob.path)
+                if blob.content_type in IMAGE_CONTENT_TYPES:
+                    for size in DERIVATIVE_SIZES:
+                        self.storage.delete(derivative_path(blob.path, size))
+                else:
+                    self.storage.delete(derivative_path(blob.path, PREVIEW))
+                self.repo.delete(blob)
+            self.session.commit()
+            deleted += len(blobs)
+            batches += 1
+            if len(blobs) < batch_size:
+                break
+        return deleted
+
+    def sweep_orphans(
+        self, batch_size: Optional[int] = None, max_batches: Optional[int] = None
+    ) -> int:
+        """Continue the orphan scan of the storage; returns files quarantined.
+
+        Checks up to ``max_batches`` batches of ``batch_size`` files, each in
+        its own transaction that also advances the cursor. Returns at once if
+        another process holds the cursor. When a pass reaches the end of the
+        tree, the cursor is reset, and expired quarantined files and stale
+        staging objects are deleted.
+        """
+        batch_size = batch_size or self.settings.upload_orphan_scan_batch_size
+        max_batches = max_batches or self.settings.upload_orphan_scan_max_batches
+        # Files this new may be an upload whose row isn't committed yet
+        modified_before = time.time() - self.settings.upload_gc_grace_hours * 3600
+
+        quarantined = 0
+        for _ in range(max_batches):
+            cursor = self.cursors.claim(ORPHAN_SCAN)
+            if cursor is None:
+                self.session.rollback()
+                break
+            stored = list(islice(self.storage.iter_objects(cursor.position), batch_size))
+            quarantined += self._sweep_batch(stored, modified_before)
+            finished = len(stored) < batch_size
+            if finished:
+                logger.info(
+                    "Orphaned upload scan finished a pass started at %s", cursor.pass_started_at
+                )
+                cursor.position = ""
+                cursor.pass_started_at = dt.datetime.utcnow()
+            else:
+                cursor.position = stored[-1].key
+            self.session.commit()
+            if finished:
+                self.purge_quarantine()
+                self.purge_staged_uploads()
+                break
+        return quarantined
+
+    def _sweep_batch(self, stored: List[StoredObject], modified_before: float) -> int:
+        by_digest: Dict[str, List[StoredObject]] = {}
+        others: List[StoredObject] = []
+        for item in stored:
+            match = _STORED_FILE.match(item.key)
+            if match:
+                by_digest.setdefault(match["sha256"], []).append(item)
+            else:
+                others.append(item)
+
+        live = self.repo.live_keys(by_digest.keys(), [item.key for item in others])
+        adopted = []
+        orphans = [item for item in others if item.key not in live]
+        for sha256, files in by_digest.items():
+            if sha256 in live:
+                continue
+            original = self._stray_original(sha256)
+            if original is not None:
+                # Its derivatives stay with it
+                adopted.append(original)
+            else:
+                orphans.extend(files)
+        self.repo.adopt(adopted)
+        if adopted:
+            metrics.counter("uploads.orphans_adopted").inc(len(adopted))
+
+        quarantined = 0
+        for item in orphans:
+            if self._quarantine(item, modified_before):
+                quarantined += 1
+        metrics.counter("uploads.orphans_quarantined").inc(quarantined)
+        return quarantined
+
+    def _stray_original(self, sha256: str) -> Optional[Dict[str, object]]:
+        """Blob row values for a stored content-addressed original, if there is one."""
+        for extension, content_type in CONTENT_TYPES.items():
+            path = blob_path(sha256, content_type)
+            stored = self.storage.stat(path)
+            if stored is None:
+                continue
+            return {
+                "sha256": sha256,
+                "path": path,
+                "content_type": content_type,
+                "size_bytes": stored.size,
+                # The GC's grace period then counts from when the file was written
+                "uploaded_at": dt.datetime.utcfromtimestamp(stored.modified),
+            }
+        return None
+
+    def _quarantine(self, stored: StoredObject, modified_before: float) -> bool:
+        if stored.modified >= modified_before:
+            return False
+        if not self.settings.upload_orphan_quarantine_days:
+            self.storage.delete(stored.key)
+            return True
+        try:
+            # The quarantine period runs from the move, not from when the file was written
+            self.storage.move(stored.key, QUARANTINE_PREFIX + stored.key)
+        except FileNotFoundError:
+            return False
+        logger.info("Quarantined orphaned upload %s", stored.key)
+        return True
+
+    def purge_quarantine(self) -> int:
+        """Delete files quarantined over ``UPLOAD_ORPHAN_QUARANTINE_DAYS`` ago; returns how many."""
+        cutoff = time.time() - self.settings.upload_orphan_quarantine_days * 86400
+        purged = 0
+        for stored in self.storage.iter_objects(prefix=QUARANTINE_PREFIX):
+            if stored.modified < cutoff:
+                self.storage.delete(stored.key)
+                purged += 1
+        if isinstance(self.storage, LocalStorage):
+            _remove_empty_directories(self.storage.root / QUARANTINE_PREFIX)
+        metrics.counter("uploads.quarantine_purged").inc(purged)
+        return purged
+
+
+def _staging_key(session_id: UUID) -> str:
+    return f"{INCOMING_PREFIX}{session_id}"
+
+
+def _remove_empty_directories(root: Path) -> None:
+    for directory, subdirectories, files in os.walk(root, topdown=False):
+        if directory != str(root):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                # Not empty
+                pass
+
+
+def _check_type(content_type: Optional[str], allowed_types: set) -> None:
+    if content_type not in allowed_types:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid file type. Allowed types: {', '.join(allowed_types)}",
+        )
+
+
+def _offset_conflict(upload: UploadSession, detail: str) -> HTTPException:
+    # Upload-Offset tells the client where to resume
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=detail,
+        headers={"Upload-Offset": str(upload.received_bytes)},
+    )
+
+
+def _write_at(path: Path, offset: int, data: bytes) -> None:
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o600)
+    try:
+        # Drops bytes written by an append whose commit failed
+        os.ftruncate(fd, offset)
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view, offset = view[written:], offset + written
+        # The offset is acknowledged once committed; the bytes must be on disk by then
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        while chunk := source.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _mark_derived(sha256: str) -> None:
+    with session_scope() as session:
+        UploadBlobRepository(session).mark_derived(sha256, dt.datetime.utcnow())
+
+
+def _write_chunk(buffer, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    buffer.write(chunk)
+
+
+def _discard(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -5,6 +5,7 @@ from uuid import UUID
 
 from sqlalchemy.orm import Session
 
+from app.core.security import get_profile_id_cache, get_token_cache
 from ..models import Worker, VerificationStatus
 from app.repositories import WorkerRepository
 from app.schemas import (
@@ -22,6 +23,8 @@ from app.schemas import (
     PaginationParams,
 )
 
+from .refresh_token_service import RefreshTokenService
+
 
 class WorkersService:
     def __init__(self, session: Session):
@@ -42,25 +45,20 @@ class WorkersService:
             if hasattr(payload, "model_dump")
             else payload.dict(exclude_unset=True)
         )
-        worker = Worker(**data)
-        self.repo.add(worker)
+        worker = self.repo.insert_returning(data)
         self.session.commit()
-        self.session.refresh(worker)
         return worker
 
     def update_worker(self, worker_id: UUID, payload: WorkerUpdate) -> Worker | None:
-        worker = self.repo.get_worker(worker_id)
-        if not worker:
-            return None
         data = (
             payload.model_dump(mode="json", exclude_unset=True)
             if hasattr(payload, "model_dump")
             else payload.dict(exclude_unset=True)
         )
-        for key, value in data.items():
-            setattr(worker, key, value)
+        worker = self.repo.update_worker(worker_id, data)
+        if not worker:
+            return None
         self.session.commit()
-        self.session.refresh(worker)
         return worker
 
     def delete_worker(self, worker_id: UUID) -> bool:
@@ -70,12 +68,15 @@ class WorkersService:
         
         user = worker.user
         if user:
+            RefreshTokenService(self.session).revoke_user(user.id, "user_deleted")
             self.session.delete(user)
         else:
             # If no user, delete the worker directly
             self.repo.delete(worker)
         
         self.session.commit()
+        get_token_cache().invalidate_subject(worker.user_id)
+        get_profile_id_cache().invalidate_user(worker.user_id)
         return True
 
     def add_experience(self, worker_id: UUID, payload: ExperienceCreate) -> ExperienceRead:
@@ -86,7 +87,6 @@ class WorkersService:
         )
         experience = self.repo.add_experience(worker_id, data)
         self.session.commit()
-        self.session.refresh(experience)
         return ExperienceRead.from_orm(experience)
 
     def list_experiences(self, worker_id: UUID) -> List[ExperienceRead]:
@@ -113,19 +113,15 @@ class WorkersService:
     def update_experience(
         self, worker_id: UUID, experience_id: UUID, payload: ExperienceUpdate
     ) -> ExperienceRead | None:
-        experience = self.repo.get_experience(worker_id, experience_id)
-        if not experience:
-            return None
-
         data = (
             payload.model_dump(mode="json", exclude_unset=True)
             if hasattr(payload, "model_dump")
             else payload.dict(exclude_unset=True)
         )
-        for key, value in data.items():
-            setattr(experience, key, value)
+        experience = self.repo.update_experience(worker_id, experience_id, data)
+        if not experience:
+            return None
         self.session.commit()
-        self.session.refresh(experience)
         return ExperienceRead.from_orm(experience)
 
     def delete_experience(self, worker_id: UUID, experience_id: UUID) -> bool:
@@ -144,7 +140,6 @@ class WorkersService:
         )
         credential = self.repo.add_credential(worker_id, data)
         self.session.commit()
-        self.session.refresh(credential)
         return WorkerCredentialRead.from_orm(credential)
 
     def list_credentials(self, worker_id: UUID) -> List[WorkerCredentialRead]:
@@ -170,17 +165,9 @@ class WorkersService:
         if "evidence_url" in data and data["evidence_url"] is not None:
             data["evidence_url"] = str(data["evidence_url"])
         data["status"] = VerificationStatus.PENDING
-        existing = self.repo.get_safety_check_by_tier(worker_id, data["tier"])
-        if existing:
-            for key, value in data.items():
-                setattr(existing, key, value)
-            self.session.commit()
-            self.session.refresh(existing)
-            return SafetyCheckRead.from_orm(existing)
-
-        safety_check = self.repo.add_safety_check(worker_id, data)
+        data.pop("worker_id", None)
+        safety_check = self.repo.upsert_safety_check(worker_id, data)
         self.session.commit()
-        self.session.refresh(safety_check)
         return SafetyCheckRead.from_orm(safety_check)
 
     def list_safety_checks(self, worker_id: UUID) -> List[SafetyCheckRead]:
@@ -0,0 +1,10 @@
+"""Performance benchmarks for the MedPost backend.
+
+Each module is runnable on its own, e.g. ``python -m benchmarks.write_paths``
+from the ``backend`` directory. Benchmarks that touch the database run inside
+an outer transaction that is rolled back, so they leave no rows behind.
+
+``auth_paths`` doubles as a regression gate: ``--check`` compares against the
+baseline stored under ``benchmarks/baselines`` and exits non-zero when a
+stage got slower.
+"""
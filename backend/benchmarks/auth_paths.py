@@ -0,0 +1,219 @@
+"""Per-stage and end-to-end timings for the auth flows, with a regression gate.
+
+Runs ``AuthService`` register, login, refresh and logout against the local
+Postgres with synthetic users (inside a rolled-back transaction), and times
+the stages they are built from: password hash/verify, JWT encode/decode,
+``set_last_login`` and the audit insert.
+
+    python -m benchmarks.auth_paths --iterations 50
+    python -m benchmarks.auth_paths --save-baseline      # record on this machine
+    python -m benchmarks.auth_paths --check              # exit 1 on regression
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime as dt
+import itertools
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+from uuid import uuid4
+
+import jwt
+from sqlalchemy.orm import Session
+
+from app.core import security
+from app.core.passwords import get_password_context, get_password_hasher
+from app.core.settings import get_settings
+from app.db.session import get_engine
+from app.models import AuthEventType, WorkerTitle
+from app.repositories import AuthAuditLogRepository, UserRepository
+from app.schemas import LoginRequest, LogoutRequest, RefreshRequest, WorkerRegistrationRequest
+from app.services import AuthService
+from app.services.audit_log_writer import AuditLogWriter
+
+from .baseline import BASELINE_DIR, compare, load_baseline, save_baseline
+from .common import Summary, measure, print_table, rollback_session, summarize
+
+PASSWORD = "Bench-Password-123"
+DEFAULT_BASELINE = BASELINE_DIR / "auth_paths.json"
+
+Case = Tuple[str, Callable[[], object]]
+
+
+def inline_audit_writer(session: Session) -> AuditLogWriter:
+    """Audit writer whose inserts join the benchmark's rolled-back transaction."""
+    settings = get_settings()
+    return AuditLogWriter(
+        lambda: Session(bind=session.bind, join_transaction_mode="create_savepoint"),
+        sync_events=settings.audit_log_sync_events,
+        batch_size=settings.audit_log_batch_size,
+        flush_interval=settings.audit_log_flush_interval_ms / 1000,
+        max_queue=settings.audit_log_queue_size,
+    )
+
+
+def stage_cases(session: Session, service: AuthService, loop: asyncio.AbstractEventLoop) -> List[Case]:
+    settings = get_settings()
+    context = get_password_context()
+    hasher = get_password_hasher()
+    hashed = context.hash(PASSWORD)
+    user = service.user_repo.get_by_email("bench-auth-seed@example.com")
+    users = UserRepository(session)
+    audit = AuthAuditLogRepository(session)
+
+    now = int(time.time())
+    claims = {
+        "sub": str(user.id),
+        "role": "WORKER",
+        "roles": ["WORKER"],
+        "iat": now,
+        "exp": now + 1800,
+        "type": "access",
+        "jti": str(uuid4()),
+    }
+    token = jwt.encode(claims, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+
+    def set_last_login():
+        users.set_last_login(user)
+        session.commit()
+
+    def audit_insert():
+        stamp = dt.datetime.utcnow()
+        audit.insert_many(
+            [
+                {
+                    "id": uuid4(),
+                    "user_id": user.id,
+                    "event_type": AuthEventType.LOGIN,
+                    "created_at": stamp,
+                    "updated_at": stamp,
+                }
+            ]
+        )
+        session.commit()
+
+    return [
+        ("stage: password hash (inline)", lambda: context.hash(PASSWORD)),
+        ("stage: password verify (inline)", lambda: context.verify(PASSWORD, hashed)),
+        (
+            "stage: password verify (pool)",
+            lambda: loop.run_until_complete(hasher.verify_and_update(PASSWORD, hashed)),
+        ),
+        (
+            "stage: jwt encode",
+            lambda: jwt.encode(claims, settings.jwt_secret_key, algorithm=settings.jwt_algorithm),
+        ),
+        ("stage: jwt decode (verify)", lambda: security._verify_jwt(token)),
+        ("stage: set_last_login", set_last_login),
+        ("stage: audit insert", audit_insert),
+    ]
+
+
+def flow_cases(service: AuthService, loop: asyncio.AbstractEventLoop) -> List[Case]:
+    counter = itertools.count()
+    sessions: List[str] = []
+    refreshed: List[str] = []
+    login = LoginRequest(email="bench-auth-seed@example.com", password=PASSWORD)
+
+    def register():
+        email = f"bench-auth-{uuid4().hex[:12]}-{next(counter)}@example.com"
+        payload = WorkerRegistrationRequest(
+            email=email, password=PASSWORD, full_name="Bench Auth", title=WorkerTitle.RN
+        )
+        loop.run_until_complete(service.register_worker(payload))
+
+    def login_worker():
+        pair = loop.run_until_complete(service.login_worker(login))
+        sessions.append(pair.refresh_token)
+
+    def refresh():
+        pair = service.refresh_session(RefreshRequest(refresh_token=sessions.pop()))
+        refreshed.append(pair.refresh_token)
+
+    def logout():
+        service.logout(LogoutRequest(refresh_token=refreshed.pop()))
+
+    # Order matters: login fills the refresh tokens refresh() rotates, and
+    # refresh() fills the ones logout() revokes.
+    return [
+        ("flow: register", register),
+        ("flow: login", login_worker),
+        ("flow: refresh", refresh),
+        ("flow: logout", logout),
+    ]
+
+
+def run(iterations: int) -> List[Summary]:
+    hasher = get_password_hasher()
+    hasher.start()
+    loop = asyncio.new_event_loop()
+    summaries = []
+    try:
+        with rollback_session(get_engine()) as session:
+            service = AuthService(session, audit=inline_audit_writer(session))
+            loop.run_until_complete(
+                service.register_worker(
+                    WorkerRegistrationRequest(
+                        email="bench-auth-seed@example.com",
+                        password=PASSWORD,
+                        full_name="Bench Auth",
+                        title=WorkerTitle.RN,
+                    )
+                )
+            )
+            for name, fn in stage_cases(session, service, loop):
+                summaries.append(summarize(name, measure(fn, iterations)))
+            for name, fn in flow_cases(service, loop):
+                # No warmup: each flow consumes what the previous one produced
+                summaries.append(summarize(name, measure(fn, iterations + 3, warmup=0)))
+    finally:
+        loop.close()
+        hasher.shutdown()
+    return summaries
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="Fail if slower than the baseline")
+    parser.add_argument("--p50-tolerance", type=float, default=0.25)
+    parser.add_argument("--p99-tolerance", type=float, default=1.0)
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=2.0, help="Ignore slowdowns smaller than this"
+    )
+    args = parser.parse_args()
+
+    summaries = run(args.iterations)
+    if args.save_baseline:
+        save_baseline(args.baseline, summaries)
+        print_table(summaries)
+        print(f"\nbaseline written to {args.baseline}")
+        return 0
+    if not args.check:
+        print_table(summaries)
+        return 0
+
+    failures = compare(
+        summaries,
+        load_baseline(args.baseline),
+        args.p50_tolerance,
+        args.p99_tolerance,
+        args.min_delta_ms,
+    )
+    if failures:
+        print("\nregressions:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\nno regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
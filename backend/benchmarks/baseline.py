@@ -0,0 +1,77 @@
+"""Stored baselines and the regression gate for benchmark summaries.
+
+A baseline is a JSON file of ``{name: {"p50_ms": ..., "p99_ms": ...}}`` plus
+a note of the machine it was recorded on. Numbers only compare meaningfully
+on the same hardware, so re-record the baseline (``--save-baseline``) when
+the CI runner or the Postgres version changes.
+"""
+
+from __future__ import annotations
+
+import json
+import platform
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from .common import Summary
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+
+def save_baseline(path: Path, summaries: Iterable[Summary]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": f"{platform.machine()} {platform.processor() or platform.system()}",
+        "python": platform.python_version(),
+        "results": {
+            summary.name: {"p50_ms": round(summary.p50_ms, 4), "p99_ms": round(summary.p99_ms, 4)}
+            for summary in summaries
+        },
+    }
+    path.write_text(json.dumps(data, indent=2) + "\n")
+
+
+def load_baseline(path: Path) -> Dict[str, Dict[str, float]]:
+    return json.loads(path.read_text())["results"]
+
+
+def compare(
+    summaries: Iterable[Summary],
+    baseline: Dict[str, Dict[str, float]],
+    p50_tolerance: float,
+    p99_tolerance: float,
+    min_delta_ms: float = 0.0,
+) -> List[str]:
+    """Print current vs baseline; return a message per regression found.
+
+    A stage regresses when its p50 exceeds the baseline by more than
+    ``p50_tolerance`` (0.25 = 25 %) or its p99 by more than ``p99_tolerance``,
+    and by at least ``min_delta_ms`` in absolute terms, so jitter on
+    sub-millisecond stages doesn't fail the gate. Stages missing from the baseline are reported but never fail the gate.
+    """
+    failures = []
+    print(
+        f"{'benchmark':<40} {'p50 ms':>9} {'base':>9} {'ratio':>6} "
+        f"{'p99 ms':>9} {'base':>9} {'ratio':>6}"
+    )
+    for summary in summaries:
+        base = baseline.get(summary.name)
+        if base is None:
+            print(f"{summary.name:<40} {summary.p50_ms:>9.3f} {'-':>9} {'new':>6}")
+            continue
+        p50_ratio = summary.p50_ms / base["p50_ms"] if base["p50_ms"] else 1.0
+        p99_ratio = summary.p99_ms / base["p99_ms"] if base["p99_ms"] else 1.0
+        flag = ""
+        if p50_ratio > 1 + p50_tolerance and summary.p50_ms - base["p50_ms"] >= min_delta_ms:
+            failures.append(f"{summary.name}: p50 {p50_ratio:.2f}x baseline")
+            flag = "  <-- p50"
+        if p99_ratio > 1 + p99_tolerance and summary.p99_ms - base["p99_ms"] >= min_delta_ms:
+            failures.append(f"{summary.name}: p99 {p99_ratio:.2f}x baseline")
+            flag += "  <-- p99"
+        print(
+            f"{summary.name:<40} {summary.p50_ms:>9.3f} {base['p50_ms']:>9.3f} {p50_ratio:>6.2f} "
+            f"{summary.p99_ms:>9.3f} {base['p99_ms']:>9.3f} {p99_ratio:>6.2f}{flag}"
+        )
+    return failures
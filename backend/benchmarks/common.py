@@ -0,0 +1,206 @@
+"""Shared helpers for the benchmark scripts."""
+
+from __future__ import annotations
+
+import statistics
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Generator, Iterable, List
+from uuid import uuid4
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.models import (
+    CompensationType,
+    EmploymentType,
+    Endorsement,
+    Facility,
+    Industry,
+    JobApplication,
+    JobPost,
+    User,
+    UserRole,
+    Worker,
+    WorkerTitle,
+)
+
+
+@dataclass
+class Summary:
+    name: str
+    samples: int
+    mean_ms: float
+    p50_ms: float
+    p99_ms: float
+    statements: float = 0.0
+
+    def row(self) -> str:
+        return (
+            f"{self.name:<40} {self.samples:>6} {self.mean_ms:>9.3f} "
+            f"{self.p50_ms:>9.3f} {self.p99_ms:>9.3f} {self.statements:>6.1f}"
+        )
+
+
+HEADER = f"{'benchmark':<40} {'n':>6} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'stmts':>6}"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(name: str, samples_ms: List[float], statements: float = 0.0) -> Summary:
+    return Summary(
+        name=name,
+        samples=len(samples_ms),
+        mean_ms=statistics.fmean(samples_ms),
+        p50_ms=percentile(samples_ms, 50),
+        p99_ms=percentile(samples_ms, 99),
+        statements=statements,
+    )
+
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int = 3) -> List[float]:
+    """Call ``fn`` repeatedly and return per-call latencies in milliseconds."""
+
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def print_table(summaries: Iterable[Summary]) -> None:
+    print(HEADER)
+    for summary in summaries:
+        print(summary.row())
+
+
+class StatementCounter:
+    """Counts SQL statements sent to the database through ``engine``."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args, **kwargs) -> None:
+        self.count += 1
+
+    def __enter__(self) -> "StatementCounter":
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+class DBAPITimer:
+    """Accumulates time spent inside cursor.execute() on ``engine``.
+
+    Subtracting this from wall-clock time leaves the Python-side cost of a
+    call: statement construction, cache-key generation, compilation and
+    result/ORM processing.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.seconds = 0.0
+        self._started = 0.0
+
+    def _before(self, *args, **kwargs) -> None:
+        self._started = time.perf_counter()
+
+    def _after(self, *args, **kwargs) -> None:
+        self.seconds += time.perf_counter() - self._started
+
+    def __enter__(self) -> "DBAPITimer":
+        event.listen(self.engine, "before_cursor_execute", self._before)
+        event.listen(self.engine, "after_cursor_execute", self._after)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._before)
+        event.remove(self.engine, "after_cursor_execute", self._after)
+
+
+@contextmanager
+def rollback_session(engine: Engine) -> Generator[Session, None, None]:
+    """Session whose commits become savepoints inside a rolled-back transaction."""
+
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(
+        bind=connection,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+
+
+def seed_fixture(session: Session) -> Dict[str, object]:
+    """Create one facility, worker, job post, application and endorsement."""
+
+    suffix = uuid4().hex[:12]
+    worker_user = User(
+        email=f"bench-worker-{suffix}@example.com",
+        hashed_password="!",
+        role=UserRole.WORKER,
+    )
+    facility_user = User(
+        email=f"bench-facility-{suffix}@example.com",
+        hashed_password="!",
+        role=UserRole.FACILITY,
+    )
+    session.add_all([worker_user, facility_user])
+    session.flush()
+
+    worker = Worker(
+        user_id=worker_user.id,
+        full_name="Bench Worker",
+        title=WorkerTitle.RN,
+        endorsement_count=1,
+        rank_score=1,
+    )
+    facility = Facility(
+        user_id=facility_user.id,
+        legal_name=f"Bench Facility {suffix}",
+        industry=Industry.HOSPITAL,
+    )
+    session.add_all([worker, facility])
+    session.flush()
+
+    job = JobPost(
+        facility_id=facility.id,
+        position_title="Bench RN",
+        employment_type=EmploymentType.FULL_TIME,
+        compensation_type=CompensationType.HOURLY,
+    )
+    session.add(job)
+    session.flush()
+
+    application = JobApplication(job_post_id=job.id, worker_id=worker.id)
+    endorsement = Endorsement(worker_id=worker.id, facility_id=facility.id)
+    session.add_all([application, endorsement])
+    session.commit()
+
+    return {
+        "worker_user": worker_user,
+        "facility_user": facility_user,
+        "worker": worker,
+        "facility": facility,
+        "job": job,
+        "application": application,
+        "endorsement": endorsement,
+    }
@@ -0,0 +1,83 @@
+"""Login email lookup: lower(email) = lower(:email) vs the unique index.
+
+Adds ``--users`` synthetic accounts inside a transaction that is rolled back
+at the end, then times the old case-folding predicate against
+``UserRepository.get_by_email`` and prints both query plans:
+
+    python -m benchmarks.email_lookup --users 1000000 --iterations 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+
+from sqlalchemy import bindparam, func, select, text
+from sqlalchemy.orm import Session
+
+from app.db.session import get_engine
+from app.models import User
+from app.repositories import UserRepository
+
+from .common import measure, print_table, rollback_session, summarize
+
+_LEGACY_BY_EMAIL = select(User).where(func.lower(User.email) == func.lower(bindparam("email")))
+
+
+def seed_users(session: Session, count: int) -> None:
+    session.execute(
+        text(
+            "INSERT INTO users (id, email, hashed_password, role, is_active, created_at, updated_at) "
+            "SELECT gen_random_uuid(), 'bench-' || g || '@example.com', '!', 'WORKER', true, "
+            "now(), now() FROM generate_series(1, :count) AS g"
+        ),
+        {"count": count},
+    )
+    session.execute(text("ANALYZE users"))
+
+
+def explain(session: Session, where: str, email: str) -> str:
+    plan = session.execute(
+        text(f"EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM users WHERE {where}"), {"email": email}
+    ).scalars()
+    return "\n".join(f"    {line}" for line in plan)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    with rollback_session(get_engine()) as session:
+        seed_users(session, args.users)
+        total = session.execute(select(func.count()).select_from(User)).scalar_one()
+        repo = UserRepository(session)
+        emails = [f"Bench-{random.randint(1, args.users)}@Example.com" for _ in range(64)]
+        picks = iter(emails * (args.iterations // len(emails) + 2))
+
+        def legacy():
+            session.execute(_LEGACY_BY_EMAIL, {"email": next(picks)}).scalars().first()
+
+        def indexed():
+            repo.get_by_email(next(picks))
+
+        legacy_ms = measure(legacy, max(1, args.iterations // 10))
+        indexed_ms = measure(indexed, args.iterations)
+
+        print(f"users in table: {total}")
+        print_table(
+            [
+                summarize("lower(email) = lower(:email)", legacy_ms),
+                summarize("email = :email (unique index)", indexed_ms),
+            ]
+        )
+        sample = emails[0]
+        print("\nlegacy plan:")
+        print(explain(session, "lower(email) = lower(:email)", sample))
+        print("\nindexed plan:")
+        print(explain(session, "email = :email", sample.lower()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""GET latency before and during a login storm against a running server.
+
+Registers (or reuses) one worker account, measures a cheap GET on its own,
+then measures it again while ``--concurrency`` clients log in as fast as they
+can. With password hashing off the request threadpool the two GET columns
+should stay close; 503s are logins turned away by the hashing queue limit.
+
+    uvicorn main:app --workers 1 &
+    python -m benchmarks.login_storm --base-url http://127.0.0.1:8000 --duration 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from uuid import uuid4
+
+from .common import HEADER, summarize
+
+
+def request(
+    url: str, body: Optional[dict] = None, timeout: float = 30.0
+) -> Tuple[int, float]:
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(
+        url, data=data, headers={"Content-Type": "application/json"} if data else {}
+    )
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            code = response.status
+    except urllib.error.HTTPError as exc:
+        code = exc.code
+    return code, (time.perf_counter() - started) * 1000
+
+
+def probe_gets(url: str, stop: threading.Event, interval: float) -> List[float]:
+    samples = []
+    while not stop.is_set():
+        code, elapsed = request(url)
+        if code < 500:
+            samples.append(elapsed)
+        time.sleep(interval)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email", help="Existing worker account (default: register one)")
+    parser.add_argument("--password", default="LoadTest123!")
+    parser.add_argument("--get-path", default="/api/v1/jobs/")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per phase")
+    parser.add_argument("--interval", type=float, default=0.05, help="Pause between GET probes")
+    args = parser.parse_args()
+
+    api = args.base_url.rstrip("/") + "/api/v1"
+    email = args.email
+    if not email:
+        email = f"storm-{uuid4().hex[:10]}@example.com"
+        code, _ = request(
+            f"{api}/auth/worker/register",
+            {
+                "email": email,
+                "password": args.password,
+                "full_name": "Login Storm",
+                "title": "REGISTERED NURSE",
+            },
+        )
+        if code != 201:
+            raise SystemExit(f"could not register {email}: HTTP {code}")
+
+    get_url = args.base_url.rstrip("/") + args.get_path
+    login_body = {"email": email, "password": args.password}
+
+    # Phase 1: GETs on an idle server
+    stop = threading.Event()
+    timer = threading.Timer(args.duration, stop.set)
+    timer.start()
+    idle = probe_gets(get_url, stop, args.interval)
+
+    # Phase 2: the same GETs while logins hammer the server
+    stop = threading.Event()
+    statuses: Counter = Counter()
+    login_ms: List[float] = []
+    lock = threading.Lock()
+
+    def storm() -> None:
+        while not stop.is_set():
+            code, elapsed = request(f"{api}/auth/worker/login", login_body)
+            with lock:
+                statuses[code] += 1
+                if code == 200:
+                    login_ms.append(elapsed)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency + 1) as pool:
+        for _ in range(args.concurrency):
+            pool.submit(storm)
+        probe = pool.submit(probe_gets, get_url, stop, args.interval)
+        time.sleep(args.duration)
+        stop.set()
+        busy = probe.result()
+
+    print(HEADER)
+    print(summarize(f"GET {args.get_path} idle", idle).row())
+    print(summarize(f"GET {args.get_path} during storm", busy).row())
+    if login_ms:
+        print(summarize("POST worker/login (200s)", login_ms).row())
+    print("login responses:", dict(sorted(statuses.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Per-call Python overhead of the 20 most frequently used repository methods.
+
+For each method the wall-clock time of a call is split into time spent inside
+the DBAPI (cursor.execute) and everything else -- statement construction,
+cache-key generation, SQL compilation, result and ORM processing. The second
+column is what the module-level statements in ``app/repositories`` reduce.
+
+Run with ``--no-compiled-cache`` to see the cost of compiling every statement
+from scratch, for comparison:
+
+    python -m benchmarks.repository_overhead --iterations 2000
+    python -m benchmarks.repository_overhead --iterations 2000 --no-compiled-cache
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.session import get_engine
+from app.models import FacilityCertificationCode, SafetyTier
+from app.repositories import (
+    EndorsementRepository,
+    FacilityRepository,
+    JobRepository,
+    RefreshTokenRepository,
+    UserRepository,
+    WorkerRepository,
+)
+from app.schemas import JobFilter, PaginationParams, WorkerFilter
+
+from .common import DBAPITimer, measure, rollback_session, seed_fixture
+
+Case = Tuple[str, Callable[[], object]]
+
+HEADER = (
+    f"{'method':<50} {'n':>6} {'wall us':>9} {'dbapi us':>9} {'python us':>10} {'python %':>9}"
+)
+
+
+def hot_methods(session: Session, fx: Dict[str, object]) -> List[Case]:
+    """The repository calls made on the busiest request paths, most frequent first."""
+
+    users = UserRepository(session)
+    tokens = RefreshTokenRepository(session)
+    workers = WorkerRepository(session)
+    facilities = FacilityRepository(session)
+    jobs = JobRepository(session)
+    endorsements = EndorsementRepository(session)
+
+    worker, facility, job = fx["worker"], fx["facility"], fx["job"]
+    application, endorsement = fx["application"], fx["endorsement"]
+    worker_user, facility_user = fx["worker_user"], fx["facility_user"]
+
+    page = PaginationParams()
+
+    return [
+        ("UserRepository.get_by_email", lambda: users.get_by_email(worker_user.email)),
+        ("RefreshTokenRepository.get_by_hash", lambda: tokens.get_by_hash("0" * 64)),
+        ("WorkerRepository.get_by_user_id", lambda: workers.get_by_user_id(worker_user.id)),
+        ("FacilityRepository.get_by_user_id", lambda: facilities.get_by_user_id(facility_user.id)),
+        ("WorkerRepository.get_worker", lambda: workers.get_worker(worker.id)),
+        ("JobRepository.get_job_for_facility", lambda: jobs.get_job_for_facility(job.id, facility.id)),
+        (
+            "EndorsementRepository.get_for_facility_and_worker",
+            lambda: endorsements.get_for_facility_and_worker(facility.id, worker.id),
+        ),
+        ("JobRepository.list_filtered", lambda: jobs.list_filtered(JobFilter(), page)),
+        ("WorkerRepository.list_filtered", lambda: workers.list_filtered(WorkerFilter(), page)),
+        (
+            "JobRepository.list_applications_for_worker",
+            lambda: jobs.list_applications_for_worker(worker.id),
+        ),
+        (
+            "JobRepository.list_applications_for_facility",
+            lambda: jobs.list_applications_for_facility(facility.id),
+        ),
+        (
+            "JobRepository.get_application_for_worker",
+            lambda: jobs.get_application_for_worker(application.id, worker.id),
+        ),
+        ("EndorsementRepository.list_for_worker", lambda: endorsements.list_for_worker(worker.id)),
+        (
+            "EndorsementRepository.list_for_facility",
+            lambda: endorsements.list_for_facility(facility.id),
+        ),
+        (
+            "EndorsementRepository.get_for_facility",
+            lambda: endorsements.get_for_facility(endorsement.id, facility.id),
+        ),
+        ("WorkerRepository.list_experiences", lambda: workers.list_experiences(worker.id)),
+        ("WorkerRepository.list_credentials", lambda: workers.list_credentials(worker.id)),
+        (
+            "WorkerRepository.get_safety_check_by_tier",
+            lambda: workers.get_safety_check_by_tier(worker.id, SafetyTier.TIER1),
+        ),
+        (
+            "FacilityRepository.list_certifications",
+            lambda: facilities.list_certifications(facility.id),
+        ),
+        (
+            "FacilityRepository.get_certification_by_code",
+            lambda: facilities.get_certification_by_code(
+                facility.id, FacilityCertificationCode.VERIFIED_BUSINESS
+            ),
+        ),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument(
+        "--no-compiled-cache",
+        action="store_true",
+        help="Disable SQLAlchemy's compiled statement cache for the run",
+    )
+    args = parser.parse_args()
+
+    engine = get_engine()
+    bind = engine.execution_options(compiled_cache=None) if args.no_compiled_cache else engine
+
+    print(HEADER)
+    with rollback_session(bind) as session:
+        fixture = seed_fixture(session)
+        for name, fn in hot_methods(session, fixture):
+            # Identity-map hits would hide ORM loading cost between iterations.
+            session.expunge_all()
+            with DBAPITimer(engine) as timer:
+                samples = measure(fn, args.iterations, warmup=20)
+            wall_us = statistics.fmean(samples) * 1000
+            dbapi_us = timer.seconds / (args.iterations + 20) * 1_000_000
+            python_us = max(0.0, wall_us - dbapi_us)
+            print(
+                f"{name:<50} {args.iterations:>6} {wall_us:>9.1f} {dbapi_us:>9.1f} "
+                f"{python_us:>10.1f} {python_us / wall_us * 100:>8.1f}%"
+            )
+
+
+if __name__ == "__main__":
+    main()
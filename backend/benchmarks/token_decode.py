@@ -0,0 +1,76 @@
+"""Per-request access-token overhead: full verification vs the verified-token cache.
+
+Mints a token the way AuthService does and times decode_jwt() with the cache
+disabled, on a cold cache, and on repeat requests with the same token (the
+common case for a mobile client loading one screen). No database needed:
+
+    python -m benchmarks.token_decode --iterations 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from typing import Callable, List
+from uuid import uuid4
+
+import jwt
+
+from app.core import security
+from app.core.settings import get_settings
+
+from .common import measure
+
+
+def mint_token() -> str:
+    settings = get_settings()
+    now = int(time.time())
+    payload = {
+        "sub": str(uuid4()),
+        "role": "WORKER",
+        "roles": ["WORKER"],
+        "worker_id": str(uuid4()),
+        "iat": now,
+        "exp": now + 1800,
+        "type": "access",
+    }
+    return jwt.encode(payload, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+
+
+def report(name: str, samples_ms: List[float], hit_rate: float) -> None:
+    ordered = sorted(samples_ms)
+    p50 = ordered[len(ordered) // 2] * 1000
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000
+    print(
+        f"{name:<34} {len(samples_ms):>7} {statistics.fmean(samples_ms) * 1000:>9.2f} "
+        f"{p50:>9.2f} {p99:>9.2f} {hit_rate:>9.1%}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    cache = security.get_token_cache()
+    token = mint_token()
+    fresh_tokens = iter([mint_token() for _ in range(args.iterations + 10)])
+
+    cases: List[tuple[str, Callable[[], object]]] = [
+        ("verify only (no cache)", lambda: security._verify_jwt(token)),
+        ("decode_jwt, new token each call", lambda: security.decode_jwt(next(fresh_tokens))),
+        ("decode_jwt, repeated token", lambda: security.decode_jwt(token)),
+    ]
+
+    print(f"{'case':<34} {'n':>7} {'mean us':>9} {'p50 us':>9} {'p99 us':>9} {'hit rate':>9}")
+    for name, fn in cases:
+        cache.clear()
+        hits, misses = cache.hits.value, cache.misses.value
+        samples = measure(fn, args.iterations, warmup=10)
+        hits, misses = cache.hits.value - hits, cache.misses.value - misses
+        report(name, samples, hits / (hits + misses) if hits + misses else 0.0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""Latency and statement count per write path: legacy ORM flow vs RETURNING.
+
+The legacy variants reproduce the SELECT -> setattr -> commit() -> refresh()
+sequence the services used before the single-statement write API; the
+returning variants call the current services. Run against a local Postgres:
+
+    python -m benchmarks.write_paths --iterations 200
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import date
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+
+from app.db.session import get_engine
+from app.models import (
+    Endorsement,
+    Experience,
+    JobApplication,
+    JobPost,
+    SafetyCheck,
+    SafetyTier,
+    VerificationStatus,
+    Worker,
+)
+from app.schemas import (
+    EndorsementUpdate,
+    ExperienceCreate,
+    JobApplicationUpdate,
+    JobPostUpdate,
+    SafetyCheckCreate,
+    WorkerUpdate,
+)
+from app.services import EndorsementsService, JobsService, WorkersService
+
+from .common import StatementCounter, measure, print_table, rollback_session, seed_fixture, summarize
+
+Case = Tuple[str, Callable[[], object]]
+
+
+def legacy_cases(session: Session, fx: Dict[str, object]) -> List[Case]:
+    worker, job = fx["worker"], fx["job"]
+    application, endorsement = fx["application"], fx["endorsement"]
+
+    def update_worker():
+        obj = session.execute(
+            select(Worker)
+            .where(Worker.id == worker.id)
+            .options(joinedload(Worker.user), joinedload(Worker.experiences))
+        ).unique().scalars().first()
+        obj.bio = "legacy"
+        session.commit()
+        session.refresh(obj)
+
+    def update_job():
+        obj = session.get(JobPost, job.id)
+        obj.description = "legacy"
+        session.commit()
+        session.refresh(obj)
+
+    def update_endorsement():
+        obj = session.execute(
+            select(Endorsement).where(
+                Endorsement.id == endorsement.id,
+                Endorsement.facility_id == endorsement.facility_id,
+            )
+        ).scalars().first()
+        obj.note = "legacy"
+        session.commit()
+        session.refresh(obj)
+
+    def update_application_status():
+        obj = session.get(JobApplication, application.id)
+        session.get(JobPost, obj.job_post_id)
+        obj.status = "REVIEWED"
+        session.commit()
+        session.refresh(obj)
+
+    def add_experience():
+        obj = Experience(worker_id=worker.id, company_name="Legacy", position_title="RN")
+        session.add(obj)
+        session.commit()
+        session.refresh(obj)
+        session.commit()
+        session.refresh(obj)
+
+    def submit_safety_check():
+        existing = session.execute(
+            select(SafetyCheck).where(
+                SafetyCheck.worker_id == worker.id, SafetyCheck.tier == SafetyTier.TIER1
+            )
+        ).scalars().first()
+        if existing:
+            existing.status = VerificationStatus.PENDING
+        else:
+            existing = SafetyCheck(
+                worker_id=worker.id, tier=SafetyTier.TIER1, status=VerificationStatus.PENDING
+            )
+            session.add(existing)
+        session.commit()
+        session.refresh(existing)
+
+    return [
+        ("update_worker", update_worker),
+        ("update_job", update_job),
+        ("update_endorsement", update_endorsement),
+        ("update_application_status", update_application_status),
+        ("add_experience", add_experience),
+        ("submit_safety_check", submit_safety_check),
+    ]
+
+
+def returning_cases(session: Session, fx: Dict[str, object]) -> List[Case]:
+    worker, job, facility = fx["worker"], fx["job"], fx["facility"]
+    application, endorsement = fx["application"], fx["endorsement"]
+    workers = WorkersService(session)
+    jobs = JobsService(session)
+    endorsements = EndorsementsService(session)
+
+    return [
+        ("update_worker", lambda: workers.update_worker(worker.id, WorkerUpdate(bio="returning"))),
+        (
+            "update_job",
+            lambda: jobs.update_job(job.id, facility.id, JobPostUpdate(description="returning")),
+        ),
+        (
+            "update_endorsement",
+            lambda: endorsements.update_endorsement(
+                endorsement.id, facility.id, EndorsementUpdate(note="returning")
+            ),
+        ),
+        (
+            "update_application_status",
+            lambda: jobs.update_application_status(
+                application.id, facility.id, JobApplicationUpdate(status="REVIEWED")
+            ),
+        ),
+        (
+            "add_experience",
+            lambda: workers.add_experience(
+                worker.id,
+                ExperienceCreate(
+                    company_name="Returning", position_title="RN", start_date=date(2020, 1, 1)
+                ),
+            ),
+        ),
+        (
+            "submit_safety_check",
+            lambda: workers.submit_safety_check(
+                worker.id,
+                SafetyCheckCreate(worker_id=worker.id, tier=SafetyTier.TIER1.value, status="PENDING"),
+            ),
+        ),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = get_engine()
+    summaries = []
+    for label, build_cases in (("legacy", legacy_cases), ("returning", returning_cases)):
+        with rollback_session(engine) as session:
+            fixture = seed_fixture(session)
+            for name, fn in build_cases(session, fixture):
+                with StatementCounter(engine) as counter:
+                    samples = measure(fn, args.iterations, warmup=0)
+                summaries.append(
+                    summarize(f"{label}:{name}", samples, counter.count / args.iterations)
+                )
+
+    # Statement counts include the SAVEPOINT/RELEASE pair each commit issues
+    # inside the rolled-back benchmark transaction.
+    print_table(sorted(summaries, key=lambda s: s.name.split(":", 1)[1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,9 @@ Initializes API connection with route
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1 import api_router
+from app.core.lifespan import lifespan
 
-app = FastAPI(title="MedPost API", version="1.0.0")
+app = FastAPI(title="MedPost API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,61 @@
+"""Denormalized endorsement_count and rank_score on workers
+
+Revision ID: 3c1d7e9a4b20
+Revises: 0a7788c58fc9
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1d7e9a4b20'
+down_revision: Union[str, None] = '0a7788c58fc9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Keep in sync with app.repositories.workers.ENDORSEMENT_RANK_DELTA
+ENDORSEMENT_RANK_DELTA = 1
+
+
+def upgrade() -> None:
+    op.add_column(
+        'workers',
+        sa.Column('endorsement_count', sa.Integer(), server_default='0', nullable=False),
+    )
+    op.add_column(
+        'workers',
+        sa.Column('rank_score', sa.Numeric(precision=8, scale=2), server_default='0', nullable=False),
+    )
+
+    op.execute(
+        sa.text(
+            """
+            UPDATE workers AS w
+            SET endorsement_count = e.total,
+                rank_score = e.total * :delta
+            FROM (
+                SELECT worker_id, count(*) AS total
+                FROM endorsements
+                GROUP BY worker_id
+            ) AS e
+            WHERE e.worker_id = w.id
+            """
+        ).bindparams(delta=ENDORSEMENT_RANK_DELTA)
+    )
+
+    op.create_index(
+        'ix_workers_title_city_rank',
+        'workers',
+        ['title', 'city', sa.text('rank_score DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_workers_title_city_rank', table_name='workers')
+    op.drop_column('workers', 'rank_score')
+    op.drop_column('workers', 'endorsement_count')
@@ -0,0 +1,62 @@
+"""Indexes for refresh token purge and revocation lookups
+
+Revision ID: 8e4f2a6c1d93
+Revises: 3c1d7e9a4b20
+Create Date: 2026-10-19 14:03:27.551902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4f2a6c1d93'
+down_revision: Union[str, None] = '3c1d7e9a4b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_refresh_tokens_expires_at'), 'refresh_tokens', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_refresh_tokens_revoked_at'), 'refresh_tokens', ['revoked_at'], unique=False)
+    op.create_index(
+        op.f('ix_refresh_tokens_replaced_by_token_id'),
+        'refresh_tokens',
+        ['replaced_by_token_id'],
+        unique=False,
+    )
+    # The purge deletes in batches; a batch may remove a token whose
+    # predecessor is left for a later one
+    op.drop_constraint(
+        op.f('fk_refresh_tokens_replaced_by_token_id_refresh_tokens'),
+        'refresh_tokens',
+        type_='foreignkey',
+    )
+    op.create_foreign_key(
+        op.f('fk_refresh_tokens_replaced_by_token_id_refresh_tokens'),
+        'refresh_tokens',
+        'refresh_tokens',
+        ['replaced_by_token_id'],
+        ['id'],
+        ondelete='SET NULL',
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(
+        op.f('fk_refresh_tokens_replaced_by_token_id_refresh_tokens'),
+        'refresh_tokens',
+        type_='foreignkey',
+    )
+    op.create_foreign_key(
+        op.f('fk_refresh_tokens_replaced_by_token_id_refresh_tokens'),
+        'refresh_tokens',
+        'refresh_tokens',
+        ['replaced_by_token_id'],
+        ['id'],
+    )
+    op.drop_index(op.f('ix_refresh_tokens_replaced_by_token_id'), table_name='refresh_tokens')
+    op.drop_index(op.f('ix_refresh_tokens_revoked_at'), table_name='refresh_tokens')
+    op.drop_index(op.f('ix_refresh_tokens_expires_at'), table_name='refresh_tokens')
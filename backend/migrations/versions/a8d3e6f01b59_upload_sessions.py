@@ -0,0 +1,43 @@
+"""upload_sessions for resumable uploads
+
+Revision ID: a8d3e6f01b59
+Revises: f5c2a9d87e14
+Create Date: 2026-10-19 22:14:05.612830
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d3e6f01b59'
+down_revision: Union[str, None] = 'f5c2a9d87e14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'upload_sessions',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('received_bytes', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_upload_sessions')),
+    )
+    op.create_index(
+        op.f('ix_upload_sessions_expires_at'), 'upload_sessions', ['expires_at'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_upload_sessions_expires_at'), table_name='upload_sessions')
+    op.drop_table('upload_sessions')
@@ -0,0 +1,37 @@
+"""workers.resume_search full-text index over resume text
+
+Revision ID: b4e9c07d3a52
+Revises: d2f7a4c19e86
+Create Date: 2026-10-20 00:32:48.105219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e9c07d3a52'
+down_revision: Union[str, None] = 'd2f7a4c19e86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('workers', sa.Column('resume_sha256', sa.String(length=64), nullable=True))
+    op.add_column('workers', sa.Column('resume_search', postgresql.TSVECTOR(), nullable=True))
+    op.create_index(
+        'ix_workers_resume_search',
+        'workers',
+        ['resume_search'],
+        unique=False,
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_workers_resume_search', table_name='workers', postgresql_using='gin')
+    op.drop_column('workers', 'resume_search')
+    op.drop_column('workers', 'resume_sha256')
@@ -0,0 +1,45 @@
+"""Store user emails lowercase so logins use the unique index
+
+Revision ID: b71c3e5f9a02
+Revises: 8e4f2a6c1d93
+Create Date: 2026-10-19 16:41:08.273145
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71c3e5f9a02'
+down_revision: Union[str, None] = '8e4f2a6c1d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Two accounts differing only in case can't both keep their address;
+    # stop and let an operator merge them rather than pick one silently.
+    clashes = bind.execute(
+        sa.text(
+            "SELECT lower(email), array_agg(email ORDER BY created_at) "
+            "FROM users GROUP BY lower(email) HAVING count(*) > 1"
+        )
+    ).all()
+    if clashes:
+        listed = "; ".join(f"{key}: {', '.join(emails)}" for key, emails in clashes[:20])
+        raise RuntimeError(
+            f"{len(clashes)} email address(es) are registered more than once "
+            f"with different case, resolve them before upgrading: {listed}"
+        )
+
+    op.execute("UPDATE users SET email = lower(email) WHERE email <> lower(email)")
+    op.create_check_constraint(
+        op.f('ck_users_email_lowercase'), 'users', 'email = lower(email)'
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint(op.f('ck_users_email_lowercase'), 'users', type_='check')
@@ -0,0 +1,61 @@
+"""document_analyses queue for verification documents
+
+Revision ID: c6e1f4a2d930
+Revises: a8d3e6f01b59
+Create Date: 2026-10-19 23:02:37.184402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e1f4a2d930'
+down_revision: Union[str, None] = 'a8d3e6f01b59'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+documentanalysisstatus = sa.Enum('PENDING', 'DONE', 'FAILED', name='documentanalysisstatus')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'document_analyses',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('status', documentanalysisstatus, server_default='PENDING', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('page_count', sa.Integer(), nullable=True),
+        sa.Column('extracted_text', sa.Text(), nullable=True),
+        sa.Column('preview_path', sa.String(length=255), nullable=True),
+        sa.Column('phash', sa.String(length=16), nullable=True),
+        sa.Column('error', sa.String(length=255), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['sha256'],
+            ['upload_blobs.sha256'],
+            name=op.f('fk_document_analyses_sha256_upload_blobs'),
+            ondelete='CASCADE',
+        ),
+        sa.PrimaryKeyConstraint('sha256', name=op.f('pk_document_analyses')),
+    )
+    op.create_index(
+        'ix_document_analyses_pending',
+        'document_analyses',
+        ['updated_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_document_analyses_pending',
+        table_name='document_analyses',
+        postgresql_where=sa.text("status = 'PENDING'"),
+    )
+    op.drop_table('document_analyses')
+    documentanalysisstatus.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,34 @@
+"""upload_scan_cursors for the orphaned-file scan
+
+Revision ID: d2f7a4c19e86
+Revises: c6e1f4a2d930
+Create Date: 2026-10-19 23:41:27.318562
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f7a4c19e86'
+down_revision: Union[str, None] = 'c6e1f4a2d930'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'upload_scan_cursors',
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('position', sa.Text(), server_default='', nullable=False),
+        sa.Column('pass_started_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name', name=op.f('pk_upload_scan_cursors')),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('upload_scan_cursors')
@@ -0,0 +1,71 @@
+"""last_active_at on workers and facilities for recency ordering
+
+Revision ID: d4a9c2e7b315
+Revises: b71c3e5f9a02
+Create Date: 2026-10-19 18:05:52.640317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a9c2e7b315'
+down_revision: Union[str, None] = 'b71c3e5f9a02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('workers', sa.Column('last_active_at', sa.DateTime(), nullable=True))
+    op.add_column('facilities', sa.Column('last_active_at', sa.DateTime(), nullable=True))
+
+    # Seed from the last login so existing profiles don't all start out idle
+    op.execute(
+        """
+        UPDATE workers AS w SET last_active_at = u.last_login_at
+        FROM users AS u WHERE u.id = w.user_id AND u.last_login_at IS NOT NULL
+        """
+    )
+    op.execute(
+        """
+        UPDATE facilities AS f SET last_active_at = u.last_login_at
+        FROM users AS u WHERE u.id = f.user_id AND u.last_login_at IS NOT NULL
+        """
+    )
+
+    op.drop_index('ix_workers_title_city_rank', table_name='workers')
+    op.create_index(
+        'ix_workers_title_city_rank',
+        'workers',
+        ['title', 'city', sa.text('rank_score DESC'), sa.text('last_active_at DESC NULLS LAST')],
+        unique=False,
+    )
+    op.create_index(
+        'ix_facilities_last_active',
+        'facilities',
+        [sa.text('last_active_at DESC NULLS LAST')],
+        unique=False,
+    )
+    op.create_index(
+        'ix_facilities_industry_last_active',
+        'facilities',
+        ['industry', sa.text('last_active_at DESC NULLS LAST')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_facilities_industry_last_active', table_name='facilities')
+    op.drop_index('ix_facilities_last_active', table_name='facilities')
+    op.drop_index('ix_workers_title_city_rank', table_name='workers')
+    op.create_index(
+        'ix_workers_title_city_rank',
+        'workers',
+        ['title', 'city', sa.text('rank_score DESC')],
+        unique=False,
+    )
+    op.drop_column('facilities', 'last_active_at')
+    op.drop_column('workers', 'last_active_at')
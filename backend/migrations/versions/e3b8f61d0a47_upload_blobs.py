@@ -0,0 +1,50 @@
+"""upload_blobs for content-addressed upload storage
+
+Revision ID: e3b8f61d0a47
+Revises: d4a9c2e7b315
+Create Date: 2026-10-19 19:32:14.905126
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b8f61d0a47'
+down_revision: Union[str, None] = 'd4a9c2e7b315'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'upload_blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('path', sa.String(length=255), nullable=False),
+        sa.Column('content_type', sa.String(length=100), nullable=False),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_uploaded_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('sha256', name=op.f('pk_upload_blobs')),
+        sa.UniqueConstraint('path', name=op.f('uq_upload_blobs_path')),
+    )
+    op.create_index(
+        'ix_upload_blobs_unreferenced',
+        'upload_blobs',
+        ['last_uploaded_at'],
+        unique=False,
+        postgresql_where=sa.text('ref_count = 0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_upload_blobs_unreferenced',
+        table_name='upload_blobs',
+        postgresql_where=sa.text('ref_count = 0'),
+    )
+    op.drop_table('upload_blobs')
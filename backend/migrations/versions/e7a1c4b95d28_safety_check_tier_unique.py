@@ -0,0 +1,42 @@
+"""one safety check per worker and tier
+
+Revision ID: e7a1c4b95d28
+Revises: b4e9c07d3a52
+Create Date: 2026-10-20 10:12:48.530214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a1c4b95d28'
+down_revision: Union[str, None] = 'b4e9c07d3a52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the most recently completed check of each tier (incomplete ones last)
+    op.execute(
+        """
+        DELETE FROM safety_checks
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY worker_id, tier
+                    ORDER BY completed_at DESC NULLS LAST, id
+                ) AS rank
+                FROM safety_checks
+            ) ranked
+            WHERE rank > 1
+        )
+        """
+    )
+    op.create_unique_constraint('uq_worker_tier_once', 'safety_checks', ['worker_id', 'tier'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_worker_tier_once', 'safety_checks', type_='unique')
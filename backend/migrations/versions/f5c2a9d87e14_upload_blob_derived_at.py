@@ -0,0 +1,38 @@
+"""upload_blobs.derived_at for image derivatives
+
+Revision ID: f5c2a9d87e14
+Revises: e3b8f61d0a47
+Create Date: 2026-10-19 21:08:41.377215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5c2a9d87e14'
+down_revision: Union[str, None] = 'e3b8f61d0a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('upload_blobs', sa.Column('derived_at', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_upload_blobs_underived',
+        'upload_blobs',
+        ['last_uploaded_at'],
+        unique=False,
+        postgresql_where=sa.text('derived_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_upload_blobs_underived',
+        table_name='upload_blobs',
+        postgresql_where=sa.text('derived_at IS NULL'),
+    )
+    op.drop_column('upload_blobs', 'derived_at')
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Render missing thumbnail/card/full WebP derivatives of uploaded images.
+
+The API runs one batch every ``IMAGE_BACKFILL_INTERVAL_MINUTES``; use this to
+catch up after an outage or when derivatives are first introduced:
+
+    python scripts/build_image_derivatives.py --batch-size 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from app.core.images import get_image_processor  # noqa: E402
+from app.db import session_scope  # noqa: E402
+from app.services import UploadService  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, help="Images rendered per pass")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    total = 0
+    try:
+        while True:
+            with session_scope() as session:
+                handled = UploadService(session).build_missing_derivatives(args.batch_size)
+            total += handled
+            if not handled:
+                break
+    finally:
+        get_image_processor().shutdown()
+    print(f"Processed {total} images in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
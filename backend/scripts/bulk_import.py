@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Bulk import workers, facilities or job posts from a CSV or NDJSON file.
+
+Usage:
+    python scripts/bulk_import.py workers staff.csv
+    python scripts/bulk_import.py job_posts posts.ndjson --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from app.db.session import get_session_factory  # noqa: E402
+from app.schemas import BulkImportFormat, BulkImportKind  # noqa: E402
+from app.services import BulkImportService  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("kind", choices=[kind.value for kind in BulkImportKind])
+    parser.add_argument("path", type=Path, help="CSV or NDJSON file ('-' for stdin)")
+    parser.add_argument(
+        "--format",
+        choices=[fmt.value for fmt in BulkImportFormat],
+        help="Input format (defaults to the file extension)",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Validate without inserting")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    if args.format:
+        fmt = BulkImportFormat(args.format)
+    elif args.path.suffix.lower() == ".csv":
+        fmt = BulkImportFormat.CSV
+    else:
+        fmt = BulkImportFormat.NDJSON
+
+    session = get_session_factory()()
+    started = time.perf_counter()
+    try:
+        service = BulkImportService(session, batch_size=args.batch_size)
+        if str(args.path) == "-":
+            report = service.run(BulkImportKind(args.kind), sys.stdin, fmt, args.dry_run)
+        else:
+            with args.path.open(encoding="utf-8", newline="") as stream:
+                report = service.run(BulkImportKind(args.kind), stream, fmt, args.dry_run)
+    finally:
+        session.close()
+    elapsed = time.perf_counter() - started
+
+    print(report.model_dump_json(indent=2))
+    print(
+        f"{report.total_rows} rows, {report.inserted} "
+        f"{'would be inserted' if report.dry_run else 'inserted'}, "
+        f"{report.rejected} rejected in {elapsed:.1f}s",
+        file=sys.stderr,
+    )
+    return 1 if report.rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Pick password hashing cost parameters that hit a target hash time.
+
+Run on the deployment hardware (ideally while it is otherwise idle) and copy
+the printed settings into the environment:
+
+    python scripts/calibrate_password_hashing.py --target-ms 250
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from passlib.context import CryptContext  # noqa: E402
+
+from app.core.settings import get_settings  # noqa: E402
+
+SAMPLE_PASSWORD = "calibration-password"
+
+
+def time_hash(context: CryptContext, samples: int) -> float:
+    """Median milliseconds per hash."""
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.hash(SAMPLE_PASSWORD)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate_argon2(
+    target_ms: float, memory_kib: int, parallelism: int, samples: int
+) -> tuple[int, int, float]:
+    """Raise time_cost until the target is reached, shrinking memory if even t=1 is too slow."""
+    while True:
+        time_cost, elapsed = 1, 0.0
+        while True:
+            context = CryptContext(
+                schemes=["argon2"],
+                argon2__type="ID",
+                argon2__rounds=time_cost,
+                argon2__memory_cost=memory_kib,
+                argon2__parallelism=parallelism,
+            )
+            elapsed = time_hash(context, samples)
+            print(f"  argon2id m={memory_kib} KiB t={time_cost} p={parallelism}: {elapsed:.1f} ms")
+            if elapsed >= target_ms or time_cost >= 20:
+                break
+            time_cost += 1
+        if time_cost > 1 or elapsed <= target_ms * 1.5 or memory_kib <= 8 * 1024:
+            return time_cost, memory_kib, elapsed
+        memory_kib //= 2
+
+
+def calibrate_bcrypt(target_ms: float, samples: int) -> tuple[int, float]:
+    """Smallest rounds value at or above the target (each extra round doubles the cost)."""
+    rounds = 10
+    while True:
+        context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+        elapsed = time_hash(context, samples)
+        print(f"  bcrypt rounds={rounds}: {elapsed:.1f} ms")
+        if elapsed >= target_ms or rounds >= 16:
+            return rounds, elapsed
+        rounds += 1
+
+
+def main() -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target-ms", type=float, default=250.0, help="Desired time per hash")
+    parser.add_argument(
+        "--memory-kib",
+        type=int,
+        default=settings.argon2_memory_cost,
+        help="Starting argon2 memory cost per hash (KiB)",
+    )
+    parser.add_argument("--parallelism", type=int, default=settings.argon2_parallelism)
+    parser.add_argument("--samples", type=int, default=5, help="Hashes timed per candidate")
+    parser.add_argument("--skip-bcrypt", action="store_true")
+    args = parser.parse_args()
+
+    print(f"Calibrating for {args.target_ms:.0f} ms per hash")
+    time_cost, memory_kib, argon2_ms = calibrate_argon2(
+        args.target_ms, args.memory_kib, args.parallelism, args.samples
+    )
+    if not args.skip_bcrypt:
+        rounds, bcrypt_ms = calibrate_bcrypt(args.target_ms, args.samples)
+
+    print()
+    print(f"# argon2id: {argon2_ms:.1f} ms per hash")
+    print(f"ARGON2_TIME_COST={time_cost}")
+    print(f"ARGON2_MEMORY_COST={memory_kib}")
+    print(f"ARGON2_PARALLELISM={args.parallelism}")
+    if not args.skip_bcrypt:
+        print(f"# bcrypt: {bcrypt_ms:.1f} ms per hash")
+        print(f"BCRYPT_ROUNDS={rounds}")
+    print(
+        f"# Each concurrent argon2 hash holds {memory_kib // 1024} MiB; budget "
+        f"PASSWORD_HASH_WORKERS x {memory_kib // 1024} MiB of RAM for the pool."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Recount upload references and delete unreferenced files and expired upload sessions.
+
+Stale temp and session files left in ``uploads/.incoming`` are deleted too.
+
+The API runs the same collection every ``UPLOAD_GC_INTERVAL_MINUTES``; use
+this to run it on demand or from cron:
+
+    python scripts/gc_uploads.py --batch-size 1000
+
+``--orphans`` also continues the scan for files nothing refers to (run every
+``UPLOAD_ORPHAN_SCAN_INTERVAL_MINUTES`` by the API), from where it last
+stopped:
+
+    python scripts/gc_uploads.py --orphans --max-batches 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from app.db import session_scope  # noqa: E402
+from app.services import UploadService  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, help="Blobs deleted per transaction")
+    parser.add_argument("--max-batches", type=int, help="Stop after this many batches")
+    parser.add_argument(
+        "--orphans", action="store_true", help="Also quarantine files nothing refers to"
+    )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with session_scope() as session:
+        service = UploadService(session)
+        expired = service.expire_sessions(batch_size=args.batch_size)
+        stale = service.purge_incoming()
+        deleted = service.collect_garbage(
+            batch_size=args.batch_size, max_batches=args.max_batches
+        )
+        quarantined = 0
+        if args.orphans:
+            quarantined = service.sweep_orphans(max_batches=args.max_batches)
+    print(
+        f"Deleted {deleted} unreferenced uploads, {expired} expired upload sessions"
+        f" and {stale} stale incoming files, quarantined {quarantined} orphaned files"
+        f" in {time.perf_counter() - started:.1f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Delete expired and long-revoked refresh tokens.
+
+The API runs the same purge every ``REFRESH_TOKEN_PURGE_INTERVAL_MINUTES``;
+use this to drain a large backlog once, or from cron when the API's own
+schedule is not wanted:
+
+    python scripts/purge_refresh_tokens.py --batch-size 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from app.db import session_scope  # noqa: E402
+from app.services import RefreshTokenService  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, help="Rows deleted per transaction")
+    parser.add_argument("--max-batches", type=int, help="Stop after this many batches")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with session_scope() as session:
+        deleted = RefreshTokenService(session).purge(
+            batch_size=args.batch_size, max_batches=args.max_batches
+        )
+    print(f"Deleted {deleted} refresh tokens in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
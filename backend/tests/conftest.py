@@ -0,0 +1,33 @@
+"""Shared fixtures.
+
+Tests that need Postgres take ``db`` and are skipped when ``DATABASE_URL``
+can't be reached; everything else runs without one.
+"""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.db import get_engine
+
+
+@pytest.fixture
+def db():
+    """Session whose commits become savepoints inside a rolled-back transaction."""
+    engine = get_engine()
+    try:
+        connection = engine.connect()
+    except OperationalError:
+        pytest.skip("database not reachable")
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        session.execute(text("SELECT 1"))
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
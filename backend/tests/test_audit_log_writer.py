@@ -0,0 +1,76 @@
+"""AuditLogWriter batching, inline fallback and shutdown drain (no database)."""
+
+from __future__ import annotations
+
+import threading
+
+from sqlalchemy.exc import IntegrityError
+
+from app.models import AuthEventType
+from app.services.audit_log_writer import AuditLogWriter
+
+
+class RecordingWriter(AuditLogWriter):
+    """Records each insert instead of writing it; rows marked ``bad`` fail."""
+
+    def __init__(self, **kwargs):
+        options = {"sync_events": (), "batch_size": 2, "flush_interval": 5.0, "max_queue": 100}
+        super().__init__(session_factory=None, **{**options, **kwargs})
+        self.inserts = []
+        self.threads = set()
+
+    def _insert(self, rows):
+        self.threads.add(threading.current_thread().name)
+        if any(row.get("bad") for row in rows):
+            raise IntegrityError("INSERT", {}, Exception("fk"))
+        self.inserts.append([row["n"] for row in rows])
+
+
+def rows(*numbers, **extra):
+    return [{"n": n, **extra} for n in numbers]
+
+
+def test_stopped_writer_writes_inline():
+    writer = RecordingWriter()
+    writer.submit(rows(1, 2))
+    assert writer.inserts == [[1, 2]]
+    assert writer.threads == {threading.current_thread().name}
+
+
+def test_full_queue_writes_the_rest_inline():
+    writer = RecordingWriter(max_queue=2)
+    writer._thread = threading.current_thread()  # started, but nothing consuming
+    inline = writer.inline.value
+
+    writer.submit(rows(1, 2, 3, 4))
+    assert writer.inserts == [[3, 4]]
+    assert writer.inline.value == inline + 2
+    assert [writer._queue.get_nowait()["n"] for _ in range(2)] == [1, 2]
+
+
+def test_queued_rows_are_batched_and_drained_on_stop():
+    writer = RecordingWriter(batch_size=2, flush_interval=60.0)
+    writer.start()
+    writer.submit(rows(1, 2, 3, 4, 5))
+    writer.stop()
+
+    assert [n for batch in writer.inserts for n in batch] == [1, 2, 3, 4, 5]
+    assert all(len(batch) <= 2 for batch in writer.inserts)
+    assert writer.threads == {"audit-log-writer"}
+    assert writer._thread is None
+
+
+def test_a_failing_row_is_dropped_alone():
+    writer = RecordingWriter(batch_size=10)
+    dropped = writer.dropped.value
+    writer.submit(rows(1) + rows(2, bad=True) + rows(3))
+
+    assert writer.inserts == [[1], [3]]
+    assert writer.dropped.value == dropped + 1
+
+
+def test_sync_events():
+    logout, login = AuthEventType.LOGOUT, AuthEventType.LOGIN
+    assert RecordingWriter(sync_events={logout.value}).is_synchronous(logout)
+    assert not RecordingWriter(sync_events={logout.value}).is_synchronous(login)
+    assert RecordingWriter(sync_events={"*"}).is_synchronous(login)
@@ -0,0 +1,66 @@
+"""Multi-index hashing of photo hashes, checked against a linear scan."""
+
+from __future__ import annotations
+
+import random
+import uuid
+
+import pytest
+
+from app.core.phash_index import (
+    MultiIndexHash,
+    PerceptualHashIndex,
+    PhotoOwner,
+    hamming,
+    is_informative,
+)
+
+
+def flip_bits(value: int, count: int, rng: random.Random) -> int:
+    for bit in rng.sample(range(64), count):
+        value ^= 1 << bit
+    return value
+
+
+@pytest.mark.parametrize("max_distance", [0, 3, 4, 8, 10])
+def test_search_finds_exactly_what_a_linear_scan_finds(max_distance):
+    rng = random.Random(max_distance)
+    bases = [rng.getrandbits(64) for _ in range(50)]
+    # Near copies of each base at every distance up to a little past the radius
+    values = bases + [
+        flip_bits(base, rng.randint(1, max_distance + 3), rng) for base in bases for _ in range(4)
+    ]
+    index: MultiIndexHash[int] = MultiIndexHash()
+    for item, value in enumerate(values):
+        index.add(value, item)
+
+    for query in bases + [rng.getrandbits(64) for _ in range(20)]:
+        expected = sorted(
+            (hamming(query, value), item)
+            for item, value in enumerate(values)
+            if hamming(query, value) <= max_distance
+        )
+        assert sorted(index.search(query, max_distance)) == expected
+
+
+def test_items_sharing_a_hash_are_all_returned():
+    index: MultiIndexHash[str] = MultiIndexHash()
+    index.add(0xF0F0F0F0F0F0F0F0, "a")
+    index.add(0xF0F0F0F0F0F0F0F0, "b")
+    index.add(0xF0F0F0F0F0F0F0F1, "c")
+
+    assert index.size == 3
+    assert sorted(index.search(0xF0F0F0F0F0F0F0F0, 1)) == [(0, "a"), (0, "b"), (1, "c")]
+    assert index.search(0x0F0F0F0F0F0F0F0F, 8) == []
+
+
+def test_near_uniform_hashes_are_neither_indexed_nor_searched():
+    owner = PhotoOwner("worker", uuid.uuid4(), "selfie_url", "0" * 64)
+    index = PerceptualHashIndex()
+    assert not is_informative(0) and not is_informative(2**64 - 1)
+
+    assert index.replace([("0000000000000000", owner), ("f0f0f0f0f0f0f0f0", owner)]) == 1
+    assert index.loaded
+    assert index.search("0000000000000001", 8) == []
+    assert index.search(None, 8) == []
+    assert index.search("f0f0f0f0f0f0f0f1", 8) == [(1, owner)]
@@ -0,0 +1,61 @@
+"""Recovery of the password-hashing and image process pools from a dead worker."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.core.images import ImageProcessor
+from app.core.passwords import PasswordHasher, get_password_context
+
+
+class FakeExecutor:
+    def __init__(self):
+        self.shutdowns = []
+
+    def shutdown(self, **kwargs):
+        self.shutdowns.append(kwargs)
+
+
+def test_password_pool_is_rebuilt_after_a_worker_dies():
+    hasher = PasswordHasher(get_password_context(), workers=1, max_pending=1)
+    try:
+        with pytest.raises(BrokenProcessPool):
+            asyncio.run(hasher._run(os._exit, 1))
+        assert hasher._executor is None
+        assert hasher.context.verify("secret", asyncio.run(hasher.hash("secret")))
+    finally:
+        hasher.shutdown()
+
+
+def test_image_pool_is_rebuilt_after_a_worker_dies():
+    processor = ImageProcessor(workers=1, max_pending=1, quality=80)
+    try:
+        with pytest.raises(BrokenProcessPool):
+            processor.call_sync(os._exit, 1)
+        assert processor._executor is None
+        assert processor.call_sync(os.getpid) != os.getpid()
+    finally:
+        processor.shutdown()
+
+
+@pytest.mark.parametrize("owner", ["passwords", "images"])
+def test_late_failure_from_a_replaced_pool_keeps_the_new_one(owner):
+    old, new = FakeExecutor(), FakeExecutor()
+    if owner == "passwords":
+        pool = PasswordHasher(get_password_context(), workers=1, max_pending=1)
+        drop = pool._drop_broken
+    else:
+        pool = ImageProcessor(workers=1, max_pending=1, quality=80)
+        drop = lambda executor: pool._failed(BrokenProcessPool(), executor)  # noqa: E731
+
+    pool._executor = new
+    drop(old)
+    assert pool._executor is new and new.shutdowns == []
+
+    drop(new)
+    assert pool._executor is None
+    assert new.shutdowns == [{"wait": False, "cancel_futures": True}]
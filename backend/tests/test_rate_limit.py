@@ -0,0 +1,101 @@
+"""Token-bucket rate limiting with the in-memory store."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import rate_limit
+from app.core.rate_limit import MemoryRateLimitStore, RateLimit, RateLimiter
+
+PER_SECOND = RateLimit("test", per_minute=60, burst=2)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    # Only this module's clock; the event loop keeps the real one
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def take(store, key, limit=PER_SECOND):
+    return asyncio.run(store.take(key, limit))
+
+
+def test_bucket_allows_a_burst_then_refills(clock):
+    store = MemoryRateLimitStore(max_keys=10)
+    assert [take(store, "k") for _ in range(2)] == [0.0, 0.0]
+    assert take(store, "k") == pytest.approx(1.0)
+
+    clock[0] += 0.5
+    assert take(store, "k") == pytest.approx(0.5)
+    clock[0] += 0.5
+    assert take(store, "k") == 0.0
+    # Other keys have their own bucket
+    assert take(store, "other") == 0.0
+
+
+def test_refill_is_capped_at_the_burst(clock):
+    store = MemoryRateLimitStore(max_keys=10)
+    take(store, "k")
+    clock[0] += 3600
+    assert [take(store, "k") for _ in range(3)][-1] > 0
+
+
+def test_least_recently_used_bucket_is_evicted(clock):
+    store = MemoryRateLimitStore(max_keys=1)
+    take(store, "a")
+    take(store, "a")
+    take(store, "b")
+    # "a" was evicted, so it starts from a full bucket again
+    assert take(store, "a") == 0.0
+
+
+class FailingStore:
+    async def take(self, key, limit):
+        raise ConnectionError("redis down")
+
+
+class RecordingStore:
+    def __init__(self, waits):
+        self.waits = waits
+        self.keys = []
+
+    async def take(self, key, limit):
+        self.keys.append(key)
+        return self.waits.get(key, 0.0)
+
+
+def limiter(store, enabled=True):
+    limits = {
+        name: RateLimit(name, per_minute=60, burst=2)
+        for name in ("login_ip", "login_email", "register_ip")
+    }
+    return RateLimiter(store, limits, enabled=enabled)
+
+
+def test_check_stops_at_the_first_empty_bucket():
+    store = RecordingStore({"login_ip:1.2.3.4": 3.0})
+    assert asyncio.run(limiter(store).check_login("1.2.3.4", "a@example.com")) == 3.0
+    # The per-email bucket was not charged
+    assert store.keys == ["login_ip:1.2.3.4"]
+
+
+def test_login_email_is_normalized_and_missing_ip_skipped():
+    store = RecordingStore({})
+    asyncio.run(limiter(store).check_login(None, "  Someone@Example.COM "))
+    assert store.keys == ["login_email:someone@example.com"]
+
+
+def test_store_outage_and_disabled_limiter_let_requests_through():
+    failing = limiter(FailingStore())
+    errors = failing.store_errors.value
+    assert asyncio.run(failing.check_register("1.2.3.4")) == 0.0
+    assert failing.store_errors.value == errors + 1
+
+    store = RecordingStore({"register_ip:1.2.3.4": 5.0})
+    assert asyncio.run(limiter(store, enabled=False).check_register("1.2.3.4")) == 0.0
+    assert store.keys == []
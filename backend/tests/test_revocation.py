@@ -0,0 +1,169 @@
+"""Access-token revocation: the in-process store and its database sync."""
+
+from __future__ import annotations
+
+import datetime as dt
+import time
+import uuid
+from contextlib import contextmanager
+
+from app.core import lifespan
+from app.core.revocation import RevocationStore
+from app.models import RefreshToken, User, UserRole
+from app.services import RefreshTokenService
+
+
+# ----------------------------------------------------------------------
+# RevocationStore
+# ----------------------------------------------------------------------
+def test_jti_is_revoked_until_its_expiry():
+    store = RevocationStore()
+    store.revoke("a", expires_at=100.0)
+
+    assert store.is_revoked("a", now=99.9)
+    assert not store.is_revoked("a", now=100.0)
+    assert not store.is_revoked("b", now=0.0)
+
+
+def test_revoke_many_keeps_the_later_expiry():
+    store = RevocationStore()
+    store.revoke_many([("a", 100.0), ("b", 50.0)])
+    store.revoke_many([("a", 80.0), ("b", 70.0)])
+
+    assert store.is_revoked("a", now=90.0)
+    assert store.is_revoked("b", now=60.0)
+
+
+def test_replace_swaps_in_a_fresh_load():
+    store = RevocationStore()
+    store.revoke("stale", 100.0)
+    store.replace([("a", 50.0), ("a", 80.0), ("b", 60.0)])
+
+    assert not store.is_revoked("stale", now=0.0)
+    assert store.is_revoked("a", now=70.0)
+    assert len(store) == 2
+
+
+def test_prune_drops_expired_entries():
+    store = RevocationStore()
+    store.revoke_many([("old", 10.0), ("live", 100.0)])
+
+    assert store.prune(now=10.0) == 1
+    assert len(store) == 1 and store.is_revoked("live", now=10.0)
+
+
+# ----------------------------------------------------------------------
+# RevocationSync
+# ----------------------------------------------------------------------
+def test_sync_loads_once_then_adds_with_an_overlap(monkeypatch):
+    calls = []
+
+    class Service:
+        def __init__(self, session):
+            pass
+
+        def load_revocations(self):
+            calls.append("load")
+
+        def sync_revocations(self, since):
+            calls.append(since)
+
+    @contextmanager
+    def session_scope():
+        yield None
+
+    monkeypatch.setattr(lifespan, "RefreshTokenService", Service)
+    monkeypatch.setattr(lifespan, "session_scope", session_scope)
+    sync = lifespan.RevocationSync(interval_seconds=30)
+
+    sync()
+    first = sync.synced_at
+    sync()
+    assert calls == ["load", first - dt.timedelta(seconds=30)]
+    assert sync.synced_at >= first
+
+
+# ----------------------------------------------------------------------
+# Database sync
+# ----------------------------------------------------------------------
+def make_user(db) -> User:
+    user = User(
+        email=f"{uuid.uuid4().hex}@example.com",
+        hashed_password="x",
+        role=UserRole.FACILITY,
+    )
+    user.refresh_tokens.append(
+        RefreshToken(
+            token_hash=uuid.uuid4().hex,
+            expires_at=dt.datetime.utcnow() + dt.timedelta(days=1),
+        )
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_deleted_users_tokens_stay_revoked_in_other_processes(db):
+    user = make_user(db)
+    jti = str(user.refresh_tokens[0].id)
+
+    local = RevocationStore()
+    assert RefreshTokenService(db, local).revoke_user(user.id, "user_deleted") == 1
+    db.delete(user)
+    db.commit()
+    assert db.get(RefreshToken, uuid.UUID(jti)) is None
+    assert local.is_revoked(jti, time.time())
+
+    # Another process: a fresh load, and an incremental sync
+    loaded, synced = RevocationStore(), RevocationStore()
+    RefreshTokenService(db, loaded).load_revocations()
+    RefreshTokenService(db, synced).sync_revocations(
+        dt.datetime.now(dt.timezone.utc) - dt.timedelta(minutes=1)
+    )
+    assert loaded.is_revoked(jti, time.time())
+    assert synced.is_revoked(jti, time.time())
+
+
+def test_purge_drops_expired_revoked_tokens(db):
+    user = make_user(db)
+    jti = user.refresh_tokens[0].id
+    service = RefreshTokenService(db, RevocationStore())
+    service.revoke_user(user.id, "user_deleted")
+    db.delete(user)
+    db.commit()
+
+    past = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=1)
+    service.repo.add_revoked_tokens([uuid.uuid4()], past, past)
+    db.commit()
+    service.purge()
+    since = past - dt.timedelta(days=1)
+    remaining = service.repo.revoked_tokens(since, dt.datetime.now(dt.timezone.utc))
+    assert [row[0] for row in remaining] == [jti]
+
+
+def test_logout_revokes_the_session_and_its_live_predecessor(db):
+    user = make_user(db)
+    rotated = user.refresh_tokens[0]
+    current = RefreshToken(
+        user_id=user.id,
+        token_hash=uuid.uuid4().hex,
+        expires_at=dt.datetime.utcnow() + dt.timedelta(days=1),
+    )
+    db.add(current)
+    db.flush()
+    now = dt.datetime.now(dt.timezone.utc)
+    rotated.revoked_at, rotated.revoked_reason = now, "rotated"
+    rotated.replaced_by_token_id = current.id
+    current.revoked_at, current.revoked_reason = now, "user_logout"
+    db.commit()
+
+    local = RevocationStore()
+    local.revoke("kept", time.time() + 600)
+    RefreshTokenService(db, local).revoke_session(current.id)
+    assert local.is_revoked(str(current.id), time.time())
+    assert local.is_revoked(str(rotated.id), time.time())
+
+    # A sync adds other processes' revocations to what is already known
+    RefreshTokenService(db, local).sync_revocations(now - dt.timedelta(minutes=1))
+    assert local.is_revoked("kept", time.time())
+    assert local.is_revoked(str(current.id), time.time())
@@ -0,0 +1,208 @@
+"""S3 storage and direct uploads, against moto's S3 server.
+
+Run from the ``backend`` directory with ``python -m pytest tests``; needs the
+packages in ``requirements-dev.txt``. The direct-upload tests also use the
+``db`` fixture from ``conftest.py`` and are skipped without a database.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import socket
+import urllib.request
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from app.core.static_files import UploadRedirects
+from app.core.storage import IMMUTABLE, S3Storage
+from app.services import UploadService
+
+ThreadedMotoServer = pytest.importorskip("moto.server").ThreadedMotoServer
+
+BUCKET = "medpost-test"
+PDF = {"application/pdf"}
+
+
+@pytest.fixture(scope="module")
+def endpoint():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+    server.start()
+    yield f"http://127.0.0.1:{port}"
+    server.stop()
+
+
+@pytest.fixture
+def storage(endpoint):
+    storage = S3Storage(
+        BUCKET,
+        endpoint_url=endpoint,
+        region="us-east-1",
+        access_key_id="test",
+        secret_access_key="test",
+    )
+    storage.client.create_bucket(Bucket=BUCKET)
+    yield storage
+    for item in storage.client.list_objects_v2(Bucket=BUCKET).get("Contents", ()):
+        storage.client.delete_object(Bucket=BUCKET, Key=item["Key"])
+    storage.client.delete_bucket(Bucket=BUCKET)
+
+
+def put_object(storage: S3Storage, key: str, body: bytes = b"x") -> None:
+    storage.client.put_object(Bucket=BUCKET, Key=key, Body=body)
+
+
+def send(presigned, body: bytes) -> int:
+    request = urllib.request.Request(
+        presigned.url, data=body, method=presigned.method, headers=presigned.headers
+    )
+    with urllib.request.urlopen(request) as response:
+        return response.status
+
+
+def document(label: str = "") -> bytes:
+    return f"%PDF-1.4 {label} {uuid.uuid4().hex}".encode()
+
+
+# ----------------------------------------------------------------------
+# Storage operations
+# ----------------------------------------------------------------------
+def test_iter_objects_in_key_order_without_work_areas(storage):
+    keys = ["ab/cd/2.png", "legacy.jpg", "ab/cd/1.png", "0a/x.png"]
+    for key in keys + [".incoming/s", ".quarantine/ab/q.png"]:
+        put_object(storage, key)
+
+    listed = [item.key for item in storage.iter_objects()]
+    assert listed == sorted(keys)
+    assert [item.key for item in storage.iter_objects("ab/cd/1.png")] == listed[2:]
+    assert [item.key for item in storage.iter_objects(prefix=".quarantine/")] == [
+        ".quarantine/ab/q.png"
+    ]
+    assert [item.key for item in storage.iter_objects(prefix=".incoming/")] == [".incoming/s"]
+
+
+def test_put_file_and_move_into_quarantine(storage, tmp_path):
+    source = tmp_path / "upload.png"
+    source.write_bytes(b"png bytes")
+    storage.put_file(str(source), "ab/cd/x.png", "image/png")
+    assert not source.exists()
+    head = storage.client.head_object(Bucket=BUCKET, Key="ab/cd/x.png")
+    assert (head["ContentType"], head["CacheControl"]) == ("image/png", IMMUTABLE)
+
+    storage.move("ab/cd/x.png", ".quarantine/ab/cd/x.png")
+    assert not storage.exists("ab/cd/x.png")
+    assert storage.stat(".quarantine/ab/cd/x.png").size == len(b"png bytes")
+    with storage.reading(".quarantine/ab/cd/x.png") as path:
+        assert open(path, "rb").read() == b"png bytes"
+    with pytest.raises(FileNotFoundError):
+        storage.move("ab/cd/x.png", "ab/cd/y.png")
+
+
+def test_presigned_put_signs_length_and_checksum(storage):
+    body = document()
+    sha256 = hashlib.sha256(body).hexdigest()
+    presigned = storage.presign_upload(".incoming/p", "application/pdf", len(body), sha256, 60)
+    assert presigned.headers["Content-Length"] == str(len(body))
+    assert "content-length" in presigned.url and "x-amz-checksum-sha256" in presigned.url
+
+    assert send(presigned, body) == 200
+    assert storage.stat(".incoming/p").size == len(body)
+
+
+def test_uploads_redirect_to_presigned_url(storage):
+    put_object(storage, "ab/cd/x.png", b"png bytes")
+    redirects = UploadRedirects()
+    redirects.storage = storage
+
+    response = asyncio.run(redirects.get_response("ab/cd/x.png", {"method": "GET"}))
+    assert response.status_code == 307
+    assert response.headers["cache-control"].startswith("private, max-age=")
+    with urllib.request.urlopen(response.headers["location"]) as fetched:
+        assert fetched.read() == b"png bytes"
+
+    for path, method, status in [(".incoming/s", "GET", 404), ("ab/cd/x.png", "POST", 405)]:
+        with pytest.raises(StarletteHTTPException) as raised:
+            asyncio.run(redirects.get_response(path, {"method": method}))
+        assert raised.value.status_code == status
+
+
+# ----------------------------------------------------------------------
+# Direct uploads
+# ----------------------------------------------------------------------
+def test_direct_upload_is_stored_under_its_digest(storage, db):
+    service = UploadService(db, storage)
+    body = document("resume")
+    sha256 = hashlib.sha256(body).hexdigest()
+
+    url, upload, presigned = service.create_direct_upload(
+        "application/pdf", "cv.pdf", len(body), sha256, PDF
+    )
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(service.finish_direct_upload(upload.id))
+    assert raised.value.status_code == 409
+
+    send(presigned, body)
+    stored_url, filename, content_type = asyncio.run(service.finish_direct_upload(upload.id))
+    assert (stored_url, filename, content_type) == (url, "cv.pdf", "application/pdf")
+    assert storage.exists(url[len("/uploads/"):])
+    assert not storage.exists(f".incoming/{upload.id}")
+
+    # Already stored: nothing to send
+    assert service.create_direct_upload(
+        "application/pdf", "cv.pdf", len(body), sha256, PDF
+    ) == (url, None, None)
+
+
+@pytest.mark.parametrize(
+    "staged, detail",
+    [(b"much longer than declared", "Size mismatch"), (b"same size", "Checksum mismatch")],
+)
+def test_direct_upload_mismatch_discards_the_object(storage, db, monkeypatch, staged, detail):
+    service = UploadService(db, storage)
+    declared = b"same-size"
+    _, upload, _ = service.create_direct_upload(
+        "application/pdf", "x.pdf", len(declared), hashlib.sha256(declared).hexdigest(), PDF
+    )
+    # moto doesn't enforce the signed length and checksum, as S3 would
+    staging = f".incoming/{upload.id}"
+    put_object(storage, staging, staged)
+    if detail == "Size mismatch":
+        # The wrong size is caught before anything is downloaded
+        monkeypatch.setattr(storage, "reading", None)
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(service.finish_direct_upload(upload.id))
+    assert (raised.value.status_code, raised.value.detail.split(";")[0]) == (400, detail)
+    assert not storage.exists(staging)
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(service.finish_direct_upload(upload.id))
+    assert raised.value.status_code == 404
+
+
+def test_staging_objects_without_a_session_are_purged(storage, db):
+    service = UploadService(db, storage)
+    body = document()
+    _, upload, presigned = service.create_direct_upload(
+        "application/pdf", "x.pdf", len(body), hashlib.sha256(body).hexdigest(), PDF
+    )
+    send(presigned, body)
+    stale = f".incoming/{uuid.uuid4()}"
+    put_object(storage, stale)
+    put_object(storage, ".incoming/not-a-session")
+
+    assert service.purge_staged_uploads() == 2
+    assert [item.key for item in storage.iter_objects(prefix=".incoming/")] == [
+        f".incoming/{upload.id}"
+    ]
+
+    # A PUT after cancelling recreates the object; the next purge removes it
+    service.cancel_session(upload.id)
+    assert not storage.exists(f".incoming/{upload.id}")
+    send(presigned, body)
+    assert service.purge_staged_uploads() == 1
@@ -0,0 +1,148 @@
+"""VerifiedTokenCache, ProfileIdCache and decode_jwt's use of them."""
+
+from __future__ import annotations
+
+import time
+import uuid
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.revocation import get_revocation_store
+from app.core.security import ProfileIdCache, VerifiedTokenCache
+from app.core.settings import get_settings
+
+
+def payload(sub: str = "u1", exp: float = 10_000.0, **claims) -> dict:
+    return {"sub": sub, "exp": exp, **claims}
+
+
+def mint_token(**claims) -> str:
+    settings = get_settings()
+    now = int(time.time())
+    body = {"sub": str(uuid.uuid4()), "iat": now, "exp": now + 600, "jti": str(uuid.uuid4())}
+    return jwt.encode({**body, **claims}, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
+
+
+# ----------------------------------------------------------------------
+# VerifiedTokenCache
+# ----------------------------------------------------------------------
+def test_entry_is_served_until_its_ttl():
+    cache = VerifiedTokenCache(max_entries=10, ttl_seconds=30)
+    cache.put(b"k", payload(), now=100.0)
+
+    assert cache.get(b"k", now=129.9) == payload()
+    assert cache.get(b"k", now=130.0) is None
+    # An expired entry is removed, not just skipped
+    assert cache.get(b"k", now=100.0) is None
+
+
+def test_entry_never_outlives_the_token_exp():
+    cache = VerifiedTokenCache(max_entries=10, ttl_seconds=30)
+    cache.put(b"soon", payload(exp=110.0), now=100.0)
+    cache.put(b"gone", payload(exp=100.0), now=100.0)
+
+    assert cache.get(b"soon", now=109.0) is not None
+    assert cache.get(b"soon", now=110.0) is None
+    assert cache.get(b"gone", now=100.0) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = VerifiedTokenCache(max_entries=2, ttl_seconds=30)
+    cache.put(b"a", payload("a"), now=0.0)
+    cache.put(b"b", payload("b"), now=0.0)
+    cache.get(b"a", now=1.0)
+    evictions = cache.evictions.value
+    cache.put(b"c", payload("c"), now=1.0)
+
+    assert cache.evictions.value == evictions + 1
+    assert cache.get(b"b", now=1.0) is None
+    assert cache.get(b"a", now=1.0) is not None
+    assert cache.get(b"c", now=1.0) is not None
+    assert "b" not in cache._by_subject
+
+
+def test_disabled_cache_stores_nothing():
+    cache = VerifiedTokenCache(max_entries=0, ttl_seconds=30)
+    cache.put(b"k", payload(), now=0.0)
+    assert cache.get(b"k", now=0.0) is None
+
+
+def test_invalidate_subject_drops_only_that_subjects_tokens():
+    cache = VerifiedTokenCache(max_entries=10, ttl_seconds=30)
+    cache.put(b"u1-phone", payload("u1"), now=0.0)
+    cache.put(b"u1-laptop", payload("u1"), now=0.0)
+    cache.put(b"u2", payload("u2"), now=0.0)
+
+    cache.invalidate_subject("u1")
+    assert cache.get(b"u1-phone", now=1.0) is None
+    assert cache.get(b"u1-laptop", now=1.0) is None
+    assert cache.get(b"u2", now=1.0) is not None
+    assert list(cache._by_subject) == ["u2"]
+    # Nothing cached for the subject: a no-op
+    cache.invalidate_subject("u3")
+
+
+def test_hit_rate():
+    cache = VerifiedTokenCache(max_entries=10, ttl_seconds=30)
+    hits, misses = cache.hits.value, cache.misses.value
+    cache.put(b"k", payload(), now=0.0)
+    cache.get(b"k", now=1.0)
+    cache.get(b"other", now=1.0)
+    assert (cache.hits.value - hits, cache.misses.value - misses) == (1, 1)
+
+
+# ----------------------------------------------------------------------
+# decode_jwt
+# ----------------------------------------------------------------------
+def test_revoked_token_is_rejected_even_when_cached():
+    token = mint_token()
+    decoded = security.decode_jwt(token)
+    assert security.get_token_cache().get(
+        security.VerifiedTokenCache.digest(token), time.time()
+    ) is not None
+
+    get_revocation_store().revoke(decoded["jti"], time.time() + 600)
+    with pytest.raises(HTTPException) as raised:
+        security.decode_jwt(token)
+    assert (raised.value.status_code, raised.value.detail) == (401, "Token has been revoked")
+
+
+def test_bad_signature_is_not_cached():
+    token = mint_token()[:-2] + "xx"
+    with pytest.raises(HTTPException):
+        security.decode_jwt(token)
+    assert security.get_token_cache().get(
+        security.VerifiedTokenCache.digest(token), time.time()
+    ) is None
+
+
+# ----------------------------------------------------------------------
+# ProfileIdCache
+# ----------------------------------------------------------------------
+def test_profile_ids_expire_and_are_invalidated_per_user():
+    cache = ProfileIdCache(max_entries=10, ttl_seconds=60)
+    user, other = uuid.uuid4(), uuid.uuid4()
+    worker_id, facility_id = uuid.uuid4(), uuid.uuid4()
+    cache.put("worker", user, worker_id, now=0.0)
+    cache.put("facility", other, facility_id, now=0.0)
+
+    assert cache.get("worker", user, now=59.0) == worker_id
+    assert cache.get("facility", user, now=1.0) is None
+    assert cache.get("worker", user, now=60.0) is None
+
+    cache.put("worker", user, worker_id, now=100.0)
+    cache.invalidate_user(str(user))
+    assert cache.get("worker", user, now=101.0) is None
+    assert cache.get("facility", other, now=1.0) == facility_id
+
+
+def test_profile_id_cache_is_bounded():
+    cache = ProfileIdCache(max_entries=1, ttl_seconds=60)
+    first, second = uuid.uuid4(), uuid.uuid4()
+    cache.put("worker", first, uuid.uuid4(), now=0.0)
+    cache.put("worker", second, uuid.uuid4(), now=0.0)
+    assert cache.get("worker", first, now=1.0) is None
+    assert cache.get("worker", second, now=1.0) is not None
@@ -0,0 +1,78 @@
+"""UploadService against local storage in a temporary directory."""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+import time
+import uuid
+
+import pytest
+from starlette.datastructures import Headers, UploadFile
+
+from app.core.storage import LocalStorage
+from app.services import UploadService
+
+ALLOWED = {"application/pdf", "image/png"}
+
+
+@pytest.fixture
+def service(db, tmp_path):
+    service = UploadService(db, LocalStorage(tmp_path / "uploads"))
+    service.incoming = tmp_path / "uploads" / ".incoming"
+    return service
+
+
+def upload_file(body: bytes, content_type: str) -> UploadFile:
+    return UploadFile(
+        io.BytesIO(body), filename="f", headers=Headers({"content-type": content_type})
+    )
+
+
+def stored_files(service):
+    return sorted(
+        str(path.relative_to(service.storage.root))
+        for path in service.storage.root.rglob("*")
+        if path.is_file()
+    )
+
+
+def test_same_bytes_under_another_type_reuse_the_stored_blob(service):
+    body = f"%PDF-1.4 {uuid.uuid4().hex}".encode()
+    first = asyncio.run(service.store(upload_file(body, "application/pdf"), ALLOWED))
+    again = asyncio.run(service.store(upload_file(body, "image/png"), ALLOWED))
+
+    assert again == first and first.endswith(".pdf")
+    assert stored_files(service) == [first[len("/uploads/"):]]
+
+
+class Disconnecting(UploadFile):
+    """An upload whose client goes away after the first chunk."""
+
+    async def read(self, size: int = -1) -> bytes:
+        if self.file.tell():
+            raise asyncio.CancelledError()
+        return await super().read(size)
+
+
+def test_temp_file_is_removed_when_the_client_disconnects(service):
+    upload = Disconnecting(
+        io.BytesIO(b"x" * 2 * 1024 * 1024), headers=Headers({"content-type": "image/png"})
+    )
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(service.store(upload, ALLOWED))
+    assert stored_files(service) == []
+
+
+def test_purge_incoming_deletes_files_idle_for_a_session_ttl(service):
+    service.incoming.mkdir(parents=True)
+    idle = time.time() - service.settings.upload_session_ttl_hours * 3600 - 60
+    for name, mtime in [("a.part", idle), (f"{uuid.uuid4()}.session", idle), ("b.part", None)]:
+        path = service.incoming / name
+        path.write_bytes(b"x")
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    assert service.purge_incoming() == 2
+    assert [path.name for path in service.incoming.iterdir()] == ["b.part"]